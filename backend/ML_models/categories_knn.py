@@ -3,7 +3,7 @@ import re
 import numpy as np
 import joblib
 from pathlib import Path
-from typing import Tuple
+from typing import List, Tuple
 
 MODEL_PATH = Path(__file__).parent / "knn_model.joblib"
 
@@ -49,23 +49,10 @@ def normalize_category(category: str) -> str:
         return "Uncategorized"
     return category
 
-def knn_predict(desc: str, k: int = 5, threshold: float = 0.25) -> Tuple[str, float]:
+def _vote(labels, sims, threshold: float) -> Tuple[str, float]:
     """
-    Returns (label, confidence). Cosine distance -> similarity = 1 - dist.
-    Confidence = avg similarity of neighbors belonging to the winning class.
-    Treats 'Other' and 'Uncategorized' as the same category.
+    Pick the winning label for one query from its neighbors' labels and similarities.
     """
-    if _vec is None or _nn is None or _y is None:
-        load_model()
-    
-    if desc == "AT&T": return "Utilities", 1.0
-
-    x = _vec.transform([normalize(desc)])
-    dists, idxs = _nn.kneighbors(x, n_neighbors=k, return_distance=True)
-    dists, idxs = dists[0], idxs[0]
-    sims = 1.0 - dists  # cosine similarity in [0..1]
-    labels = _y[idxs]
-
     # Normalize categories to treat 'Other' and 'Uncategorized' as the same
     normalized_labels = [normalize_category(label) for label in labels]
 
@@ -87,3 +74,46 @@ def knn_predict(desc: str, k: int = 5, threshold: float = 0.25) -> Tuple[str, fl
     if confidence < threshold:
         return "Uncategorized", confidence
     return best_label, confidence
+
+def knn_predict(desc: str, k: int = 5, threshold: float = 0.25) -> Tuple[str, float]:
+    """
+    Returns (label, confidence). Cosine distance -> similarity = 1 - dist.
+    Confidence = avg similarity of neighbors belonging to the winning class.
+    Treats 'Other' and 'Uncategorized' as the same category.
+    """
+    if _vec is None or _nn is None or _y is None:
+        load_model()
+    
+    if desc == "AT&T": return "Utilities", 1.0
+
+    x = _vec.transform([normalize(desc)])
+    dists, idxs = _nn.kneighbors(x, n_neighbors=k, return_distance=True)
+    dists, idxs = dists[0], idxs[0]
+    sims = 1.0 - dists  # cosine similarity in [0..1]
+    labels = _y[idxs]
+
+    return _vote(labels, sims, threshold)
+
+def knn_predict_batch(descs: List[str], k: int = 5, threshold: float = 0.25) -> List[Tuple[str, float]]:
+    """
+    Same as knn_predict for many descriptions at once: one vectorizer
+    transform and one neighbor query for the whole batch.
+    """
+    if _vec is None or _nn is None or _y is None:
+        load_model()
+
+    if len(descs) == 0:
+        return []
+
+    x = _vec.transform([normalize(desc) for desc in descs])
+    dists, idxs = _nn.kneighbors(x, n_neighbors=k, return_distance=True)
+    sims = 1.0 - dists  # cosine similarity in [0..1]
+    labels = _y[idxs]
+
+    results = []
+    for desc, row_labels, row_sims in zip(descs, labels, sims):
+        if desc == "AT&T":
+            results.append(("Utilities", 1.0))
+        else:
+            results.append(_vote(row_labels, row_sims, threshold))
+    return results
@@ -6,6 +6,7 @@ from sklearn.neighbors import NearestNeighbors
 
 ROOT = Path(__file__).resolve().parents[1]
 DATA_PATH = ROOT / "training_data" / "category_training_data.csv"
+PARQUET_PATH = DATA_PATH.with_suffix(".parquet")  # written alongside the CSV when pyarrow is installed
 MODEL_PATH = ROOT / "ML_models" / "knn_model.joblib"
 MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
 
@@ -36,7 +37,19 @@ def main():
     if not DATA_PATH.exists():
         raise FileNotFoundError(f"Missing labeled data: {DATA_PATH}")
 
-    df = pd.read_csv(DATA_PATH)
+    # The Parquet copy is only as fresh as the last generator run with pyarrow
+    # installed, so use it only when it isn't older than the CSV
+    df = None
+    source = DATA_PATH
+    if PARQUET_PATH.exists() and PARQUET_PATH.stat().st_mtime >= DATA_PATH.stat().st_mtime:
+        try:
+            df = pd.read_parquet(PARQUET_PATH)
+            source = PARQUET_PATH
+        except ImportError:
+            pass
+    if df is None:
+        df = pd.read_csv(DATA_PATH)
+    print(f"📄 Loaded {len(df)} training rows from {source}")
     if not {"description", "category"}.issubset(df.columns):
         raise ValueError("CSV must have columns: description, category")
 
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP helpers for the API test scripts
+"""
+
+import atexit
+import functools
+import gzip
+import hashlib
+import http.client
+import io
+import json
+import os
+import sys
+import threading
+import uuid
+import zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+
+# orjson encodes/decodes noticeably faster (and takes numpy values as-is);
+# fall back to the stdlib. dumps always returns bytes, ready to send as a
+# request body; sort_keys makes equal payloads serialize identically.
+try:
+    import orjson
+    from orjson import loads
+
+    def dumps(obj, sort_keys=False):
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, option=option)
+except ImportError:
+    from json import loads
+
+    def dumps(obj, sort_keys=False):
+        return json.dumps(obj, sort_keys=sort_keys).encode()
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Point the tests at another server with SFC_BASE, e.g. SFC_BASE=http://127.0.0.1:9000
+BASE_URL = os.environ.get("SFC_BASE", "http://localhost:8000").rstrip("/")
+
+# file_ids of CSVs uploaded by earlier runs, keyed by content hash, mtime and size
+UPLOAD_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "sfc_tests", "fileid.json")
+
+# Set TEST_LIVE_OUTPUT=1 to print line by line instead of once per test function
+LIVE_OUTPUT = os.environ.get("TEST_LIVE_OUTPUT", "") not in ("", "0")
+
+# Set TEST_VERBOSE=1 to print every field of the larger responses
+VERBOSE = os.environ.get("TEST_VERBOSE", "") not in ("", "0")
+
+# One pooled session for every request so keep-alive sockets are reused
+# instead of opening a new TCP connection per call
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=3,
+        connect=3,
+        backoff_factor=0.2,
+        # Not 503: the server answers that on purpose when a model isn't
+        # loaded, and tests check for it
+        status_forcelist=[502, 504],
+        raise_on_status=False,
+    ),
+)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+# urllib3 lists br and zstd only when brotli / zstandard are installed to
+# decode them, so the server never picks an encoding we can't read
+SESSION.headers.update({"Connection": "keep-alive", "Accept-Encoding": make_headers(accept_encoding=True)["accept-encoding"]})
+# Scripts run in one process by run_all_tests share this session, so it is
+# closed once at exit rather than by each script
+atexit.register(SESSION.close)
+
+UPLOAD_URL = BASE_URL + "/upload-transactions"
+UPLOAD_BATCH_URL = UPLOAD_URL + "/batch"
+
+# Uploads are streamed from disk in large pieces rather than built in memory
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Plain-HTTP GETs skip requests entirely (see fast_get); one persistent
+# connection per thread since HTTPConnection is not thread-safe
+_BASE = urlsplit(BASE_URL)
+_local = threading.local()
+
+FastResponse = namedtuple("FastResponse", ["status_code", "content"])
+
+# Long-lived worker pool for request fan-outs, so each sweep doesn't pay to
+# spin up and tear down its own threads
+_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="api-client")
+atexit.register(_EXECUTOR.shutdown, wait=False)
+
+# Separate pool for whole test functions. Tests block on request futures from
+# _EXECUTOR, so running them on that pool too could leave no worker free for
+# the requests they are waiting on
+_TEST_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="api-client-test")
+atexit.register(_TEST_EXECUTOR.shutdown, wait=False)
+
+
+@functools.lru_cache(maxsize=None)
+def csv_exists(path):
+    """Check once whether a test CSV exists; the answer is reused for the rest of the run"""
+    return os.path.exists(path)
+
+
+def _connection():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = http.client.HTTPConnection(_BASE.hostname, _BASE.port or 80)
+        _local.conn = conn
+    return conn
+
+
+def fast_get(url, params=None):
+    """
+    GET a URL on the local API server over a raw persistent http.client connection
+
+    Skips requests' per-call session/hook/prepare overhead, which dominates
+    for localhost. Returns a FastResponse with status_code and content bytes;
+    network failures are raised as requests' ConnectionError so callers can
+    keep their existing error handling.
+    """
+    parts = urlsplit(url)
+    if parts.scheme != "http" or parts.netloc != _BASE.netloc:
+        response = SESSION.get(url, params=params)
+        return FastResponse(response.status_code, response.content)
+
+    target = parts.path or "/"
+    query = "&".join(q for q in (parts.query, urlencode(params or {})) if q)
+    if query:
+        target += "?" + query
+
+    # A kept-alive socket may have been closed by the server; retry once fresh
+    for attempt in range(2):
+        conn = _connection()
+        try:
+            conn.request("GET", target, headers={"Accept-Encoding": "gzip"})
+            response = conn.getresponse()
+            body = response.read()
+            if response.getheader("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            return FastResponse(response.status, body)
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            _local.conn = None
+            if attempt == 1:
+                raise requests.exceptions.ConnectionError(e) from e
+
+
+def _multipart_stream(parts, boundary, compress, field="file"):
+    """
+    Yield a multipart/form-data body with one part per (open CSV file, filename)
+    in parts, reading each in UPLOAD_CHUNK_SIZE pieces and optionally
+    gzip-compressing it on the fly
+    """
+    for csv_file, filename in parts:
+        filename = filename + (".gz" if compress else "")
+        yield (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {'application/gzip' if compress else 'text/csv'}\r\n\r\n"
+        ).encode()
+        # wbits=31 writes a gzip container; level 1 is the cheapest useful setting
+        compressor = zlib.compressobj(1, zlib.DEFLATED, 31) if compress else None
+        while True:
+            chunk = csv_file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+        if compressor:
+            yield compressor.flush()
+        yield b"\r\n"
+    yield f"--{boundary}--\r\n".encode()
+
+
+def upload_csv(csv_path, url=UPLOAD_URL, compress=True, csv_file=None):
+    """
+    POST a CSV to the upload endpoint as a streamed multipart body
+
+    The file is sent in 1 MiB pieces as it is read, so the whole body is
+    never held in memory. With compress (the default) the CSV is gzipped on
+    the fly and sent as <name>.csv.gz, which the server unpacks; transaction
+    text typically shrinks 5-10x. Pass an already-open csv_file to avoid
+    opening the path again; it is closed once sent. Returns the requests
+    Response; raises FileNotFoundError if csv_path doesn't exist.
+    """
+    if csv_file is None:
+        csv_file = open(csv_path, "rb")
+    boundary = uuid.uuid4().hex
+    # Closed here rather than in the stream, which never runs if the
+    # connection fails before the body is sent
+    try:
+        return SESSION.post(
+            url,
+            data=_multipart_stream([(csv_file, os.path.basename(csv_path))], boundary, compress),
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+    finally:
+        csv_file.close()
+
+
+def upload_csvs(csv_paths, url=UPLOAD_BATCH_URL, compress=True):
+    """
+    POST several CSVs to the batch upload endpoint in one streamed request
+
+    Same streaming and compression as upload_csv, with one multipart part
+    per file. Returns the requests Response, whose "results" list has one
+    entry per path in order.
+    """
+    parts = []
+    boundary = uuid.uuid4().hex
+    try:
+        for csv_path in csv_paths:
+            parts.append((open(csv_path, "rb"), os.path.basename(csv_path)))
+        return SESSION.post(
+            url,
+            data=_multipart_stream(parts, boundary, compress, field="files"),
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+    finally:
+        for csv_file, _ in parts:
+            csv_file.close()
+
+
+def _upload_cache_key(csv_path, stat=None, csv_file=None):
+    """
+    Key an upload by a hash of the CSV's first UPLOAD_CHUNK_SIZE bytes plus
+    its mtime and size, so every script (and any copy or relative path of
+    the same file) shares one cache entry. An open csv_file is read from
+    instead of reopening the path, and rewound afterwards.
+    """
+    if csv_file is None:
+        with open(csv_path, "rb") as f:
+            head = f.read(UPLOAD_CHUNK_SIZE)
+            stat = stat or os.fstat(f.fileno())
+    else:
+        head = csv_file.read(UPLOAD_CHUNK_SIZE)
+        csv_file.seek(0)
+        stat = stat or os.fstat(csv_file.fileno())
+    return f"{hashlib.sha1(head).hexdigest()}:{stat.st_mtime}-{stat.st_size}"
+
+
+def _load_upload_cache():
+    try:
+        with open(UPLOAD_CACHE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def cached_file_id(csv_path, stat=None, csv_file=None):
+    """
+    Return the file_id from an earlier upload of csv_path, if the server still has it
+
+    Lets test scripts skip re-uploading (and the server skip re-parsing) the
+    same sample CSV on every run, whichever script uploaded it first. stat
+    and an open csv_file may be passed in if the caller already has them.
+    """
+    file_id = _load_upload_cache().get(_upload_cache_key(csv_path, stat, csv_file))
+    if not file_id:
+        return None
+    try:
+        response = SESSION.get(f"{BASE_URL}/files/{file_id}")
+    except requests.exceptions.ConnectionError:
+        return None
+    return file_id if response.status_code == 200 else None
+
+
+def remember_file_id(csv_path, file_id, stat=None):
+    """Record the file_id a CSV was uploaded as, for cached_file_id on later runs"""
+    cache = _load_upload_cache()
+    cache[_upload_cache_key(csv_path, stat)] = file_id
+    try:
+        os.makedirs(os.path.dirname(UPLOAD_CACHE_PATH), exist_ok=True)
+        with open(UPLOAD_CACHE_PATH, "w") as f:
+            json.dump(cache, f)
+    except OSError:
+        pass
+
+
+def warm_up():
+    """
+    Open a pooled connection with a cheap GET /health before any test runs
+
+    The first request otherwise pays for name resolution and the TCP handshake,
+    which skews the timing of whichever test happens to go first. A server
+    that isn't up yet is ignored here; the tests report it themselves.
+    """
+    try:
+        SESSION.get(BASE_URL + "/health", timeout=2)
+    except requests.exceptions.RequestException:
+        pass
+
+
+def with_retry(func):
+    """
+    Report a server that can't be reached instead of raising
+
+    Transient failures are already retried with backoff by the session's
+    adapter; anything that still can't connect ends the test with the usual
+    message and a None result.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except (ConnectionError, requests.exceptions.ConnectionError):
+            print("❌ Could not connect to server")
+            return None
+    return wrapper
+
+
+def run_concurrently(func, items):
+    """
+    Call func on every item using the shared worker pool
+
+    Returns a list of futures in the same order as items, so callers can
+    print results in a stable order while the requests overlap.
+    """
+    return [_EXECUTOR.submit(func, item) for item in items]
+
+
+class _ThreadStdout:
+    """
+    sys.stdout stand-in that sends each thread's output to that thread's
+    capture buffer, if it has one, and to the real stdout otherwise
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        buffer = getattr(_output, "buffer", None)
+        return (buffer if buffer is not None else self.stream).write(text)
+
+    def flush(self):
+        if getattr(_output, "buffer", None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+_output = threading.local()
+_output_lock = threading.Lock()
+
+
+def _capture(func, *args, **kwargs):
+    """Run func with this thread's prints captured; returns (result, text, error)"""
+    if not isinstance(sys.stdout, _ThreadStdout):
+        sys.stdout = _ThreadStdout(sys.stdout)
+    previous = getattr(_output, "buffer", None)
+    _output.buffer = io.StringIO()
+    try:
+        return func(*args, **kwargs), _output.buffer.getvalue(), None
+    except Exception as e:
+        return None, _output.buffer.getvalue(), e
+    finally:
+        _output.buffer = previous
+
+
+def _emit(text):
+    """Write captured text to the enclosing capture, or to stdout as one block"""
+    if getattr(_output, "buffer", None) is not None:
+        _output.buffer.write(text)
+        return
+    stream = sys.stdout.stream if isinstance(sys.stdout, _ThreadStdout) else sys.stdout
+    with _output_lock:
+        stream.write(text)
+        stream.flush()
+
+
+def buffered_output(func):
+    """
+    Collect everything a test function prints and write it to stdout in one go
+
+    Avoids a lock/encode/flush per print() when output is piped to a log.
+    Capture is per thread, so decorated functions can run concurrently
+    without their output interleaving.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if LIVE_OUTPUT:
+            return func(*args, **kwargs)
+        result, text, error = _capture(func, *args, **kwargs)
+        _emit(text)
+        if error is not None:
+            raise error
+        return result
+    return wrapper
+
+
+def run_tests_concurrently(tests, *args):
+    """
+    Run independent test functions on the test pool, printing each one's
+    output as a contiguous block in the order given
+
+    Wall time is the slowest test rather than the sum. With TEST_LIVE_OUTPUT
+    set the tests simply run one after another.
+    """
+    if LIVE_OUTPUT:
+        return [test(*args) for test in tests]
+    futures = [_TEST_EXECUTOR.submit(_capture, test, *args) for test in tests]
+    results = []
+    for future in futures:
+        result, text, error = future.result()
+        _emit(text)
+        if error is not None:
+            raise error
+        results.append(result)
+    return results
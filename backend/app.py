@@ -1,14 +1,18 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException, Depends
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import pandas as pd
 import io
 import logging
 import os
 import uuid
 import hashlib
+import zlib
 import json
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 import numpy as np
@@ -19,7 +23,7 @@ import sys
 
 # Add ML_models to path
 sys.path.append(str(Path(__file__).parent / "ML_models"))
-from categories_knn import knn_predict, load_model
+from categories_knn import knn_predict, knn_predict_batch, load_model
 from find_subscriptions import load_model as load_subscription_model, predict_subscriptions
 
 # Add LLM to path
@@ -28,7 +32,7 @@ from llm_insights import generate_llm_cards
 
 # Add wealth calculator to path
 sys.path.append(str(Path(__file__).parent))
-from wealth_calculator import WealthInputs, Assumptions, MonthlyFlows, simulate_future_wealth
+from wealth_calculator import WealthInputs, Assumptions, MonthlyFlows, simulate_future_wealth, simulate_future_wealth_batch
 from savings_analyzer import SavingsAnalyzer, create_savings_analysis_response
 
 
@@ -59,6 +63,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger JSON responses (analysis, categorized transactions, time series)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Create uploads directory if it doesn't exist
 UPLOAD_DIR = Path("transaction_data")
 UPLOAD_DIR.mkdir(exist_ok=True)
@@ -66,6 +73,9 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 # Create hash registry file to track file hashes
 HASH_REGISTRY_FILE = UPLOAD_DIR / "file_hashes.json"
 
+# Largest CSV a .csv.gz upload may expand to, so a small gzip bomb can't exhaust memory
+MAX_DECOMPRESSED_CSV_BYTES = 100 * 1024 * 1024
+
 # ML Model initialization
 ML_MODEL_LOADED = False
 ML_MODEL_PATH = Path(__file__).parent / "ML_models" / "knn_model.joblib"
@@ -346,6 +356,27 @@ def predict_transaction_category(description: str, k: int = 5, threshold: float
         logger.error(f"Error predicting category for '{description}': {e}")
         return "Uncategorized", 0.0
 
+def predict_transaction_categories(descriptions: List[str], k: int = 5, threshold: float = 0.35) -> List[Tuple[str, float]]:
+    """
+    Predict categories for many transaction descriptions in one k-NN query
+    
+    Args:
+        descriptions: Transaction description texts
+        k: Number of neighbors to consider
+        threshold: Minimum confidence threshold
+        
+    Returns:
+        List of (predicted_category, confidence_score) tuples, aligned with descriptions
+    """
+    if not ML_MODEL_LOADED:
+        return [("Uncategorized", 0.0)] * len(descriptions)
+    
+    try:
+        return knn_predict_batch(descriptions, k=k, threshold=threshold)
+    except Exception as e:
+        logger.error(f"Error predicting categories for batch of {len(descriptions)}: {e}")
+        return [("Uncategorized", 0.0)] * len(descriptions)
+
 def categorize_transactions(df: pd.DataFrame) -> pd.DataFrame:
     """
     Add ML-predicted categories to transaction dataframe
@@ -481,6 +512,496 @@ def get_file_info(file_id: str) -> Optional[Dict[str, Any]]:
         "file_size": stat.st_size
     }
 
+# Scored-merchant columns the subscriptions endpoint reports
+SUBSCRIPTION_RESULT_COLUMNS = [
+    "merchant", "score", "n_occurrences", "coverage_months", "median_gap_days",
+    "dom_consistency", "amount_mean", "autocorr_30d",
+]
+
+@lru_cache(maxsize=16)
+def score_file_subscriptions(file_id: str, mtime: float) -> Tuple[Mapping[str, np.ndarray], int]:
+    """
+    Score every merchant in an uploaded file for subscription likelihood
+    
+    Scoring doesn't depend on the threshold, so the result is cached and each
+    threshold query only filters it. mtime is part of the key so a replaced
+    file is scored again. Only the reported columns are kept, as read-only
+    arrays in a read-only mapping, since every caller shares the cached result.
+    
+    Args:
+        file_id: ID of the uploaded file
+        mtime: Modification time of the file's CSV
+        
+    Returns:
+        Tuple of (column name -> array over scored merchants, number of expense transactions analyzed)
+    """
+    csv_file = UPLOAD_DIR / f"{file_id}.csv"
+    
+    # Read and parse the CSV file
+    df = pd.read_csv(csv_file)
+    
+    # Find date and description columns
+    date_col = None
+    description_col = None
+    
+    for col in df.columns:
+        if any(keyword in col.lower() for keyword in ['date', 'time']):
+            date_col = col
+        if any(keyword in col.lower() for keyword in ['description', 'merchant', 'payee']):
+            description_col = col
+    
+    if not date_col or not description_col:
+        raise HTTPException(status_code=400, detail="Could not find date or description columns")
+    
+    # Prepare data for subscription detection
+    df_sub = df[[date_col, description_col]].copy()
+    df_sub.columns = ['date', 'description']
+    
+    # Add amount column if available
+    amount_col = None
+    for col in df.columns:
+        if any(keyword in col.lower() for keyword in ['amount', 'debit', 'credit', 'value']):
+            amount_col = col
+            break
+    
+    if amount_col:
+        df_sub['amount'] = pd.to_numeric(df[amount_col], errors='coerce')
+    else:
+        df_sub['amount'] = 0.0
+    
+    # Filter to only include expenses (negative amounts or zero)
+    # Income (positive amounts) should not be considered for subscription detection
+    df_sub = df_sub[df_sub['amount'] <= 0].copy()
+    
+    if len(df_sub) == 0:
+        raise HTTPException(status_code=400, detail="No expense transactions found for subscription analysis")
+    
+    # Detect subscriptions
+    subscriptions = predict_subscriptions(df_sub, SUBSCRIPTION_MODEL, SUBSCRIPTION_FEATURE_COLS)
+    
+    columns = {}
+    for col in SUBSCRIPTION_RESULT_COLUMNS:
+        values = subscriptions[col].to_numpy(copy=True)
+        values.setflags(write=False)
+        columns[col] = values
+    return MappingProxyType(columns), len(df_sub)
+
+def find_top_spending_categories(file_id: str) -> List[Dict[str, Any]]:
+    """
+    Find the top 3 spending categories of the last 30 days in an uploaded file,
+    with the 20% reduction suggested for each
+    
+    Args:
+        file_id: ID of the uploaded file
+        
+    Returns:
+        List of category dicts; empty if the file is missing or has no usable spending
+    """
+    top_categories = []
+    try:
+        # Get spending categories from the uploaded file
+        csv_file = UPLOAD_DIR / f"{file_id}.csv"
+        if csv_file.exists():
+            df = pd.read_csv(csv_file)
+            df_with_ml = categorize_transactions(df.copy())
+            
+            # Find amount and date columns
+            amount_col = None
+            date_col = None
+            
+            for col in df.columns:
+                if any(keyword in col.lower() for keyword in ['amount', 'debit', 'credit', 'value']):
+                    amount_col = col
+                if any(keyword in col.lower() for keyword in ['date', 'time']):
+                    date_col = col
+            
+            if amount_col and date_col:
+                # Process data for the past 30 days
+                df_with_ml[date_col] = pd.to_datetime(df_with_ml[date_col], errors='coerce')
+                df_time_series = df_with_ml.dropna(subset=[date_col, amount_col]).copy()
+                
+                if len(df_time_series) > 0:
+                    # Convert amount to numeric
+                    df_time_series[amount_col] = pd.to_numeric(
+                        df_time_series[amount_col].astype(str).str.replace('$', '').str.replace(',', ''), 
+                        errors='coerce'
+                    )
+                    
+                    # Filter data for the past 30 days
+                    end_date = df_time_series[date_col].max()
+                    start_date = end_date - pd.Timedelta(days=29)
+                    df_current = df_time_series[df_time_series[date_col] >= start_date].copy()
+                    
+                    # Get spending categories (exclude income and rent)
+                    spending_data = df_current[df_current['ml_category'] != 'Income'].copy()
+                    spending_data = spending_data[~spending_data['ml_category'].str.contains('rent', case=False, na=False)]
+                    
+                    if len(spending_data) > 0:
+                        # Group by category and sum amounts
+                        category_spending = spending_data.groupby('ml_category')[amount_col].sum().abs().sort_values(ascending=False)
+                        
+                        # Get top 3 categories
+                        top_categories = []
+                        for i, (category, amount) in enumerate(category_spending.head(3).items()):
+                            top_categories.append({
+                                "category": category,
+                                "current_spending": float(amount),
+                                "suggested_reduction": float(amount * 0.2),
+                                "new_spending": float(amount * 0.8)
+                            })
+                        
+                        logger.info(f"Found top spending categories: {[cat['category'] for cat in top_categories]}")
+                    else:
+                        logger.warning("No spending data found for optimization")
+                else:
+                    logger.warning("No valid time series data found for optimization")
+            else:
+                logger.warning("Could not find amount or date columns for optimization")
+        else:
+            logger.warning(f"File {file_id} not found for spending analysis")
+    except Exception as e:
+        logger.warning(f"Error analyzing spending patterns: {e}")
+    
+    return top_categories
+
+def calculate_optimized_projections(wealth_data: dict, top_categories: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Project net worth with the request's contributions and with the savings
+    from top_categories added to retirement contributions
+    
+    Args:
+        wealth_data: Request body with assets, liabilities, contributions and debtPayments
+        top_categories: Spending categories from find_top_spending_categories
+        
+    Returns:
+        Response dict with original and optimized projections per period
+    """
+    # Extract data from the request
+    assets_data = wealth_data.get("assets", {})
+    liabilities_data = wealth_data.get("liabilities", {})
+    contributions_data = wealth_data.get("contributions", {})
+    debt_payments_data = wealth_data.get("debtPayments", {})
+    
+    # Create WealthInputs object
+    wealth_inputs = WealthInputs(
+        # Assets
+        real_estate=float(assets_data.get("realEstate", {}).get("value", 0)),
+        checking=float(assets_data.get("checking", {}).get("value", 0)),
+        savings_hysa=float(assets_data.get("savings", {}).get("value", 0)),
+        retirement_invest=float(assets_data.get("retirement", {}).get("value", 0)),
+        cars_value=float(assets_data.get("cars", {}).get("value", 0)),
+        other_assets=float(assets_data.get("otherAssets", {}).get("value", 0)),
+        
+        # Liabilities
+        real_estate_loans=float(liabilities_data.get("realEstateLoans", {}).get("value", 0)),
+        credit_card_debt=float(liabilities_data.get("creditCardDebt", {}).get("value", 0)),
+        personal_loans=float(liabilities_data.get("personalLoans", {}).get("value", 0)),
+        student_loans=float(liabilities_data.get("studentLoans", {}).get("value", 0)),
+        car_loans=float(liabilities_data.get("carLoans", {}).get("value", 0)),
+        other_debt=float(liabilities_data.get("otherDebt", {}).get("value", 0))
+    )
+    
+    # Create Assumptions object
+    assumptions = Assumptions(
+        real_estate_apr=float(assets_data.get("realEstate", {}).get("rate", 3.5)),
+        hysa_apr=float(assets_data.get("savings", {}).get("rate", 2.0)),
+        retirement_apr=float(assets_data.get("retirement", {}).get("rate", 10.0)),
+        cars_apr=float(assets_data.get("cars", {}).get("rate", -10.0)),
+        other_assets_apr=float(assets_data.get("otherAssets", {}).get("rate", 0.0)),
+        
+        mortgage_apr=float(liabilities_data.get("realEstateLoans", {}).get("rate", 6.0)),
+        cc_apr=float(liabilities_data.get("creditCardDebt", {}).get("rate", 22.0)),
+        personal_apr=float(liabilities_data.get("personalLoans", {}).get("rate", 12.0)),
+        student_apr=float(liabilities_data.get("studentLoans", {}).get("rate", 7.0)),
+        car_apr=float(liabilities_data.get("carLoans", {}).get("rate", 9.0)),
+        other_debt_apr=float(liabilities_data.get("otherDebt", {}).get("rate", 0.0))
+    )
+    
+    # Calculate monthly savings from spending reduction
+    monthly_savings = sum([cat["suggested_reduction"] for cat in top_categories])
+    
+    # Create MonthlyFlows object with optimized contributions
+    monthly_flows = MonthlyFlows(
+        # Original contributions
+        contrib_checking=float(contributions_data.get("contrib_checking", 0)),
+        contrib_hysa=float(contributions_data.get("contrib_hysa", 0)),
+        contrib_retirement=float(contributions_data.get("contrib_retirement", 0)),
+        move_checking_to_invest=float(contributions_data.get("move_checking_to_invest", 0)),
+        
+        # Debt payments
+        pay_mortgage=float(debt_payments_data.get("pay_mortgage", 0)),
+        pay_cc=float(debt_payments_data.get("pay_cc", 0)),
+        pay_personal=float(debt_payments_data.get("pay_personal", 0)),
+        pay_student=float(debt_payments_data.get("pay_student", 0)),
+        pay_car=float(debt_payments_data.get("pay_car", 0)),
+        pay_other_debt=float(debt_payments_data.get("pay_other_debt", 0))
+    )
+    
+    # Create optimized MonthlyFlows with additional savings
+    optimized_flows = MonthlyFlows(
+        # Add savings to retirement contributions (most impactful for long-term wealth)
+        contrib_checking=float(contributions_data.get("contrib_checking", 0)),
+        contrib_hysa=float(contributions_data.get("contrib_hysa", 0)),
+        contrib_retirement=float(contributions_data.get("contrib_retirement", 0)) + monthly_savings,
+        move_checking_to_invest=float(contributions_data.get("move_checking_to_invest", 0)),
+        
+        # Same debt payments
+        pay_mortgage=float(debt_payments_data.get("pay_mortgage", 0)),
+        pay_cc=float(debt_payments_data.get("pay_cc", 0)),
+        pay_personal=float(debt_payments_data.get("pay_personal", 0)),
+        pay_student=float(debt_payments_data.get("pay_student", 0)),
+        pay_car=float(debt_payments_data.get("pay_car", 0)),
+        pay_other_debt=float(debt_payments_data.get("pay_other_debt", 0))
+    )
+    
+    # Define time periods
+    time_periods = {
+        "3m": 3,
+        "1y": 12,
+        "2y": 24,
+        "5y": 60,
+        "10y": 120,
+        "20y": 240,
+        "50y": 600
+    }
+    
+    # Calculate both original and optimized projections
+    original_projections = {}
+    optimized_projections = {}
+    
+    for period_name, months in time_periods.items():
+        try:
+            # Original and optimized projections as one two-scenario batch;
+            # only the totals are reported here, so skip the per-bucket table
+            batch = simulate_future_wealth_batch(
+                starts=[wealth_inputs, wealth_inputs],
+                months=months,
+                assumptions=assumptions,
+                flows=[monthly_flows, optimized_flows],
+                output="summary"
+            )
+            months_list = batch["month"].tolist()
+            net_worth_rows = batch["net_worth"].tolist()
+            assets_rows = batch["assets_total"].tolist()
+            liabilities_rows = batch["liabilities_total"].tolist()
+            
+            # Process original (row 0) and optimized (row 1) projections
+            original_time_series, optimized_time_series = [
+                [
+                    {"month": month, "net_worth": net_worth, "assets_total": assets, "liabilities_total": liabilities}
+                    for month, net_worth, assets, liabilities in zip(
+                        months_list, net_worth_rows[i], assets_rows[i], liabilities_rows[i]
+                    )
+                ]
+                for i in range(2)
+            ]
+            original_net_worth = net_worth_rows[0][-1]
+            optimized_net_worth = net_worth_rows[1][-1]
+            
+            # Calculate current net worth for comparison
+            current_net_worth = wealth_inputs.real_estate + wealth_inputs.checking + wealth_inputs.savings_hysa + wealth_inputs.retirement_invest + wealth_inputs.cars_value + wealth_inputs.other_assets - (wealth_inputs.real_estate_loans + wealth_inputs.credit_card_debt + wealth_inputs.personal_loans + wealth_inputs.student_loans + wealth_inputs.car_loans + wealth_inputs.other_debt)
+            
+            # Store projections
+            original_projections[period_name] = {
+                "months": months,
+                "net_worth": original_net_worth,
+                "net_worth_change": original_net_worth - current_net_worth,
+                "time_series": original_time_series
+            }
+            
+            optimized_projections[period_name] = {
+                "months": months,
+                "net_worth": optimized_net_worth,
+                "net_worth_change": optimized_net_worth - current_net_worth,
+                "time_series": optimized_time_series,
+                "improvement": optimized_net_worth - original_net_worth,
+                "improvement_pct": ((optimized_net_worth - original_net_worth) / abs(original_net_worth) * 100) if original_net_worth != 0 else 0
+            }
+            
+        except Exception as e:
+            logger.error(f"Error calculating projections for {period_name}: {e}")
+            original_projections[period_name] = {"error": f"Failed to calculate: {str(e)}"}
+            optimized_projections[period_name] = {"error": f"Failed to calculate: {str(e)}"}
+    
+    return {
+        "current_net_worth": current_net_worth,
+        "top_spending_categories": top_categories,
+        "monthly_savings": monthly_savings,
+        "original_projections": original_projections,
+        "optimized_projections": optimized_projections,
+        "summary": {
+            "total_contributions_monthly": sum([
+                monthly_flows.contrib_checking,
+                monthly_flows.contrib_hysa,
+                monthly_flows.contrib_retirement
+            ]),
+            "optimized_contributions_monthly": sum([
+                optimized_flows.contrib_checking,
+                optimized_flows.contrib_hysa,
+                optimized_flows.contrib_retirement
+            ]),
+            "additional_monthly_savings": monthly_savings
+        }
+    }
+
+def validate_savings_request(savings_request: dict) -> Tuple[str, float, int, Path]:
+    """
+    Parse and validate a /savings/analyze request body
+    
+    Args:
+        savings_request: Request body with file_id, target_amount and months
+        
+    Returns:
+        Tuple of (file_id, target_amount, months, csv_file)
+        
+    Raises:
+        HTTPException: 400 for invalid parameters, 404 if the file doesn't exist
+        ValueError: If target_amount or months isn't a number
+    """
+    file_id = savings_request.get("file_id")
+    target_amount = float(savings_request.get("target_amount", 0))
+    months = int(savings_request.get("months", 12))
+    
+    logger.info(f"Parsed parameters - file_id: {file_id}, target_amount: {target_amount}, months: {months}")
+    
+    if not file_id:
+        raise HTTPException(status_code=400, detail="file_id is required")
+    
+    if target_amount <= 0:
+        raise HTTPException(status_code=400, detail="target_amount must be positive")
+    
+    if months <= 0:
+        raise HTTPException(status_code=400, detail="months must be positive")
+    
+    # Get the CSV file
+    csv_file = UPLOAD_DIR / f"{file_id}.csv"
+    logger.info(f"Looking for CSV file: {csv_file}")
+    if not csv_file.exists():
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    return file_id, target_amount, months, csv_file
+
+def decompress_gzip_csv(content: bytes) -> bytes:
+    """
+    Decompress a .csv.gz upload, refusing to expand it past MAX_DECOMPRESSED_CSV_BYTES
+    
+    Raises:
+        HTTPException: 400 if the data isn't valid gzip, 413 if it expands past the cap
+    """
+    decompressor = zlib.decompressobj(wbits=31)
+    try:
+        decompressed = decompressor.decompress(content, MAX_DECOMPRESSED_CSV_BYTES)
+    except zlib.error:
+        raise HTTPException(status_code=400, detail="Invalid gzip-compressed CSV file")
+    if not decompressor.eof:
+        if len(decompressed) >= MAX_DECOMPRESSED_CSV_BYTES:
+            raise HTTPException(status_code=413, detail="Decompressed CSV file is too large")
+        raise HTTPException(status_code=400, detail="Invalid gzip-compressed CSV file")
+    return decompressed
+
+def store_uploaded_csv(original_filename: str, content: bytes) -> Dict[str, Any]:
+    """
+    Validate, deduplicate and save one uploaded transaction CSV
+    
+    Args:
+        original_filename: Name the file was uploaded as (.csv or .csv.gz)
+        content: Raw uploaded bytes
+        
+    Returns:
+        Upload response dict, for a new file or for the existing duplicate
+        
+    Raises:
+        HTTPException: 400 if the file isn't a readable CSV, 413 if a .csv.gz expands too far
+    """
+    # Validate file type (gzip-compressed CSVs are accepted as .csv.gz)
+    filename = original_filename
+    is_gzipped = filename.endswith('.csv.gz')
+    if not (filename.endswith('.csv') or is_gzipped):
+        raise HTTPException(
+            status_code=400, 
+            detail="File must be a CSV file"
+        )
+    
+    if is_gzipped:
+        content = decompress_gzip_csv(content)
+        filename = filename[:-len('.gz')]
+    
+    # Calculate file hash to check for duplicates
+    file_hash = calculate_file_hash(content)
+    
+    # Check if this file already exists
+    existing_file = find_duplicate_file(file_hash)
+    if existing_file:
+        logger.info(f"Duplicate file detected: {filename} (same as {existing_file['filename']})")
+        return {
+            "message": "File already exists (duplicate detected)",
+            "file_id": existing_file["file_id"],
+            "filename": existing_file["filename"],
+            "original_upload_time": existing_file["upload_time"],
+            "is_duplicate": True
+        }
+    
+    # Generate unique file ID for new file
+    file_id = str(uuid.uuid4())
+    
+    # Save the original file
+    csv_file_path = UPLOAD_DIR / f"{file_id}.csv"
+    with open(csv_file_path, 'w', encoding='utf-8') as f:
+        f.write(content.decode('utf-8'))
+    
+    # Register the file hash
+    register_file_hash(file_hash, file_id, filename)
+    
+    # Basic validation - try to parse the CSV
+    try:
+        csv_data = io.StringIO(content.decode('utf-8'))
+        df = pd.read_csv(csv_data)
+        
+        logger.info(f"Successfully uploaded financial CSV: {filename} with {len(df)} transactions")
+        
+        return {
+            "message": "Financial transaction CSV uploaded successfully",
+            "file_id": file_id,
+            "filename": filename,
+            "rows": len(df),
+            "columns": len(df.columns),
+            "is_duplicate": False
+        }
+        
+    except pd.errors.EmptyDataError:
+        # Clean up saved file and hash registration
+        csv_file_path.unlink(missing_ok=True)
+        # Remove from hash registry
+        registry = load_hash_registry()
+        registry.pop(file_hash, None)
+        save_hash_registry(registry)
+        raise HTTPException(
+            status_code=400,
+            detail="The CSV file is empty"
+        )
+    except pd.errors.ParserError as e:
+        # Clean up saved file and hash registration
+        csv_file_path.unlink(missing_ok=True)
+        # Remove from hash registry
+        registry = load_hash_registry()
+        registry.pop(file_hash, None)
+        save_hash_registry(registry)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Error parsing CSV file: {str(e)}"
+        )
+    except UnicodeDecodeError:
+        # Clean up saved file and hash registration
+        csv_file_path.unlink(missing_ok=True)
+        # Remove from hash registry
+        registry = load_hash_registry()
+        registry.pop(file_hash, None)
+        save_hash_registry(registry)
+        raise HTTPException(
+            status_code=400,
+            detail="File encoding error. Please ensure the file is UTF-8 encoded"
+        )
+
 def analyze_financial_transactions(df: pd.DataFrame) -> Dict[str, Any]:
     """Analyze financial transaction data specifically"""
     # Add ML-predicted categories
@@ -732,6 +1253,20 @@ async def get_hash_registry():
         "total_hashes": len(registry)
     }
 
+@app.get("/files/registry/{file_hash}")
+async def get_registered_file(file_hash: str):
+    """Look up an uploaded file by the SHA-256 of its content, so clients can skip re-uploading it"""
+    existing_file = find_duplicate_file(file_hash)
+    if not existing_file:
+        raise HTTPException(status_code=404, detail="No file with this hash")
+    
+    return {
+        "file_id": existing_file["file_id"],
+        "filename": existing_file["filename"],
+        "original_upload_time": existing_file["upload_time"],
+        "is_duplicate": True
+    }
+
 @app.get("/ml/status")
 async def get_ml_status():
     """Get the status of the ML models"""
@@ -767,16 +1302,55 @@ async def predict_single_category(description: str, k: int = 7, threshold: float
         }
     }
 
+@app.post("/ml/predict-category/batch")
+async def predict_category_batch(batch_request: dict, k: int = 7, threshold: float = 0.25):
+    """Predict spending categories for a list of transaction descriptions in one call"""
+    if not ML_MODEL_LOADED:
+        raise HTTPException(status_code=503, detail="ML model not loaded")
+    
+    descriptions = batch_request.get("descriptions")
+    if not isinstance(descriptions, list):
+        raise HTTPException(status_code=400, detail="descriptions must be a list of strings")
+    
+    descriptions = [str(desc) for desc in descriptions]
+    predictions = predict_transaction_categories(descriptions, k=k, threshold=threshold)
+    
+    return {
+        "predictions": [
+            {
+                "description": desc,
+                "predicted_category": category,
+                "confidence": confidence
+            }
+            for desc, (category, confidence) in zip(descriptions, predictions)
+        ],
+        "parameters": {
+            "k": k,
+            "threshold": threshold
+        }
+    }
+
 @app.get("/files/{file_id}/categorized")
-async def get_categorized_transactions(file_id: str):
-    """Get transactions with ML-predicted categories"""
+async def get_categorized_transactions(file_id: str, limit: Optional[int] = None):
+    """Get transactions with ML-predicted categories
+
+    With limit, only the first `limit` transactions are categorized and
+    returned; total_transactions still reports the full count.
+    """
     csv_file = UPLOAD_DIR / f"{file_id}.csv"
     if not csv_file.exists():
         raise HTTPException(status_code=404, detail="File not found")
     
+    if limit is not None and limit < 0:
+        raise HTTPException(status_code=400, detail="limit must be non-negative")
+    
     try:
         # Read and parse the CSV file
         df = pd.read_csv(csv_file)
+        total_transactions = len(df)
+        
+        if limit is not None:
+            df = df.head(limit)
         
         # Add ML categories
         df_with_ml = categorize_transactions(df.copy())
@@ -786,7 +1360,7 @@ async def get_categorized_transactions(file_id: str):
         
         return {
             "file_id": file_id,
-            "total_transactions": len(transactions),
+            "total_transactions": total_transactions,
             "transactions": sanitize(transactions)
         }
         
@@ -805,53 +1379,14 @@ async def get_subscriptions(file_id: str, threshold: float = 0.5):
         raise HTTPException(status_code=503, detail="Subscription model not loaded")
     
     try:
-        # Read and parse the CSV file
-        df = pd.read_csv(csv_file)
-        
-        # Find date and description columns
-        date_col = None
-        description_col = None
-        
-        for col in df.columns:
-            if any(keyword in col.lower() for keyword in ['date', 'time']):
-                date_col = col
-            if any(keyword in col.lower() for keyword in ['description', 'merchant', 'payee']):
-                description_col = col
-        
-        if not date_col or not description_col:
-            raise HTTPException(status_code=400, detail="Could not find date or description columns")
-        
-        # Prepare data for subscription detection
-        df_sub = df[[date_col, description_col]].copy()
-        df_sub.columns = ['date', 'description']
-        
-        # Add amount column if available
-        amount_col = None
-        for col in df.columns:
-            if any(keyword in col.lower() for keyword in ['amount', 'debit', 'credit', 'value']):
-                amount_col = col
-                break
-        
-        if amount_col:
-            df_sub['amount'] = pd.to_numeric(df[amount_col], errors='coerce')
-        else:
-            df_sub['amount'] = 0.0
-        
-        # Filter to only include expenses (negative amounts or zero)
-        # Income (positive amounts) should not be considered for subscription detection
-        df_sub = df_sub[df_sub['amount'] <= 0].copy()
-        
-        if len(df_sub) == 0:
-            raise HTTPException(status_code=400, detail="No expense transactions found for subscription analysis")
-        
-        # Detect subscriptions
-        subscriptions = predict_subscriptions(df_sub, SUBSCRIPTION_MODEL, SUBSCRIPTION_FEATURE_COLS)
+        subscriptions, expenses_analyzed = score_file_subscriptions(file_id, csv_file.stat().st_mtime)
         
         # Filter by threshold and convert to list
-        high_confidence_subscriptions = subscriptions[subscriptions['score'] >= threshold]
+        high_confidence = np.flatnonzero(subscriptions['score'] >= threshold)
         
         subscription_list = []
-        for _, row in high_confidence_subscriptions.iterrows():
+        for i in high_confidence:
+            row = {col: values[i] for col, values in subscriptions.items()}
             # Calculate average monthly cost
             # If we have coverage months, use that; otherwise estimate from median gap
             if row['coverage_months'] > 0:
@@ -888,7 +1423,7 @@ async def get_subscriptions(file_id: str, threshold: float = 0.5):
             "threshold": threshold,
             "total_subscriptions": len(subscription_list),
             "total_monthly_cost": round(total_monthly_cost, 2),
-            "expense_transactions_analyzed": len(df_sub),
+            "expense_transactions_analyzed": expenses_analyzed,
             "subscriptions": subscription_list
         }
         
@@ -1068,8 +1603,37 @@ async def get_ai_insights(file_id: str):
         raise HTTPException(status_code=500, detail=f"Error generating insights: {str(e)}")
 
 @app.post("/wealth/projections")
-async def calculate_wealth_projections(wealth_data: dict):
-    """Calculate future wealth projections based on current financial data"""
+async def calculate_wealth_projections(wealth_data: dict, periods: Optional[str] = None):
+    """
+    Calculate future wealth projections based on current financial data
+    
+    Args:
+        wealth_data: Assets, liabilities, contributions and debt payments
+        periods: Optional comma-separated horizons to calculate (e.g. "1y,5y");
+            all of 3m, 1y, 2y, 5y, 10y, 20y and 50y when omitted
+    """
+    # Define time periods in months
+    time_periods = {
+        "3m": 3,
+        "1y": 12,
+        "2y": 24,
+        "5y": 60,
+        "10y": 120,
+        "20y": 240,
+        "50y": 600
+    }
+    
+    # Only simulate and serialize the horizons the caller asked for
+    if periods:
+        requested = [period.strip() for period in periods.split(",") if period.strip()]
+        unknown = [period for period in requested if period not in time_periods]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown projection periods: {', '.join(unknown)}. Available: {', '.join(time_periods)}"
+            )
+        time_periods = {period: time_periods[period] for period in requested}
+    
     try:
         # Extract data from the request
         assets_data = wealth_data.get("assets", {})
@@ -1131,17 +1695,6 @@ async def calculate_wealth_projections(wealth_data: dict):
             pay_other_debt=float(debt_payments_data.get("pay_other_debt", 0))
         )
         
-        # Define time periods in months
-        time_periods = {
-            "3m": 3,
-            "1y": 12,
-            "2y": 24,
-            "5y": 60,
-            "10y": 120,
-            "20y": 240,
-            "50y": 600
-        }
-        
         projections = {}
         
         # Calculate projections for each time period
@@ -1258,283 +1811,47 @@ async def calculate_wealth_projections(wealth_data: dict):
 async def calculate_optimized_wealth_projections(wealth_data: dict):
     """Calculate wealth projections with spending optimization suggestions"""
     try:
-        # Extract data from the request
-        assets_data = wealth_data.get("assets", {})
-        liabilities_data = wealth_data.get("liabilities", {})
-        contributions_data = wealth_data.get("contributions", {})
-        debt_payments_data = wealth_data.get("debtPayments", {})
-        file_id = wealth_data.get("file_id")
-        
         # Get spending analysis from uploaded CSV if file_id provided
-        top_categories = []
-        if file_id:
-            try:
-                # Get spending categories from the uploaded file
-                csv_file = UPLOAD_DIR / f"{file_id}.csv"
-                if csv_file.exists():
-                    df = pd.read_csv(csv_file)
-                    df_with_ml = categorize_transactions(df.copy())
-                    
-                    # Find amount and date columns
-                    amount_col = None
-                    date_col = None
-                    
-                    for col in df.columns:
-                        if any(keyword in col.lower() for keyword in ['amount', 'debit', 'credit', 'value']):
-                            amount_col = col
-                        if any(keyword in col.lower() for keyword in ['date', 'time']):
-                            date_col = col
-                    
-                    if amount_col and date_col:
-                        # Process data for the past 30 days
-                        df_with_ml[date_col] = pd.to_datetime(df_with_ml[date_col], errors='coerce')
-                        df_time_series = df_with_ml.dropna(subset=[date_col, amount_col]).copy()
-                        
-                        if len(df_time_series) > 0:
-                            # Convert amount to numeric
-                            df_time_series[amount_col] = pd.to_numeric(
-                                df_time_series[amount_col].astype(str).str.replace('$', '').str.replace(',', ''), 
-                                errors='coerce'
-                            )
-                            
-                            # Filter data for the past 30 days
-                            end_date = df_time_series[date_col].max()
-                            start_date = end_date - pd.Timedelta(days=29)
-                            df_current = df_time_series[df_time_series[date_col] >= start_date].copy()
-                            
-                            # Get spending categories (exclude income and rent)
-                            spending_data = df_current[df_current['ml_category'] != 'Income'].copy()
-                            spending_data = spending_data[~spending_data['ml_category'].str.contains('rent', case=False, na=False)]
-                            
-                            if len(spending_data) > 0:
-                                # Group by category and sum amounts
-                                category_spending = spending_data.groupby('ml_category')[amount_col].sum().abs().sort_values(ascending=False)
-                                
-                                # Get top 3 categories
-                                top_categories = []
-                                for i, (category, amount) in enumerate(category_spending.head(3).items()):
-                                    top_categories.append({
-                                        "category": category,
-                                        "current_spending": float(amount),
-                                        "suggested_reduction": float(amount * 0.2),
-                                        "new_spending": float(amount * 0.8)
-                                    })
-                                
-                                logger.info(f"Found top spending categories: {[cat['category'] for cat in top_categories]}")
-                            else:
-                                logger.warning("No spending data found for optimization")
-                        else:
-                            logger.warning("No valid time series data found for optimization")
-                    else:
-                        logger.warning("Could not find amount or date columns for optimization")
-                else:
-                    logger.warning(f"File {file_id} not found for spending analysis")
-            except Exception as e:
-                logger.warning(f"Error analyzing spending patterns: {e}")
-        
-        # Create WealthInputs object
-        wealth_inputs = WealthInputs(
-            # Assets
-            real_estate=float(assets_data.get("realEstate", {}).get("value", 0)),
-            checking=float(assets_data.get("checking", {}).get("value", 0)),
-            savings_hysa=float(assets_data.get("savings", {}).get("value", 0)),
-            retirement_invest=float(assets_data.get("retirement", {}).get("value", 0)),
-            cars_value=float(assets_data.get("cars", {}).get("value", 0)),
-            other_assets=float(assets_data.get("otherAssets", {}).get("value", 0)),
-            
-            # Liabilities
-            real_estate_loans=float(liabilities_data.get("realEstateLoans", {}).get("value", 0)),
-            credit_card_debt=float(liabilities_data.get("creditCardDebt", {}).get("value", 0)),
-            personal_loans=float(liabilities_data.get("personalLoans", {}).get("value", 0)),
-            student_loans=float(liabilities_data.get("studentLoans", {}).get("value", 0)),
-            car_loans=float(liabilities_data.get("carLoans", {}).get("value", 0)),
-            other_debt=float(liabilities_data.get("otherDebt", {}).get("value", 0))
-        )
-        
-        # Create Assumptions object
-        assumptions = Assumptions(
-            real_estate_apr=float(assets_data.get("realEstate", {}).get("rate", 3.5)),
-            hysa_apr=float(assets_data.get("savings", {}).get("rate", 2.0)),
-            retirement_apr=float(assets_data.get("retirement", {}).get("rate", 10.0)),
-            cars_apr=float(assets_data.get("cars", {}).get("rate", -10.0)),
-            other_assets_apr=float(assets_data.get("otherAssets", {}).get("rate", 0.0)),
-            
-            mortgage_apr=float(liabilities_data.get("realEstateLoans", {}).get("rate", 6.0)),
-            cc_apr=float(liabilities_data.get("creditCardDebt", {}).get("rate", 22.0)),
-            personal_apr=float(liabilities_data.get("personalLoans", {}).get("rate", 12.0)),
-            student_apr=float(liabilities_data.get("studentLoans", {}).get("rate", 7.0)),
-            car_apr=float(liabilities_data.get("carLoans", {}).get("rate", 9.0)),
-            other_debt_apr=float(liabilities_data.get("otherDebt", {}).get("rate", 0.0))
-        )
-        
-        # Calculate monthly savings from spending reduction
-        monthly_savings = sum([cat["suggested_reduction"] for cat in top_categories])
-        
-        # Create MonthlyFlows object with optimized contributions
-        monthly_flows = MonthlyFlows(
-            # Original contributions
-            contrib_checking=float(contributions_data.get("contrib_checking", 0)),
-            contrib_hysa=float(contributions_data.get("contrib_hysa", 0)),
-            contrib_retirement=float(contributions_data.get("contrib_retirement", 0)),
-            move_checking_to_invest=float(contributions_data.get("move_checking_to_invest", 0)),
-            
-            # Debt payments
-            pay_mortgage=float(debt_payments_data.get("pay_mortgage", 0)),
-            pay_cc=float(debt_payments_data.get("pay_cc", 0)),
-            pay_personal=float(debt_payments_data.get("pay_personal", 0)),
-            pay_student=float(debt_payments_data.get("pay_student", 0)),
-            pay_car=float(debt_payments_data.get("pay_car", 0)),
-            pay_other_debt=float(debt_payments_data.get("pay_other_debt", 0))
-        )
-        
-        # Create optimized MonthlyFlows with additional savings
-        optimized_flows = MonthlyFlows(
-            # Add savings to retirement contributions (most impactful for long-term wealth)
-            contrib_checking=float(contributions_data.get("contrib_checking", 0)),
-            contrib_hysa=float(contributions_data.get("contrib_hysa", 0)),
-            contrib_retirement=float(contributions_data.get("contrib_retirement", 0)) + monthly_savings,
-            move_checking_to_invest=float(contributions_data.get("move_checking_to_invest", 0)),
-            
-            # Same debt payments
-            pay_mortgage=float(debt_payments_data.get("pay_mortgage", 0)),
-            pay_cc=float(debt_payments_data.get("pay_cc", 0)),
-            pay_personal=float(debt_payments_data.get("pay_personal", 0)),
-            pay_student=float(debt_payments_data.get("pay_student", 0)),
-            pay_car=float(debt_payments_data.get("pay_car", 0)),
-            pay_other_debt=float(debt_payments_data.get("pay_other_debt", 0))
-        )
-        
-        # Define time periods
-        time_periods = {
-            "3m": 3,
-            "1y": 12,
-            "2y": 24,
-            "5y": 60,
-            "10y": 120,
-            "20y": 240,
-            "50y": 600
-        }
-        
-        # Calculate both original and optimized projections
-        original_projections = {}
-        optimized_projections = {}
-        
-        for period_name, months in time_periods.items():
-            try:
-                # Original projections
-                df_original = simulate_future_wealth(
-                    start=wealth_inputs,
-                    months=months,
-                    assumptions=assumptions,
-                    flows=monthly_flows
-                )
-                
-                # Optimized projections
-                df_optimized = simulate_future_wealth(
-                    start=wealth_inputs,
-                    months=months,
-                    assumptions=assumptions,
-                    flows=optimized_flows
-                )
-                
-                # Process original projections
-                original_final = df_original.iloc[-1].to_dict()
-                original_time_series = []
-                for _, row in df_original.iterrows():
-                    original_time_series.append({
-                        "month": row["month"],
-                        "net_worth": float(row["net_worth"]),
-                        "assets_total": float(row["assets_total"]),
-                        "liabilities_total": float(row["liabilities_total"])
-                    })
-                
-                # Process optimized projections
-                optimized_final = df_optimized.iloc[-1].to_dict()
-                optimized_time_series = []
-                for _, row in df_optimized.iterrows():
-                    optimized_time_series.append({
-                        "month": row["month"],
-                        "net_worth": float(row["net_worth"]),
-                        "assets_total": float(row["assets_total"]),
-                        "liabilities_total": float(row["liabilities_total"])
-                    })
-                
-                # Calculate current net worth for comparison
-                current_net_worth = wealth_inputs.real_estate + wealth_inputs.checking + wealth_inputs.savings_hysa + wealth_inputs.retirement_invest + wealth_inputs.cars_value + wealth_inputs.other_assets - (wealth_inputs.real_estate_loans + wealth_inputs.credit_card_debt + wealth_inputs.personal_loans + wealth_inputs.student_loans + wealth_inputs.car_loans + wealth_inputs.other_debt)
-                
-                # Store projections
-                original_projections[period_name] = {
-                    "months": months,
-                    "net_worth": original_final["net_worth"],
-                    "net_worth_change": original_final["net_worth"] - current_net_worth,
-                    "time_series": original_time_series
-                }
-                
-                optimized_projections[period_name] = {
-                    "months": months,
-                    "net_worth": optimized_final["net_worth"],
-                    "net_worth_change": optimized_final["net_worth"] - current_net_worth,
-                    "time_series": optimized_time_series,
-                    "improvement": optimized_final["net_worth"] - original_final["net_worth"],
-                    "improvement_pct": ((optimized_final["net_worth"] - original_final["net_worth"]) / abs(original_final["net_worth"]) * 100) if original_final["net_worth"] != 0 else 0
-                }
-                
-            except Exception as e:
-                logger.error(f"Error calculating projections for {period_name}: {e}")
-                original_projections[period_name] = {"error": f"Failed to calculate: {str(e)}"}
-                optimized_projections[period_name] = {"error": f"Failed to calculate: {str(e)}"}
+        file_id = wealth_data.get("file_id")
+        top_categories = find_top_spending_categories(file_id) if file_id else []
         
-        return {
-            "current_net_worth": current_net_worth,
-            "top_spending_categories": top_categories,
-            "monthly_savings": monthly_savings,
-            "original_projections": original_projections,
-            "optimized_projections": optimized_projections,
-            "summary": {
-                "total_contributions_monthly": sum([
-                    monthly_flows.contrib_checking,
-                    monthly_flows.contrib_hysa,
-                    monthly_flows.contrib_retirement
-                ]),
-                "optimized_contributions_monthly": sum([
-                    optimized_flows.contrib_checking,
-                    optimized_flows.contrib_hysa,
-                    optimized_flows.contrib_retirement
-                ]),
-                "additional_monthly_savings": monthly_savings
-            }
-        }
+        return calculate_optimized_projections(wealth_data, top_categories)
         
     except Exception as e:
         logger.error(f"Error calculating optimized wealth projections: {e}")
         raise HTTPException(status_code=500, detail=f"Error calculating optimized wealth projections: {str(e)}")
 
+@app.post("/wealth/optimized-projections/batch")
+async def calculate_optimized_wealth_projections_batch(batch_request: dict):
+    """Calculate optimized wealth projections for several scenarios in one call"""
+    cases = batch_request.get("cases")
+    if not isinstance(cases, list):
+        raise HTTPException(status_code=400, detail="cases must be a list of wealth data objects")
+    
+    # Scenarios often share a file; read and categorize each file only once
+    categories_by_file = {}
+    results = []
+    for wealth_data in cases:
+        try:
+            file_id = wealth_data.get("file_id")
+            if file_id and file_id not in categories_by_file:
+                categories_by_file[file_id] = find_top_spending_categories(file_id)
+            top_categories = categories_by_file[file_id] if file_id else []
+            
+            results.append(calculate_optimized_projections(wealth_data, top_categories))
+        except Exception as e:
+            logger.error(f"Error calculating optimized wealth projections: {e}")
+            results.append({"error": f"Error calculating optimized wealth projections: {str(e)}"})
+    
+    return {"results": results}
+
 @app.post("/savings/analyze")
 async def analyze_savings_goal(savings_request: dict):
     """Analyze spending patterns and suggest savings strategies for a specific goal"""
     try:
         logger.info(f"Received savings analysis request: {savings_request}")
         
-        file_id = savings_request.get("file_id")
-        target_amount = float(savings_request.get("target_amount", 0))
-        months = int(savings_request.get("months", 12))
-        
-        logger.info(f"Parsed parameters - file_id: {file_id}, target_amount: {target_amount}, months: {months}")
-        
-        if not file_id:
-            raise HTTPException(status_code=400, detail="file_id is required")
-        
-        if target_amount <= 0:
-            raise HTTPException(status_code=400, detail="target_amount must be positive")
-        
-        if months <= 0:
-            raise HTTPException(status_code=400, detail="months must be positive")
-        
-        # Get the CSV file
-        csv_file = UPLOAD_DIR / f"{file_id}.csv"
-        logger.info(f"Looking for CSV file: {csv_file}")
-        if not csv_file.exists():
-            raise HTTPException(status_code=404, detail="File not found")
+        file_id, target_amount, months, csv_file = validate_savings_request(savings_request)
         
         # Read and process the CSV file
         logger.info("Reading CSV file...")
@@ -1596,9 +1913,37 @@ async def analyze_savings_goal(savings_request: dict):
         logger.error(f"Error analyzing savings goal: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error analyzing savings goal: {str(e)}")
 
+@app.post("/savings/analyze/validate_batch")
+async def validate_savings_batch(batch_request: dict):
+    """Check several /savings/analyze request bodies without running the analysis"""
+    cases = batch_request.get("cases")
+    if not isinstance(cases, list):
+        raise HTTPException(status_code=400, detail="cases must be a list of request bodies")
+    
+    results = []
+    for case in cases:
+        try:
+            if not isinstance(case, dict):
+                raise HTTPException(status_code=422, detail="Request body must be an object")
+            validate_savings_request(case)
+            results.append({"status": 200, "detail": "OK"})
+        # Same status codes /savings/analyze would return for this body
+        except HTTPException as e:
+            results.append({"status": e.status_code, "detail": e.detail})
+        except ValueError as e:
+            results.append({"status": 400, "detail": f"Invalid input: {str(e)}"})
+        except Exception as e:
+            results.append({"status": 500, "detail": f"Error analyzing savings goal: {str(e)}"})
+    
+    return {"results": results}
+
 @app.get("/files/{file_id}/time-series")
-async def get_time_series_data(file_id: str, period: str = "30d"):
-    """Get cumulative time series data for income and spending trends"""
+async def get_time_series_data(file_id: str, period: str = "30d", summary_only: bool = False):
+    """Get cumulative time series data for income and spending trends
+
+    With summary_only, the full daily series are replaced by their lengths
+    and first/last points, which is all most callers need.
+    """
     csv_file = UPLOAD_DIR / f"{file_id}.csv"
     if not csv_file.exists():
         raise HTTPException(status_code=404, detail="File not found")
@@ -1711,8 +2056,6 @@ async def get_time_series_data(file_id: str, period: str = "30d"):
                 "end_date": end_date.strftime('%Y-%m-%d'),
                 "days_covered": len(date_range)
             },
-            "income": income_series,
-            "spending": spending_series,
             "summary": {
                 "total_income": total_income,
                 "total_spending": abs(total_spending),
@@ -1723,6 +2066,19 @@ async def get_time_series_data(file_id: str, period: str = "30d"):
             }
         }
         
+        if summary_only:
+            time_series_data.update({
+                "income_count": len(income_series),
+                "income_head": income_series[0] if income_series else None,
+                "income_tail": income_series[-1] if income_series else None,
+                "spending_count": len(spending_series),
+                "spending_head": spending_series[0] if spending_series else None,
+                "spending_tail": spending_series[-1] if spending_series else None
+            })
+        else:
+            time_series_data["income"] = income_series
+            time_series_data["spending"] = spending_series
+        
         return time_series_data
         
     except Exception as e:
@@ -1896,98 +2252,11 @@ async def upload_transaction_csv(file: UploadFile = File(...)):
         JSON response with file ID for future reference
     """
     try:
-        # Validate file type
-        if not file.filename.endswith('.csv'):
-            raise HTTPException(
-                status_code=400, 
-                detail="File must be a CSV file"
-            )
-        
         # Read file content
         content = await file.read()
         
-        # Calculate file hash to check for duplicates
-        file_hash = calculate_file_hash(content)
-        
-        # Check if this file already exists
-        existing_file = find_duplicate_file(file_hash)
-        if existing_file:
-            logger.info(f"Duplicate file detected: {file.filename} (same as {existing_file['filename']})")
-            return JSONResponse(
-                status_code=200,
-                content={
-                    "message": "File already exists (duplicate detected)",
-                    "file_id": existing_file["file_id"],
-                    "filename": existing_file["filename"],
-                    "original_upload_time": existing_file["upload_time"],
-                    "is_duplicate": True
-                }
-            )
-        
-        # Generate unique file ID for new file
-        file_id = str(uuid.uuid4())
+        return JSONResponse(status_code=200, content=store_uploaded_csv(file.filename, content))
         
-        # Save the original file
-        csv_file_path = UPLOAD_DIR / f"{file_id}.csv"
-        with open(csv_file_path, 'w', encoding='utf-8') as f:
-            f.write(content.decode('utf-8'))
-        
-        # Register the file hash
-        register_file_hash(file_hash, file_id, file.filename)
-        
-        # Basic validation - try to parse the CSV
-        try:
-            csv_data = io.StringIO(content.decode('utf-8'))
-            df = pd.read_csv(csv_data)
-            
-            logger.info(f"Successfully uploaded financial CSV: {file.filename} with {len(df)} transactions")
-            
-            return JSONResponse(
-                status_code=200,
-                content={
-                    "message": "Financial transaction CSV uploaded successfully",
-                    "file_id": file_id,
-                    "filename": file.filename,
-                    "rows": len(df),
-                    "columns": len(df.columns),
-                    "is_duplicate": False
-                }
-            )
-            
-        except pd.errors.EmptyDataError:
-            # Clean up saved file and hash registration
-            csv_file_path.unlink(missing_ok=True)
-            # Remove from hash registry
-            registry = load_hash_registry()
-            registry.pop(file_hash, None)
-            save_hash_registry(registry)
-            raise HTTPException(
-                status_code=400,
-                detail="The CSV file is empty"
-            )
-        except pd.errors.ParserError as e:
-            # Clean up saved file and hash registration
-            csv_file_path.unlink(missing_ok=True)
-            # Remove from hash registry
-            registry = load_hash_registry()
-            registry.pop(file_hash, None)
-            save_hash_registry(registry)
-            raise HTTPException(
-                status_code=400,
-                detail=f"Error parsing CSV file: {str(e)}"
-            )
-        except UnicodeDecodeError:
-            # Clean up saved file and hash registration
-            csv_file_path.unlink(missing_ok=True)
-            # Remove from hash registry
-            registry = load_hash_registry()
-            registry.pop(file_hash, None)
-            save_hash_registry(registry)
-            raise HTTPException(
-                status_code=400,
-                detail="File encoding error. Please ensure the file is UTF-8 encoded"
-            )
-            
     except HTTPException:
         raise
     except Exception as e:
@@ -1997,6 +2266,29 @@ async def upload_transaction_csv(file: UploadFile = File(...)):
             detail=f"Internal server error: {str(e)}"
         )
 
+@app.post("/upload-transactions/batch")
+async def upload_transaction_csvs(files: List[UploadFile] = File(...)):
+    """
+    Upload several financial transaction CSV files in one request
+    
+    Args:
+        files: CSV files containing transaction data
+        
+    Returns:
+        JSON response with one upload result per file, each with its own status
+    """
+    results = []
+    for file in files:
+        try:
+            results.append({"status": 200, **store_uploaded_csv(file.filename, await file.read())})
+        except HTTPException as e:
+            results.append({"status": e.status_code, "filename": file.filename, "detail": e.detail})
+        except Exception as e:
+            logger.error(f"Unexpected error processing file {file.filename}: {str(e)}")
+            results.append({"status": 500, "filename": file.filename, "detail": f"Internal server error: {str(e)}"})
+    
+    return {"results": results}
+
 @app.delete("/files/{file_id}")
 async def delete_file(file_id: str):
     """Delete an uploaded CSV file and clean up hash registry"""
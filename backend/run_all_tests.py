@@ -3,28 +3,39 @@
 Master test runner for all financial coach API tests
 """
 
-import subprocess
+import runpy
 import sys
 import os
 
+from api_client import BASE_URL
+
 def run_test(test_file):
-    """Run a test file and return success status"""
+    """Run a test file in this interpreter and return success status"""
     print(f"\n{'='*60}")
     print(f"Running {test_file}...")
     print(f"{'='*60}")
     
+    # Run in-process so requests/pandas are imported once for the whole suite
+    # instead of once per spawned interpreter. Each script sees only its own
+    # name in sys.argv, as it would when run directly, so the runner's
+    # arguments don't reach the scripts' argparse
+    saved_argv = sys.argv
+    sys.argv = [test_file]
     try:
-        result = subprocess.run([sys.executable, test_file], 
-                              capture_output=False, 
-                              text=True, 
-                              cwd=os.path.dirname(os.path.abspath(__file__)))
-        return result.returncode == 0
+        runpy.run_path(test_file, run_name="__main__")
+        return True
+    except SystemExit as e:
+        return e.code in (None, 0)
     except Exception as e:
         print(f"❌ Error running {test_file}: {e}")
         return False
+    finally:
+        sys.argv = saved_argv
 
 def main():
     """Run all test files in sequence"""
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    
     test_files = [
         "test_upload.py",
         "test_categorizing_ML.py", 
@@ -42,7 +53,7 @@ def main():
     for i, test_file in enumerate(test_files, 1):
         print(f"  {i}. {test_file}")
     
-    print(f"\n⚠️  Make sure the FastAPI server is running on http://localhost:8000")
+    print(f"\n⚠️  Make sure the FastAPI server is running on {BASE_URL}")
     input("\nPress Enter to continue or Ctrl+C to cancel...")
     
     results = {}
@@ -7,9 +7,36 @@ import numpy as np
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# High priority for reduction (discretionary spending)
+HIGH_PRIORITY_KEYWORDS = [
+    'entertainment', 'dining', 'shopping', 'recreation', 'hobbies',
+    'subscriptions', 'luxury', 'personal_care', 'clothing', 'travel'
+]
+
+# Medium priority (somewhat discretionary)
+MEDIUM_PRIORITY_KEYWORDS = [
+    'utilities', 'transportation', 'groceries', 'healthcare',
+    'insurance', 'communication', 'education'
+]
+
+# Low priority (essential spending)
+LOW_PRIORITY_KEYWORDS = [
+    'rent', 'mortgage', 'debt_payment', 'savings', 'investment',
+    'income', 'taxes', 'essential'
+]
+
+def _keyword_pattern(keywords: List[str]) -> str:
+    """Build a single alternation regex that matches any of the keywords"""
+    return '|'.join(re.escape(keyword) for keyword in keywords)
+
+HIGH_PRIORITY_PATTERN = _keyword_pattern(HIGH_PRIORITY_KEYWORDS)
+MEDIUM_PRIORITY_PATTERN = _keyword_pattern(MEDIUM_PRIORITY_KEYWORDS)
+LOW_PRIORITY_PATTERN = _keyword_pattern(LOW_PRIORITY_KEYWORDS)
+
 @dataclass
 class SavingsGoal:
     """Represents a savings goal with target amount and timeframe"""
@@ -70,33 +97,35 @@ class SavingsAnalyzer:
             if len(df) == 0:
                 return {}
             
-            # Convert amount to numeric
-            df[amount_col] = pd.to_numeric(
+            # Convert amount to numeric and work on plain arrays from here on
+            amounts = pd.to_numeric(
                 df[amount_col].astype(str).str.replace('$', '').str.replace(',', ''), 
                 errors='coerce'
-            )
+            ).to_numpy(dtype=float)
+            dates = df[date_col].to_numpy()
             
             # Get last 3 months of data
-            end_date = df[date_col].max()
-            start_date = end_date - pd.Timedelta(days=90)  # Approximately 3 months
+            end_date = dates.max()
+            start_date = end_date - np.timedelta64(90, 'D')  # Approximately 3 months
             
-            df_recent = df[df[date_col] >= start_date].copy()
+            recent = dates >= start_date
             
-            if len(df_recent) == 0:
+            if not recent.any():
                 return {}
             
             # Separate income and expenses
-            income_data = df_recent[df_recent[amount_col] > 0]
-            expense_data = df_recent[df_recent[amount_col] < 0]
+            income_mask = recent & (amounts > 0)
+            expense_mask = recent & (amounts < 0)
             
             # Calculate monthly averages
-            monthly_income = income_data[amount_col].sum() / 3  # 3 months
-            monthly_expenses = abs(expense_data[amount_col].sum()) / 3
+            monthly_income = amounts[income_mask].sum() / 3  # 3 months
+            monthly_expenses = abs(amounts[expense_mask].sum()) / 3
             
             # Group expenses by category if available
             category_spending = {}
-            if 'ml_category' in df_recent.columns:
-                expense_categories = expense_data.groupby('ml_category')[amount_col].sum().abs() / 3
+            if 'ml_category' in df.columns:
+                categories = df['ml_category'].to_numpy()
+                expense_categories = pd.Series(amounts[expense_mask]).groupby(categories[expense_mask]).sum().abs() / 3
                 category_spending = expense_categories.to_dict()
             
             # Add summary data
@@ -121,48 +150,33 @@ class SavingsAnalyzer:
         Returns:
             Priority level (1-5, where 1 is highest priority for reduction)
         """
-        # High priority for reduction (discretionary spending)
-        high_priority = [
-            'entertainment', 'dining', 'shopping', 'recreation', 'hobbies',
-            'subscriptions', 'luxury', 'personal_care', 'clothing', 'travel'
-        ]
-        
-        # Medium priority (somewhat discretionary)
-        medium_priority = [
-            'utilities', 'transportation', 'groceries', 'healthcare',
-            'insurance', 'communication', 'education'
-        ]
-        
-        # Low priority (essential spending)
-        low_priority = [
-            'rent', 'mortgage', 'debt_payment', 'savings', 'investment',
-            'income', 'taxes', 'essential'
-        ]
-        
-        category_lower = category.lower()
+        return int(self.categorize_spending_priorities([category], [amount])[0])
+    
+    def categorize_spending_priorities(self, categories: List[str], amounts: List[float]) -> np.ndarray:
+        """
+        Categorize many categories by priority for reduction at once (1 = highest priority)
         
-        # Check for high priority keywords
-        for keyword in high_priority:
-            if keyword in category_lower:
-                return 1
+        Categories matching a high, medium or low priority keyword get 1, 2 or 3;
+        anything else is ranked by amount (over 500: 2, over 200: 3, otherwise 4).
         
-        # Check for medium priority keywords
-        for keyword in medium_priority:
-            if keyword in category_lower:
-                return 2
+        Args:
+            categories: Spending category names
+            amounts: Monthly spending amounts, aligned with categories
+            
+        Returns:
+            Array of priority levels (1-5, where 1 is highest priority for reduction)
+        """
+        lower = pd.Series(categories, dtype=object).astype(str).str.lower()
+        amounts = np.asarray(amounts, dtype=float)
         
-        # Check for low priority keywords
-        for keyword in low_priority:
-            if keyword in category_lower:
-                return 3
+        high = lower.str.contains(HIGH_PRIORITY_PATTERN, regex=True).to_numpy()
+        medium = lower.str.contains(MEDIUM_PRIORITY_PATTERN, regex=True).to_numpy() & ~high
+        low = lower.str.contains(LOW_PRIORITY_PATTERN, regex=True).to_numpy() & ~high & ~medium
         
         # Default based on amount (higher amounts get higher priority for reduction)
-        if amount > 500:
-            return 2
-        elif amount > 200:
-            return 3
-        else:
-            return 4
+        amount_default = np.where(amounts > 500, 2, np.where(amounts > 200, 3, 4))
+        
+        return np.select([high, medium, low], [1, 2, 3], default=amount_default)
     
     def suggest_spending_cuts(self, spending_data: Dict[str, float], target_monthly_savings: float) -> List[SpendingCategory]:
         """
@@ -181,11 +195,17 @@ class SavingsAnalyzer:
         spending_categories = {k: v for k, v in spending_data.items() 
                              if not k.startswith('_') and v > 0}
         
+        if not spending_categories:
+            return suggestions
+        
         # Sort by priority and amount
-        category_priorities = []
-        for category, amount in spending_categories.items():
-            priority = self.categorize_spending_priority(category, amount)
-            category_priorities.append((category, amount, priority))
+        categories = list(spending_categories.keys())
+        amounts = list(spending_categories.values())
+        priorities = self.categorize_spending_priorities(categories, amounts)
+        category_priorities = [
+            (category, amount, int(priority))
+            for category, amount, priority in zip(categories, amounts, priorities)
+        ]
         
         # Sort by priority (ascending) then by amount (descending)
         category_priorities.sort(key=lambda x: (x[2], -x[1]))
@@ -345,6 +365,10 @@ class SavingsAnalyzer:
                 alternative_strategies=[f"Error analyzing data: {str(e)}"]
             )
 
+def _to_cents(value: float) -> float:
+    """Round a dollar amount to cents so the JSON payload carries no float noise"""
+    return round(float(value), 2)
+
 def create_savings_analysis_response(analysis: SavingsAnalysis) -> Dict:
     """
     Convert SavingsAnalysis to API response format
@@ -357,28 +381,28 @@ def create_savings_analysis_response(analysis: SavingsAnalysis) -> Dict:
     """
     return {
         "goal": {
-            "target_amount": float(analysis.goal.target_amount),
+            "target_amount": _to_cents(analysis.goal.target_amount),
             "months_to_save": int(analysis.goal.months_to_save),
-            "monthly_target": float(analysis.goal.monthly_target)
+            "monthly_target": _to_cents(analysis.goal.monthly_target)
         },
         "current_financials": {
-            "monthly_income": float(analysis.current_monthly_income),
-            "monthly_expenses": float(analysis.current_monthly_expenses),
-            "monthly_savings": float(analysis.current_monthly_savings)
+            "monthly_income": _to_cents(analysis.current_monthly_income),
+            "monthly_expenses": _to_cents(analysis.current_monthly_expenses),
+            "monthly_savings": _to_cents(analysis.current_monthly_savings)
         },
         "analysis": {
             "can_achieve_goal": bool(analysis.can_achieve_goal),
-            "shortfall": float(analysis.shortfall),
-            "total_suggested_savings": float(analysis.total_suggested_savings),
-            "remaining_shortfall": float(analysis.remaining_shortfall)
+            "shortfall": _to_cents(analysis.shortfall),
+            "total_suggested_savings": _to_cents(analysis.total_suggested_savings),
+            "remaining_shortfall": _to_cents(analysis.remaining_shortfall)
         },
         "suggested_cuts": [
             {
                 "category": str(cut.category),
-                "current_monthly": float(cut.current_monthly),
-                "suggested_monthly": float(cut.suggested_monthly),
-                "reduction_amount": float(cut.reduction_amount),
-                "reduction_percentage": float(cut.reduction_percentage),
+                "current_monthly": _to_cents(cut.current_monthly),
+                "suggested_monthly": _to_cents(cut.suggested_monthly),
+                "reduction_amount": _to_cents(cut.reduction_amount),
+                "reduction_percentage": round(float(cut.reduction_percentage), 2),
                 "priority": int(cut.priority)
             }
             for cut in analysis.suggested_cuts
@@ -387,7 +411,7 @@ def create_savings_analysis_response(analysis: SavingsAnalysis) -> Dict:
         "summary": {
             "total_categories_analyzed": int(len(analysis.suggested_cuts)),
             "high_priority_cuts": int(len([c for c in analysis.suggested_cuts if c.priority == 1])),
-            "total_monthly_reduction": float(sum(cut.reduction_amount for cut in analysis.suggested_cuts)),
+            "total_monthly_reduction": _to_cents(sum(cut.reduction_amount for cut in analysis.suggested_cuts)),
             "achievable_with_cuts": bool(analysis.remaining_shortfall <= 0)
         }
     }
@@ -6,6 +6,12 @@ Test script for AI insights functionality
 import requests
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+from api_client import BASE_URL
+
+# Reuse one pooled connection for every request in this script
+SESSION = requests.Session()
 
 # Configuration: Change this to switch between different CSV files
 CSV_FILES = {
@@ -32,7 +38,7 @@ def test_upload_for_insights(csv_type=None):
         print(f"❌ CSV file not found: {csv_path}")
         return None
     
-    url = "http://localhost:8000/upload-transactions"
+    url = BASE_URL + "/upload-transactions"
     
     print(f"📁 Uploading CSV file for AI insights testing: {csv_path}")
     
@@ -40,7 +46,7 @@ def test_upload_for_insights(csv_type=None):
         files = {"file": (csv_path, f, "text/csv")}
         
         try:
-            response = requests.post(url, files=files)
+            response = SESSION.post(url, files=files)
             if response.status_code == 200:
                 data = response.json()
                 print(f"✅ Upload successful! File ID: {data['file_id']}")
@@ -52,16 +58,19 @@ def test_upload_for_insights(csv_type=None):
             print("❌ Could not connect to server")
             return None
 
-def test_ai_insights(file_id):
+def fetch_insights(file_id):
+    """Request AI insights for a file (blocks on the OpenAI round trip)"""
+    url = f"{BASE_URL}/files/{file_id}/insights"
+    return SESSION.get(url)
+
+def test_ai_insights(file_id, response_future=None):
     """Test AI insights generation for the past month"""
     if not file_id:
         print("❌ No file ID provided for AI insights test")
         return
-        
-    url = f"http://localhost:8000/files/{file_id}/insights"
     
     try:
-        response = requests.get(url)
+        response = response_future.result() if response_future else fetch_insights(file_id)
         if response.status_code == 200:
             data = response.json()
             print(f"\n🤖 AI Insights Results:")
@@ -105,15 +114,14 @@ def test_ai_insights(file_id):
     except requests.exceptions.ConnectionError:
         print("❌ Could not connect to server")
 
-def test_insights_single_call(file_id):
+def test_insights_single_call(file_id, response_future=None):
     """Test AI insights for the past month"""
     if not file_id:
         return
         
     print(f"\n🎯 Testing AI Insights (Past Month):")
-    url = f"http://localhost:8000/files/{file_id}/insights"
     try:
-        response = requests.get(url)
+        response = response_future.result() if response_future else fetch_insights(file_id)
         if response.status_code == 200:
             data = response.json()
             cards = data.get('insights', {}).get('cards', [])
@@ -145,10 +153,14 @@ if __name__ == "__main__":
     # Upload a file for AI insights testing
     file_id = test_upload_for_insights()
     
-    # Test AI insights
+    # Test AI insights - both calls wait on OpenAI, so issue them together
+    # and print the results in order once they arrive
     if file_id:
-        test_ai_insights(file_id)
-        test_insights_single_call(file_id)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            insights_future = executor.submit(fetch_insights, file_id)
+            single_call_future = executor.submit(fetch_insights, file_id)
+            test_ai_insights(file_id, insights_future)
+            test_insights_single_call(file_id, single_call_future)
     
     print(f"\n🔗 AI Insights Endpoints:")
-    print(f"🤖 AI insights (Past Month): http://localhost:8000/files/{file_id}/insights")
+    print(f"🤖 AI insights (Past Month): {BASE_URL}/files/{file_id}/insights")
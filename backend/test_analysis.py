@@ -3,9 +3,47 @@
 Test script for financial analysis and time series functionality
 """
 
+import argparse
 import requests
 import json
-import os
+
+from api_client import (
+    BASE_URL,
+    buffered_output,
+    cached_file_id,
+    csv_exists,
+    fast_get,
+    loads,
+    remember_file_id,
+    run_concurrently,
+    run_tests_concurrently,
+    upload_csv,
+)
+
+# Endpoint URL templates, formatted with the file_id per call
+UPLOAD_URL = BASE_URL + "/upload-transactions"
+FILE_URL = BASE_URL + "/files/{file_id}"
+ANALYSIS_URL = FILE_URL + "/analysis"
+TIME_SERIES_URL = FILE_URL + "/time-series"
+CATEGORIES_BY_TIME_URL = FILE_URL + "/categories-by-time"
+CATEGORIZED_URL = FILE_URL + "/categorized"
+
+# Per-period report templates, formatted once per period instead of line by line
+_TIME_SERIES_PERIOD_TMPL = (
+    "  {period}: {days} days\n"
+    "    Date Range: {start} to {end}\n"
+    "    Data Points: {income_points} income, {spending_points} spending\n"
+    "    Total Income: ${total_income:.2f}\n"
+    "    Total Spending: ${total_spending:.2f}\n"
+    "    Net Amount: ${net_amount:.2f}"
+)
+_CATEGORIES_PERIOD_TMPL = (
+    "  {period}: {days} days\n"
+    "    Date Range: {start} to {end}\n"
+    "    Total Spending: ${total_spending:.2f}\n"
+    "    Unique Categories: {unique_categories}\n"
+    "    Spending Transactions: {spending_transactions}"
+)
 
 # Configuration: Change this to switch between different CSV files
 CSV_FILES = {
@@ -16,6 +54,7 @@ CSV_FILES = {
 # Set the default CSV file to use
 DEFAULT_CSV = "balanced"  # Change this to "original" to use the other file
 
+@buffered_output
 def test_upload_for_analysis(csv_type=None):
     """Upload a file for analysis testing"""
     if csv_type is None:
@@ -28,42 +67,47 @@ def test_upload_for_analysis(csv_type=None):
     csv_path = CSV_FILES[csv_type]
     
     # Check if file exists
-    if not os.path.exists(csv_path):
+    if not csv_exists(csv_path):
         print(f"❌ CSV file not found: {csv_path}")
         return None
     
-    url = "http://localhost:8000/upload-transactions"
+    # Reuse the file from a previous run if the server still has it
+    file_id = cached_file_id(csv_path)
+    if file_id:
+        print(f"♻️  Reusing previous upload of {csv_path}. File ID: {file_id}")
+        return file_id
+    
+    url = UPLOAD_URL
     
     print(f"📁 Uploading CSV file: {csv_path}")
     
-    with open(csv_path, "rb") as f:
-        files = {"file": (csv_path, f, "text/csv")}
-        
-        try:
-            response = requests.post(url, files=files)
-            if response.status_code == 200:
-                data = response.json()
-                print(f"✅ Upload successful! File ID: {data['file_id']}")
-                return data['file_id']
-            else:
-                print(f"❌ Upload failed: {response.status_code}")
-                return None
-        except requests.exceptions.ConnectionError:
-            print("❌ Could not connect to server")
+    try:
+        response = upload_csv(csv_path, url)
+        if response.status_code == 200:
+            data = loads(response.content)
+            print(f"✅ Upload successful! File ID: {data['file_id']}")
+            remember_file_id(csv_path, data['file_id'])
+            return data['file_id']
+        else:
+            print(f"❌ Upload failed: {response.status_code}")
             return None
+    except requests.exceptions.ConnectionError:
+        print("❌ Could not connect to server")
+        return None
 
+@buffered_output
 def test_financial_analysis(file_id):
     """Test the financial analysis endpoint"""
     if not file_id:
         print("❌ No file ID provided for analysis test")
         return
         
-    url = f"http://localhost:8000/files/{file_id}/analysis"
+    url = ANALYSIS_URL.format(file_id=file_id)
     
     try:
-        response = requests.get(url)
+        response = fast_get(url)
         if response.status_code == 200:
-            data = response.json()
+            data = loads(response.content)
             print("\n📊 Financial Analysis:")
             print(f"💰 Total amount: ${data['transaction_summary']['total_amount']:.2f}")
             print(f"💸 Total expenses: ${data['spending_analysis']['total_expenses']:.2f}")
@@ -115,41 +159,52 @@ def test_financial_analysis(file_id):
     except requests.exceptions.ConnectionError:
         print("❌ Could not connect to server")
 
+@buffered_output
 def test_time_series(file_id):
     """Test cumulative time series endpoint"""
     if not file_id:
         print("❌ No file ID provided for time series test")
         return
         
-    url = f"http://localhost:8000/files/{file_id}/time-series"
+    url = TIME_SERIES_URL.format(file_id=file_id)
     
     print(f"\n📊 Testing Cumulative Time Series Data:")
-    for period in ["14d", "30d", "90d", "1y"]:
+    # Periods are independent, so fetch them together and print in order
+    periods = ["14d", "30d", "90d", "1y"]
+    # Only the counts and endpoints are printed, so skip the full daily series
+    futures = run_concurrently(lambda period: fast_get(url, params={"period": period, "summary_only": 1}), periods)
+    
+    for period, future in zip(periods, futures):
         try:
-            response = requests.get(url, params={"period": period})
+            response = future.result()
             if response.status_code == 200:
-                data = response.json()
-                income_points = len(data['income'])
-                spending_points = len(data['spending'])
+                data = loads(response.content)
+                income_points = data['income_count']
+                spending_points = data['spending_count']
                 date_range = data['date_range']
                 summary = data['summary']
                 
-                print(f"  {period.upper()}: {date_range['days_covered']} days")
-                print(f"    Date Range: {date_range['start_date']} to {date_range['end_date']}")
-                print(f"    Data Points: {income_points} income, {spending_points} spending")
-                print(f"    Total Income: ${summary['total_income']:.2f}")
-                print(f"    Total Spending: ${summary['total_spending']:.2f}")
-                print(f"    Net Amount: ${summary['net_amount']:.2f}")
+                print(_TIME_SERIES_PERIOD_TMPL.format(
+                    period=period.upper(),
+                    days=date_range['days_covered'],
+                    start=date_range['start_date'],
+                    end=date_range['end_date'],
+                    income_points=income_points,
+                    spending_points=spending_points,
+                    total_income=summary['total_income'],
+                    total_spending=summary['total_spending'],
+                    net_amount=summary['net_amount']
+                ))
                 
                 # Show cumulative progression
                 if income_points > 0:
-                    first_income = data['income'][0]
-                    last_income = data['income'][-1]
+                    first_income = data['income_head']
+                    last_income = data['income_tail']
                     print(f"    Income: ${first_income['cumulative_amount']:.2f} → ${last_income['cumulative_amount']:.2f}")
                 
                 if spending_points > 0:
-                    first_spending = data['spending'][0]
-                    last_spending = data['spending'][-1]
+                    first_spending = data['spending_head']
+                    last_spending = data['spending_tail']
                     print(f"    Spending: ${first_spending['cumulative_amount']:.2f} → ${last_spending['cumulative_amount']:.2f}")
                 
                 print()  # Add spacing
@@ -159,29 +214,38 @@ def test_time_series(file_id):
             print("❌ Could not connect to server")
             break
 
+@buffered_output
 def test_categories_by_time(file_id):
     """Test categories by time period endpoint"""
     if not file_id:
         print("❌ No file ID provided for categories by time test")
         return
         
-    url = f"http://localhost:8000/files/{file_id}/categories-by-time"
+    url = CATEGORIES_BY_TIME_URL.format(file_id=file_id)
     
     print(f"\n📊 Testing Categories by Time Period:")
-    for period in ["14d", "30d", "90d", "1y"]:
+    # Periods are independent, so fetch them together and print in order
+    periods = ["14d", "30d", "90d", "1y"]
+    futures = run_concurrently(lambda period: fast_get(url, params={"period": period}), periods)
+    
+    for period, future in zip(periods, futures):
         try:
-            response = requests.get(url, params={"period": period})
+            response = future.result()
             if response.status_code == 200:
-                data = response.json()
+                data = loads(response.content)
                 date_range = data['date_range']
                 summary = data['summary']
                 top_categories = data['top_categories']
                 
-                print(f"  {period.upper()}: {date_range['days_covered']} days")
-                print(f"    Date Range: {date_range['start_date']} to {date_range['end_date']}")
-                print(f"    Total Spending: ${summary['total_spending']:.2f}")
-                print(f"    Unique Categories: {summary['unique_categories']}")
-                print(f"    Spending Transactions: {summary['spending_transactions']}")
+                print(_CATEGORIES_PERIOD_TMPL.format(
+                    period=period.upper(),
+                    days=date_range['days_covered'],
+                    start=date_range['start_date'],
+                    end=date_range['end_date'],
+                    total_spending=summary['total_spending'],
+                    unique_categories=summary['unique_categories'],
+                    spending_transactions=summary['spending_transactions']
+                ))
                 
                 # Show top 3 categories
                 if top_categories:
@@ -197,17 +261,18 @@ def test_categories_by_time(file_id):
             print("❌ Could not connect to server")
             break
 
+@buffered_output
 def test_file_details(file_id):
     """Test file details endpoint"""
     if not file_id:
         return
         
-    url = f"http://localhost:8000/files/{file_id}"
+    url = FILE_URL.format(file_id=file_id)
     
     try:
-        response = requests.get(url)
+        response = fast_get(url)
         if response.status_code == 200:
-            data = response.json()
+            data = loads(response.content)
             print(f"\n📁 File Details:")
             print(f"  File ID: {data['file_id']}")
             print(f"  Filename: {data['filename']}")
@@ -219,41 +284,44 @@ def test_file_details(file_id):
         print("❌ Could not connect to server")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test financial analysis & time series endpoints")
+    parser.add_argument("--csv", choices=list(CSV_FILES.keys()), default=DEFAULT_CSV,
+                        help="Which sample CSV file to upload")
+    parser.add_argument("--include-categories-by-time", action=argparse.BooleanOptionalAction, default=True,
+                        help="Also sweep the categories-by-time endpoint")
+    args = parser.parse_args()
+    
     print("📊 Testing Financial Analysis & Time Series...")
     print("=" * 50)
     
     # Show available CSV files
     print(f"📁 Available CSV files:")
     for name, path in CSV_FILES.items():
-        status = "✅" if os.path.exists(path) else "❌"
+        status = "✅" if csv_exists(path) else "❌"
         default_marker = " (DEFAULT)" if name == DEFAULT_CSV else ""
         print(f"  {status} {name}: {path}{default_marker}")
     
-    print(f"\n🎯 Using CSV file: {DEFAULT_CSV} ({CSV_FILES[DEFAULT_CSV]})")
-    print("💡 To change the CSV file, modify the DEFAULT_CSV variable at the top of this file")
+    print(f"\n🎯 Using CSV file: {args.csv} ({CSV_FILES[args.csv]})")
+    print("💡 To change the CSV file, pass --csv (or modify DEFAULT_CSV at the top of this file)")
     print("=" * 50)
     
     # Upload a file for analysis testing
-    file_id = test_upload_for_analysis()
+    file_id = test_upload_for_analysis(args.csv)
     
     if file_id:
-        # Test file details
-        test_file_details(file_id)
-        
-        # Test financial analysis
-        test_financial_analysis(file_id)
-        
-        # Test time series data
-        test_time_series(file_id)
-        
-        # Test categories by time
-        test_categories_by_time(file_id)
-        
+        # File details, financial analysis, time series data and categories
+        # by time are independent, so run them together; each one's output
+        # is still printed as its own block in this order
+        tests = [test_file_details, test_financial_analysis, test_time_series]
+        if args.include_categories_by_time:
+            tests.append(test_categories_by_time)
+        run_tests_concurrently(tests, file_id)
+    
         print(f"\n🔗 Analysis Endpoints:")
-        print(f"📁 File details: http://localhost:8000/files/{file_id}")
-        print(f"📊 File analysis: http://localhost:8000/files/{file_id}/analysis")
-        print(f"📈 Time series data: http://localhost:8000/files/{file_id}/time-series")
-        print(f"📊 Categories by time: http://localhost:8000/files/{file_id}/categories-by-time")
-        print(f"🤖 Categorized transactions: http://localhost:8000/files/{file_id}/categorized")
+        print(f"📁 File details: {FILE_URL.format(file_id=file_id)}")
+        print(f"📊 File analysis: {ANALYSIS_URL.format(file_id=file_id)}")
+        print(f"📈 Time series data: {TIME_SERIES_URL.format(file_id=file_id)}")
+        print(f"📊 Categories by time: {CATEGORIES_BY_TIME_URL.format(file_id=file_id)}")
+        print(f"🤖 Categorized transactions: {CATEGORIZED_URL.format(file_id=file_id)}")
     else:
         print("❌ Could not upload file for analysis testing")
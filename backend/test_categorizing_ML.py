@@ -3,10 +3,34 @@
 Test script for ML categorization functionality
 """
 
-import requests
 import json
 import os
 
+from api_client import (
+    BASE_URL,
+    JSON_HEADERS,
+    SESSION,
+    buffered_output,
+    cached_file_id,
+    dumps,
+    fast_get,
+    loads,
+    remember_file_id,
+    run_concurrently,
+    run_tests_concurrently,
+    upload_csv,
+    with_retry,
+)
+
+# Endpoint URLs; per-file ones are formatted with the file_id per call
+UPLOAD_URL = BASE_URL + "/upload-transactions"
+ML_STATUS_URL = BASE_URL + "/ml/status"
+PREDICT_CATEGORY_URL = BASE_URL + "/ml/predict-category"
+PREDICT_CATEGORY_BATCH_URL = PREDICT_CATEGORY_URL + "/batch"
+SUBSCRIPTION_STATUS_URL = BASE_URL + "/subscriptions/status"
+CATEGORIZED_URL = BASE_URL + "/files/{file_id}/categorized"
+SUBSCRIPTIONS_URL = BASE_URL + "/files/{file_id}/subscriptions"
+
 # Configuration: Change this to switch between different CSV files
 CSV_FILES = {
     "balanced": "./trans_data_internal/sample_transactions_balanced.csv",
@@ -16,41 +40,45 @@ CSV_FILES = {
 # Set the default CSV file to use
 DEFAULT_CSV = "balanced"  # Change this to "original" to use the other file
 
+# Whether each CSV file exists, checked once at import
+CSV_STATUS = {name: os.path.exists(path) for name, path in CSV_FILES.items()}
+
+@buffered_output
+@with_retry
 def test_ml_status():
     """Test the ML models status"""
-    url = "http://localhost:8000/ml/status"
+    url = ML_STATUS_URL
     
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            print(f"\n🤖 ML Models Status:")
-            
-            # Category model status
-            cat_model = data['category_model']
-            print(f"📊 Category Model:")
-            print(f"  ✅ Loaded: {cat_model['loaded']}")
-            print(f"  📁 Path: {cat_model['path']}")
-            print(f"  📄 Exists: {cat_model['exists']}")
-            
-            # Subscription model status
-            sub_model = data['subscription_model']
-            print(f"🔍 Subscription Model:")
-            print(f"  ✅ Loaded: {sub_model['loaded']}")
-            print(f"  📁 Path: {sub_model['path']}")
-            print(f"  📄 Exists: {sub_model['exists']}")
-            
-            return cat_model['loaded'] and sub_model['loaded']
-        else:
-            print(f"❌ ML status check failed: {response.status_code}")
-            return False
-    except requests.exceptions.ConnectionError:
-        print("❌ Could not connect to server")
+    response = fast_get(url)
+    if response.status_code == 200:
+        data = loads(response.content)
+        print(f"\n🤖 ML Models Status:")
+        
+        # Category model status
+        cat_model = data['category_model']
+        print(f"📊 Category Model:")
+        print(f"  ✅ Loaded: {cat_model['loaded']}")
+        print(f"  📁 Path: {cat_model['path']}")
+        print(f"  📄 Exists: {cat_model['exists']}")
+        
+        # Subscription model status
+        sub_model = data['subscription_model']
+        print(f"🔍 Subscription Model:")
+        print(f"  ✅ Loaded: {sub_model['loaded']}")
+        print(f"  📁 Path: {sub_model['path']}")
+        print(f"  📄 Exists: {sub_model['exists']}")
+        
+        return cat_model['loaded'] and sub_model['loaded']
+    else:
+        print(f"❌ ML status check failed: {response.status_code}")
         return False
 
+@buffered_output
+@with_retry
 def test_single_prediction():
-    """Test single category prediction"""
-    url = "http://localhost:8000/ml/predict-category"
+    """Test category prediction for a set of sample descriptions"""
+    url = PREDICT_CATEGORY_URL
+    batch_url = PREDICT_CATEGORY_BATCH_URL
     
     test_descriptions = [
         "STARBUCKS COFFEE #1234",
@@ -63,45 +91,59 @@ def test_single_prediction():
     ]
     
     print(f"\n🔮 Testing Single Predictions:")
-    for desc in test_descriptions:
-        try:
-            response = requests.post(url, params={"description": desc})
-            if response.status_code == 200:
-                data = response.json()
-                print(f"  '{desc}' → {data['predicted_category']} (confidence: {data['confidence']:.2f})")
-            else:
-                print(f"  ❌ Failed to predict for '{desc}': {response.status_code}")
-        except requests.exceptions.ConnectionError:
-            print("❌ Could not connect to server")
-            break
+    
+    # One round trip for all descriptions; older servers without the batch
+    # route fall back to one request per description
+    response = SESSION.post(batch_url, data=dumps({"descriptions": test_descriptions}), headers=JSON_HEADERS)
+    if response.status_code == 200:
+        data = loads(response.content)
+        for prediction in data['predictions']:
+            print(f"  '{prediction['description']}' → {prediction['predicted_category']} (confidence: {prediction['confidence']:.2f})")
+        return
+    elif response.status_code != 404:
+        print(f"  ❌ Batch prediction failed: {response.status_code}")
+        return
+    
+    # Predictions are independent, so send them together and print in order
+    futures = run_concurrently(lambda desc: SESSION.post(url, params={"description": desc}), test_descriptions)
+    
+    for desc, future in zip(test_descriptions, futures):
+        response = future.result()
+        if response.status_code == 200:
+            data = loads(response.content)
+            print(f"  '{desc}' → {data['predicted_category']} (confidence: {data['confidence']:.2f})")
+        else:
+            print(f"  ❌ Failed to predict for '{desc}': {response.status_code}")
 
+@buffered_output
+@with_retry
 def test_categorized_transactions(file_id):
     """Test getting categorized transactions"""
     if not file_id:
         print("❌ No file ID provided for categorized transactions test")
         return
         
-    url = f"http://localhost:8000/files/{file_id}/categorized"
-    
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            print(f"\n🤖 Categorized Transactions:")
-            print(f"📊 Total transactions: {data['total_transactions']}")
-            
-            # Show sample of categorized transactions
-            transactions = data['transactions'][:5]  # First 5 transactions
-            for i, transaction in enumerate(transactions, 1):
-                if 'ml_category' in transaction and 'ml_confidence' in transaction:
-                    print(f"  {i}. {transaction.get('description', 'N/A')[:30]}...")
-                    print(f"     Category: {transaction['ml_category']} (confidence: {transaction['ml_confidence']:.2f})")
-                    print(f"     Amount: ${transaction.get('amount', 'N/A')}")
-        else:
-            print(f"❌ Failed to get categorized transactions: {response.status_code}")
-    except requests.exceptions.ConnectionError:
-        print("❌ Could not connect to server")
+    url = CATEGORIZED_URL.format(file_id=file_id)
+    
+    # Only the first 5 transactions are shown, so only fetch those
+    response = fast_get(url, params={"limit": 5})
+    if response.status_code == 200:
+        data = loads(response.content)
+        print(f"\n🤖 Categorized Transactions:")
+        print(f"📊 Total transactions: {data['total_transactions']}")
+        
+        # Show sample of categorized transactions
+        transactions = data['transactions'][:5]  # First 5 transactions
+        for i, transaction in enumerate(transactions, 1):
+            if 'ml_category' in transaction and 'ml_confidence' in transaction:
+                print(f"  {i}. {transaction.get('description', 'N/A')[:30]}...")
+                print(f"     Category: {transaction['ml_category']} (confidence: {transaction['ml_confidence']:.2f})")
+                print(f"     Amount: ${transaction.get('amount', 'N/A')}")
+    else:
+        print(f"❌ Failed to get categorized transactions: {response.status_code}")
 
+@buffered_output
+@with_retry
 def test_upload_for_ml(csv_type=None):
     """Upload a file for ML testing"""
     if csv_type is None:
@@ -113,29 +155,35 @@ def test_upload_for_ml(csv_type=None):
     
     csv_path = CSV_FILES[csv_type]
     
-    # Check if file exists
-    if not os.path.exists(csv_path):
+    # Open the file once up front; a missing file shows up here rather than
+    # through a separate exists() check
+    try:
+        csv_file = open(csv_path, "rb")
+    except FileNotFoundError:
         print(f"❌ CSV file not found: {csv_path}")
         return None
     
-    url = "http://localhost:8000/upload-transactions"
-    
-    print(f"📁 Uploading CSV file for ML testing: {csv_path}")
-    
-    with open(csv_path, "rb") as f:
-        files = {"file": (csv_path, f, "text/csv")}
+    with csv_file:
+        stat = os.fstat(csv_file.fileno())
         
-        try:
-            response = requests.post(url, files=files)
-            if response.status_code == 200:
-                data = response.json()
-                print(f"✅ Upload successful! File ID: {data['file_id']}")
-                return data['file_id']
-            else:
-                print(f"❌ Upload failed: {response.status_code}")
-                return None
-        except requests.exceptions.ConnectionError:
-            print("❌ Could not connect to server")
+        # Reuse the file from a previous run if the server still has it
+        file_id = cached_file_id(csv_path, stat, csv_file)
+        if file_id:
+            print(f"♻️  Reusing previous upload of {csv_path}. File ID: {file_id}")
+            return file_id
+        
+        url = UPLOAD_URL
+        
+        print(f"📁 Uploading CSV file for ML testing: {csv_path}")
+        
+        response = upload_csv(csv_path, url, csv_file=csv_file)
+        if response.status_code == 200:
+            data = loads(response.content)
+            print(f"✅ Upload successful! File ID: {data['file_id']}")
+            remember_file_id(csv_path, data['file_id'], stat)
+            return data['file_id']
+        else:
+            print(f"❌ Upload failed: {response.status_code}")
             return None
 
 if __name__ == "__main__":
@@ -145,7 +193,7 @@ if __name__ == "__main__":
     # Show available CSV files
     print(f"📁 Available CSV files:")
     for name, path in CSV_FILES.items():
-        status = "✅" if os.path.exists(path) else "❌"
+        status = "✅" if CSV_STATUS[name] else "❌"
         default_marker = " (DEFAULT)" if name == DEFAULT_CSV else ""
         print(f"  {status} {name}: {path}{default_marker}")
     
@@ -153,26 +201,22 @@ if __name__ == "__main__":
     print("💡 To change the CSV file, modify the DEFAULT_CSV variable at the top of this file")
     print("=" * 50)
     
-    # Test ML status first
-    models_loaded = test_ml_status()
+    # The status check, the predictions and the upload don't depend on each
+    # other, so their requests go out together, each on its own kept-alive
+    # connection; the slow upload is hidden behind the prediction calls
+    models_loaded, _, file_id = run_tests_concurrently([test_ml_status, test_single_prediction, test_upload_for_ml])
     
     if not models_loaded:
         print("⚠️  Some ML models not loaded, some tests may fail")
     
-    # Test single predictions
-    test_single_prediction()
-    
-    # Upload a file for ML testing
-    file_id = test_upload_for_ml()
-    
     # Test categorized transactions
     if file_id:
         test_categorized_transactions(file_id)
     
     print(f"\n🔗 ML Endpoints:")
-    print(f"🤖 ML models status: http://localhost:8000/ml/status")
-    print(f"🔮 Single category prediction: http://localhost:8000/ml/predict-category")
-    print(f"🔍 Subscription model status: http://localhost:8000/subscriptions/status")
+    print(f"🤖 ML models status: {ML_STATUS_URL}")
+    print(f"🔮 Single category prediction: {PREDICT_CATEGORY_URL}")
+    print(f"🔍 Subscription model status: {SUBSCRIPTION_STATUS_URL}")
     if file_id:
-        print(f"📊 Categorized transactions: http://localhost:8000/files/{file_id}/categorized")
-        print(f"📊 File subscriptions: http://localhost:8000/files/{file_id}/subscriptions")
+        print(f"📊 Categorized transactions: {CATEGORIZED_URL.format(file_id=file_id)}")
+        print(f"📊 File subscriptions: {SUBSCRIPTIONS_URL.format(file_id=file_id)}")
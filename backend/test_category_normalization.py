@@ -3,12 +3,28 @@
 Test script to verify that 'Other' and 'Uncategorized' are treated as the same category
 """
 
-import requests
 import json
 
+from api_client import BASE_URL, JSON_HEADERS, SESSION, buffered_output, dumps, loads, run_concurrently, with_retry
+
+def _print_prediction(desc, category, confidence):
+    """Print one prediction, flagging anything still labelled 'Other'; returns False on that failure"""
+    # Check if the category is "Uncategorized" (not "Other")
+    if category == "Uncategorized":
+        print(f"✅ '{desc}' → {category} (confidence: {confidence:.2f})")
+    elif category == "Other":
+        print(f"❌ '{desc}' → {category} (confidence: {confidence:.2f}) - Should be 'Uncategorized'")
+        return False
+    else:
+        print(f"ℹ️  '{desc}' → {category} (confidence: {confidence:.2f}) - Categorized as specific category")
+    return True
+
+@buffered_output
+@with_retry
 def test_category_normalization():
     """Test that the ML model treats 'Other' and 'Uncategorized' as the same category"""
-    url = "http://localhost:8000/ml/predict-category"
+    url = BASE_URL + "/ml/predict-category"
+    batch_url = BASE_URL + "/ml/predict-category/batch"
     
     # Test descriptions that might be categorized as "Other" or "Uncategorized"
     test_descriptions = [
@@ -24,26 +40,33 @@ def test_category_normalization():
     print("🧪 Testing Category Normalization...")
     print("=" * 50)
     
-    for desc in test_descriptions:
-        try:
-            response = requests.post(url, params={"description": desc})
+    # One round trip for all descriptions; older servers without the batch
+    # route fall back to one request per description
+    batch_handled = False
+    response = SESSION.post(batch_url, data=dumps({"descriptions": test_descriptions}), headers=JSON_HEADERS)
+    if response.status_code == 200:
+        for prediction in loads(response.content)['predictions']:
+            # One 'Other' is enough to fail the check, so stop there
+            if not _print_prediction(prediction['description'], prediction['predicted_category'], prediction['confidence']):
+                break
+        batch_handled = True
+    elif response.status_code != 404:
+        print(f"❌ Batch prediction failed: {response.status_code}")
+        batch_handled = True
+    
+    if not batch_handled:
+        # Predictions are independent, so send them together and print in order
+        futures = run_concurrently(lambda desc: SESSION.post(url, params={"description": desc}), test_descriptions)
+        
+        for desc, future in zip(test_descriptions, futures):
+            response = future.result()
             if response.status_code == 200:
-                data = response.json()
-                category = data['predicted_category']
-                confidence = data['confidence']
-                
-                # Check if the category is "Uncategorized" (not "Other")
-                if category == "Uncategorized":
-                    print(f"✅ '{desc}' → {category} (confidence: {confidence:.2f})")
-                elif category == "Other":
-                    print(f"❌ '{desc}' → {category} (confidence: {confidence:.2f}) - Should be 'Uncategorized'")
-                else:
-                    print(f"ℹ️  '{desc}' → {category} (confidence: {confidence:.2f}) - Categorized as specific category")
+                data = loads(response.content)
+                # One 'Other' is enough to fail the check, so stop there
+                if not _print_prediction(desc, data['predicted_category'], data['confidence']):
+                    break
             else:
                 print(f"❌ Failed to predict for '{desc}': {response.status_code}")
-        except requests.exceptions.ConnectionError:
-            print("❌ Could not connect to server")
-            break
     
     print("\n📊 Summary:")
     print("- All predictions should return 'Uncategorized' instead of 'Other'")
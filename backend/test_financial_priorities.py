@@ -7,6 +7,8 @@ import requests
 import json
 import os
 
+from api_client import BASE_URL, JSON_HEADERS, SESSION, cached_file_id, dumps, loads, remember_file_id, run_concurrently, upload_csv, with_retry
+
 # Configuration: Change this to switch between different CSV files
 CSV_FILES = {
     "balanced": "./trans_data_internal/sample_transactions_balanced.csv",
@@ -16,6 +18,44 @@ CSV_FILES = {
 # Set the default CSV file to use
 DEFAULT_CSV = "balanced"  # Change this to "original" to use the other file
 
+# Whether each CSV file exists, checked once at import
+CSV_STATUS = {name: os.path.exists(path) for name, path in CSV_FILES.items()}
+
+# Payload used for the validation requests
+VALIDATION_FINANCIAL_DATA = {
+    "credit_card_debt": {"total_debt": 1000, "highest_apr": 20, "minimum_payments": 50, "debt_accounts": 1},
+    "emergency_fund": {"current_emergency_fund": 500},
+    "retirement_match": {"employer_match_percentage": 3, "match_limit": 6, "current_contribution": 3, "salary": 50000},
+    "investing_allocation": {"risk_tolerance": 3, "investment_experience": 2, "preferred_retirement_account": "401k", "hysa_rate": 4.0}
+}
+
+# Financial scenarios to compare
+SCENARIOS = [
+    {
+        "name": "High Debt Scenario",
+        "data": {
+            "credit_card_debt": {"total_debt": 15000, "highest_apr": 25, "minimum_payments": 300, "debt_accounts": 5},
+            "emergency_fund": {"current_emergency_fund": 0},
+            "retirement_match": {"employer_match_percentage": 3, "match_limit": 6, "current_contribution": 0, "salary": 50000},
+            "investing_allocation": {"risk_tolerance": 2, "investment_experience": 1, "preferred_retirement_account": "401k", "hysa_rate": 4.0}
+        }
+    },
+    {
+        "name": "No Debt Scenario",
+        "data": {
+            "credit_card_debt": {"total_debt": 0, "highest_apr": 0, "minimum_payments": 0, "debt_accounts": 0},
+            "emergency_fund": {"current_emergency_fund": 2000},
+            "retirement_match": {"employer_match_percentage": 4, "match_limit": 6, "current_contribution": 4, "salary": 75000},
+            "investing_allocation": {"risk_tolerance": 4, "investment_experience": 3, "preferred_retirement_account": "both", "hysa_rate": 4.5}
+        }
+    }
+]
+
+# Request bodies are serialized once at import and reused for every POST
+VALIDATION_FINANCIAL_DATA_ENCODED = dumps(VALIDATION_FINANCIAL_DATA)
+SCENARIOS_ENCODED = [(scenario["name"], dumps(scenario["data"])) for scenario in SCENARIOS]
+
+@with_retry
 def test_upload_for_financial_priorities(csv_type=None):
     """Upload a file for financial priorities testing"""
     if csv_type is None:
@@ -28,37 +68,38 @@ def test_upload_for_financial_priorities(csv_type=None):
     csv_path = CSV_FILES[csv_type]
     
     # Check if file exists
-    if not os.path.exists(csv_path):
+    if not CSV_STATUS[csv_type]:
         print(f"❌ CSV file not found: {csv_path}")
         return None
     
-    url = "http://localhost:8000/upload-transactions"
+    # Reuse the file from a previous run if the server still has it
+    file_id = cached_file_id(csv_path)
+    if file_id:
+        print(f"♻️  Reusing previous upload of {csv_path}. File ID: {file_id}")
+        return file_id
+    
+    url = BASE_URL + "/upload-transactions"
     
     print(f"📁 Uploading CSV file for financial priorities: {csv_path}")
     
-    with open(csv_path, "rb") as f:
-        files = {"file": (csv_path, f, "text/csv")}
-        
-        try:
-            response = requests.post(url, files=files)
-            if response.status_code == 200:
-                data = response.json()
-                print(f"✅ Upload successful! File ID: {data['file_id']}")
-                return data['file_id']
-            else:
-                print(f"❌ Upload failed: {response.status_code}")
-                return None
-        except requests.exceptions.ConnectionError:
-            print("❌ Could not connect to server")
-            return None
+    response = upload_csv(csv_path, url)
+    if response.status_code == 200:
+        data = loads(response.content)
+        print(f"✅ Upload successful! File ID: {data['file_id']}")
+        remember_file_id(csv_path, data['file_id'])
+        return data['file_id']
+    else:
+        print(f"❌ Upload failed: {response.status_code}")
+        return None
 
+@with_retry
 def test_financial_priorities(file_id):
     """Test financial priorities creation for a specific file"""
     if not file_id:
         print("❌ No file ID provided for financial priorities")
         return False
         
-    url = f"http://localhost:8000/files/{file_id}/financial-priorities"
+    url = f"{BASE_URL}/files/{file_id}/financial-priorities"
     
     # Sample financial data for testing
     financial_data = {
@@ -88,68 +129,64 @@ def test_financial_priorities(file_id):
     print(f"\n🎯 Testing Financial Priorities...")
     print("=" * 60)
     
-    try:
-        response = requests.post(url, json=financial_data)
-        if response.status_code == 200:
-            data = response.json()
-            
-            print(f"✅ Financial priorities created successfully!")
-            
-            # Display financial overview
-            overview = data.get('financial_overview', {})
-            print(f"\n📊 Financial Overview:")
-            print(f"  Monthly Discretionary Income: ${overview.get('monthly_discretionary_income', 0):,.2f}")
-            print(f"  Six Month Expenses: ${overview.get('six_month_expenses', 0):,.2f}")
-            print(f"  Monthly Expenses: ${overview.get('monthly_expenses', 0):,.2f}")
-            print(f"  Total Allocated: ${overview.get('total_allocated', 0):,.2f}")
-            print(f"  Remaining After Plan: ${overview.get('remaining_after_plan', 0):,.2f}")
-            
-            # Display each priority
-            priorities = data.get('priorities', [])
-            for priority in priorities:
-                print(f"\n{priority.get('priority', 0)}. {priority.get('name', 'Unknown').upper()}")
-                print("-" * 40)
-                print(f"  Description: {priority.get('description', 'N/A')}")
-                print(f"  Monthly Allocation: ${priority.get('monthly_allocation', 0):,.2f}")
-                print(f"  Status: {priority.get('status', 'Unknown').replace('_', ' ').title()}")
-                
-                months = priority.get('months_to_complete', 0)
-                if months != float('inf') and months > 0:
-                    print(f"  Time to Complete: {months:.1f} months")
-                
-                recommendations = priority.get('recommendations', [])
-                if recommendations:
-                    print(f"  Recommendations:")
-                    for i, rec in enumerate(recommendations, 1):
-                        print(f"    {i}. {rec}")
-            
-            # Display plan summary
-            summary = data.get('plan_summary', {})
-            print(f"\n📋 Plan Summary:")
-            print(f"  Debt Payoff Time: {summary.get('debt_payoff_months', 0):.1f} months")
-            print(f"  Emergency Fund Time: {summary.get('emergency_fund_months', 0):.1f} months")
-            print(f"  Retirement Match Immediate: {'Yes' if summary.get('retirement_match_immediate', False) else 'No'}")
-            
-            # Display next steps
-            next_steps = data.get('next_steps', [])
-            if next_steps:
-                print(f"\n💡 Next Steps:")
-                for i, step in enumerate(next_steps, 1):
-                    print(f"  {i}. {step}")
+    response = SESSION.post(url, data=dumps(financial_data), headers=JSON_HEADERS)
+    if response.status_code == 200:
+        data = loads(response.content)
+        
+        print(f"✅ Financial priorities created successfully!")
+        
+        # Display financial overview
+        overview = data.get('financial_overview', {})
+        print(f"\n📊 Financial Overview:")
+        print(f"  Monthly Discretionary Income: ${overview.get('monthly_discretionary_income', 0):,.2f}")
+        print(f"  Six Month Expenses: ${overview.get('six_month_expenses', 0):,.2f}")
+        print(f"  Monthly Expenses: ${overview.get('monthly_expenses', 0):,.2f}")
+        print(f"  Total Allocated: ${overview.get('total_allocated', 0):,.2f}")
+        print(f"  Remaining After Plan: ${overview.get('remaining_after_plan', 0):,.2f}")
+        
+        # Display each priority
+        priorities = data.get('priorities', [])
+        for priority in priorities:
+            print(f"\n{priority.get('priority', 0)}. {priority.get('name', 'Unknown').upper()}")
+            print("-" * 40)
+            print(f"  Description: {priority.get('description', 'N/A')}")
+            print(f"  Monthly Allocation: ${priority.get('monthly_allocation', 0):,.2f}")
+            print(f"  Status: {priority.get('status', 'Unknown').replace('_', ' ').title()}")
             
-            return True
-        else:
-            print(f"❌ Failed to create financial priorities: {response.status_code}")
-            try:
-                error_data = response.json()
-                print(f"   Error: {error_data.get('detail', 'Unknown error')}")
-            except:
-                print(f"   Error: {response.text}")
-            return False
+            months = priority.get('months_to_complete', 0)
+            if months != float('inf') and months > 0:
+                print(f"  Time to Complete: {months:.1f} months")
             
-    except requests.exceptions.ConnectionError:
-        print("❌ Could not connect to server")
+            recommendations = priority.get('recommendations', [])
+            if recommendations:
+                print(f"  Recommendations:")
+                for i, rec in enumerate(recommendations, 1):
+                    print(f"    {i}. {rec}")
+        
+        # Display plan summary
+        summary = data.get('plan_summary', {})
+        print(f"\n📋 Plan Summary:")
+        print(f"  Debt Payoff Time: {summary.get('debt_payoff_months', 0):.1f} months")
+        print(f"  Emergency Fund Time: {summary.get('emergency_fund_months', 0):.1f} months")
+        print(f"  Retirement Match Immediate: {'Yes' if summary.get('retirement_match_immediate', False) else 'No'}")
+        
+        # Display next steps
+        next_steps = data.get('next_steps', [])
+        if next_steps:
+            print(f"\n💡 Next Steps:")
+            for i, step in enumerate(next_steps, 1):
+                print(f"  {i}. {step}")
+        
+        return True
+    else:
+        print(f"❌ Failed to create financial priorities: {response.status_code}")
+        try:
+            error_data = loads(response.content)
+            print(f"   Error: {error_data.get('detail', 'Unknown error')}")
+        except:
+            print(f"   Error: {response.text}")
         return False
+        
 
 def test_financial_priorities_validation():
     """Test API validation and error handling"""
@@ -163,16 +200,10 @@ def test_financial_priorities_validation():
     
     results = []
     for test_case in test_cases:
-        url = f"http://localhost:8000/files/{test_case['file_id']}/financial-priorities"
-        financial_data = {
-            "credit_card_debt": {"total_debt": 1000, "highest_apr": 20, "minimum_payments": 50, "debt_accounts": 1},
-            "emergency_fund": {"current_emergency_fund": 500},
-            "retirement_match": {"employer_match_percentage": 3, "match_limit": 6, "current_contribution": 3, "salary": 50000},
-            "investing_allocation": {"risk_tolerance": 3, "investment_experience": 2, "preferred_retirement_account": "401k", "hysa_rate": 4.0}
-        }
+        url = f"{BASE_URL}/files/{test_case['file_id']}/financial-priorities"
         
         try:
-            response = requests.post(url, json=financial_data)
+            response = SESSION.post(url, data=VALIDATION_FINANCIAL_DATA_ENCODED, headers=JSON_HEADERS)
             if response.status_code == test_case["expected_status"]:
                 print(f"✅ {test_case['description']}: Correct status {response.status_code}")
                 results.append(True)
@@ -193,36 +224,22 @@ def test_different_scenarios(file_id):
     print(f"\n🎭 Testing Different Financial Scenarios...")
     print("=" * 60)
     
-    scenarios = [
-        {
-            "name": "High Debt Scenario",
-            "data": {
-                "credit_card_debt": {"total_debt": 15000, "highest_apr": 25, "minimum_payments": 300, "debt_accounts": 5},
-                "emergency_fund": {"current_emergency_fund": 0},
-                "retirement_match": {"employer_match_percentage": 3, "match_limit": 6, "current_contribution": 0, "salary": 50000},
-                "investing_allocation": {"risk_tolerance": 2, "investment_experience": 1, "preferred_retirement_account": "401k", "hysa_rate": 4.0}
-            }
-        },
-        {
-            "name": "No Debt Scenario",
-            "data": {
-                "credit_card_debt": {"total_debt": 0, "highest_apr": 0, "minimum_payments": 0, "debt_accounts": 0},
-                "emergency_fund": {"current_emergency_fund": 2000},
-                "retirement_match": {"employer_match_percentage": 4, "match_limit": 6, "current_contribution": 4, "salary": 75000},
-                "investing_allocation": {"risk_tolerance": 4, "investment_experience": 3, "preferred_retirement_account": "both", "hysa_rate": 4.5}
-            }
-        }
-    ]
+    url = f"{BASE_URL}/files/{file_id}/financial-priorities"
+    
+    # Scenarios are independent, so post them together and print in order
+    futures = run_concurrently(
+        lambda body: SESSION.post(url, data=body, headers=JSON_HEADERS),
+        [body for _, body in SCENARIOS_ENCODED]
+    )
     
     results = []
-    for scenario in scenarios:
-        print(f"\n📊 {scenario['name']}:")
-        url = f"http://localhost:8000/files/{file_id}/financial-priorities"
+    for (name, _), future in zip(SCENARIOS_ENCODED, futures):
+        print(f"\n📊 {name}:")
         
         try:
-            response = requests.post(url, json=scenario['data'])
+            response = future.result()
             if response.status_code == 200:
-                data = response.json()
+                data = loads(response.content)
                 overview = data.get('financial_overview', {})
                 print(f"  ✅ Success - Remaining: ${overview.get('remaining_after_plan', 0):,.2f}")
                 results.append(True)
@@ -239,13 +256,13 @@ if __name__ == "__main__":
     print("🎯 Financial Priority Tool Test Suite")
     print("=" * 60)
     print("ℹ️  This tests the financial priority planning tool")
-    print("   Make sure the server is running on localhost:8000")
+    print(f"   Make sure the server is running on {BASE_URL}")
     print("=" * 60)
     
     # Show available CSV files
     print(f"📁 Available CSV files:")
     for name, path in CSV_FILES.items():
-        status = "✅" if os.path.exists(path) else "❌"
+        status = "✅" if CSV_STATUS[name] else "❌"
         default_marker = " (DEFAULT)" if name == DEFAULT_CSV else ""
         print(f"  {status} {name}: {path}{default_marker}")
     
@@ -7,6 +7,8 @@ import requests
 import json
 import os
 
+from api_client import BASE_URL, JSON_HEADERS, SESSION, VERBOSE, cached_file_id, dumps, remember_file_id, upload_csv
+
 # Configuration: Change this to switch between different CSV files
 CSV_FILES = {
     "balanced": "./trans_data_internal/sample_transactions_balanced.csv",
@@ -16,6 +18,79 @@ CSV_FILES = {
 # Set the default CSV file to use
 DEFAULT_CSV = "balanced"  # Change this to "original" to use the other file
 
+# Whether each CSV file exists, checked once at import
+CSV_STATUS = {name: os.path.exists(path) for name, path in CSV_FILES.items()}
+
+OPTIMIZED_PROJECTIONS_URL = BASE_URL + "/wealth/optimized-projections"
+
+# Sample wealth data; the file_id is added per run
+WEALTH_DATA = {
+    "assets": {
+        "realEstate": {"value": 400000, "rate": 3.5},
+        "checking": {"value": 8000, "rate": 0},
+        "savings": {"value": 15000, "rate": 2.0},
+        "retirement": {"value": 75000, "rate": 10.0},
+        "cars": {"value": 25000, "rate": -10.0},
+        "otherAssets": {"value": 5000, "rate": 0}
+    },
+    "liabilities": {
+        "realEstateLoans": {"value": 250000, "rate": 6.0},
+        "creditCardDebt": {"value": 4000, "rate": 22.0},
+        "personalLoans": {"value": 0, "rate": 12.0},
+        "studentLoans": {"value": 15000, "rate": 7.0},
+        "carLoans": {"value": 12000, "rate": 9.0},
+        "otherDebt": {"value": 0, "rate": 0}
+    },
+    "contributions": {
+        "contrib_checking": 1500,
+        "contrib_hysa": 800,
+        "contrib_retirement": 1200,
+        "move_checking_to_invest": 300
+    },
+    "debtPayments": {
+        "pay_mortgage": 1800,
+        "pay_cc": 400,
+        "pay_personal": 0,
+        "pay_student": 250,
+        "pay_car": 350,
+        "pay_other_debt": 0
+    }
+}
+
+# Sample wealth data for the scenario without a file
+WEALTH_DATA_WITHOUT_FILE = {
+    "assets": {
+        "realEstate": {"value": 300000, "rate": 3.5},
+        "checking": {"value": 5000, "rate": 0},
+        "savings": {"value": 10000, "rate": 2.0},
+        "retirement": {"value": 50000, "rate": 10.0},
+        "cars": {"value": 15000, "rate": -10.0},
+        "otherAssets": {"value": 0, "rate": 0}
+    },
+    "liabilities": {
+        "realEstateLoans": {"value": 200000, "rate": 6.0},
+        "creditCardDebt": {"value": 2000, "rate": 22.0},
+        "personalLoans": {"value": 0, "rate": 12.0},
+        "studentLoans": {"value": 10000, "rate": 7.0},
+        "carLoans": {"value": 8000, "rate": 9.0},
+        "otherDebt": {"value": 0, "rate": 0}
+    },
+    "contributions": {
+        "contrib_checking": 1000,
+        "contrib_hysa": 500,
+        "contrib_retirement": 800,
+        "move_checking_to_invest": 200
+    },
+    "debtPayments": {
+        "pay_mortgage": 1200,
+        "pay_cc": 200,
+        "pay_personal": 0,
+        "pay_student": 150,
+        "pay_car": 250,
+        "pay_other_debt": 0
+    }
+}
+
 def test_upload_for_optimization(csv_type=None):
     """Upload a file for optimization testing"""
     if csv_type is None:
@@ -28,219 +103,193 @@ def test_upload_for_optimization(csv_type=None):
     csv_path = CSV_FILES[csv_type]
     
     # Check if file exists
-    if not os.path.exists(csv_path):
+    if not CSV_STATUS[csv_type]:
         print(f"❌ CSV file not found: {csv_path}")
         return None
     
-    url = "http://localhost:8000/upload-transactions"
+    # Reuse the file from a previous run if the server still has it
+    file_id = cached_file_id(csv_path)
+    if file_id:
+        print(f"♻️  Reusing previous upload of {csv_path}. File ID: {file_id}")
+        return file_id
+    
+    url = BASE_URL + "/upload-transactions"
     
     print(f"📁 Uploading CSV file for optimization testing: {csv_path}")
     
-    with open(csv_path, "rb") as f:
-        files = {"file": (csv_path, f, "text/csv")}
-        
-        try:
-            response = requests.post(url, files=files)
-            if response.status_code == 200:
-                data = response.json()
-                print(f"✅ Upload successful! File ID: {data['file_id']}")
-                return data['file_id']
-            else:
-                print(f"❌ Upload failed: {response.status_code}")
-                return None
-        except requests.exceptions.ConnectionError:
-            print("❌ Could not connect to server")
+    try:
+        response = upload_csv(csv_path, url)
+        if response.status_code == 200:
+            data = response.json()
+            print(f"✅ Upload successful! File ID: {data['file_id']}")
+            remember_file_id(csv_path, data['file_id'])
+            return data['file_id']
+        else:
+            print(f"❌ Upload failed: {response.status_code}")
             return None
+    except requests.exceptions.ConnectionError:
+        print("❌ Could not connect to server")
+        return None
+
+def post_optimized_projections(wealth_data):
+    """POST one scenario to the optimized projections endpoint; returns the response data, or None on failure"""
+    try:
+        response = SESSION.post(OPTIMIZED_PROJECTIONS_URL, data=dumps(wealth_data), headers=JSON_HEADERS)
+    except requests.exceptions.ConnectionError:
+        print("❌ Could not connect to server")
+        return None
+    
+    if response.status_code == 200:
+        return response.json()
+    
+    print(f"❌ Failed to calculate optimized projections: {response.status_code}")
+    try:
+        error_data = response.json()
+        print(f"   Error: {error_data.get('detail', 'Unknown error')}")
+    except:
+        print(f"   Error: {response.text}")
+    return None
+
+def fetch_optimized_projections_batch(cases):
+    """
+    Calculate several projection scenarios in one request, so the server
+    reads and categorizes a shared CSV only once
+    
+    Returns one result per case, or None if the batch route isn't available
+    (the tests then call the single-scenario endpoint instead).
+    """
+    try:
+        response = SESSION.post(OPTIMIZED_PROJECTIONS_URL + "/batch", data=dumps({"cases": cases}), headers=JSON_HEADERS)
+    except requests.exceptions.ConnectionError:
+        return None
+    if response.status_code != 200:
+        return None
+    return response.json()["results"]
+
+def _check_projections(data):
+    """Report a failed scenario; True if data holds projections"""
+    if data is None:
+        return False
+    if 'error' in data:
+        print(f"❌ Failed to calculate optimized projections")
+        print(f"   Error: {data['error']}")
+        return False
+    return True
 
-def test_optimized_wealth_projections(file_id):
-    """Test optimized wealth projections with spending analysis"""
+def test_optimized_wealth_projections(file_id, data=None):
+    """
+    Test optimized wealth projections with spending analysis
+    
+    data may be this scenario's result from fetch_optimized_projections_batch;
+    otherwise the endpoint is called directly.
+    """
     if not file_id:
         print("❌ No file ID provided for optimization test")
         return
-        
-    url = "http://localhost:8000/wealth/optimized-projections"
-    
-    # Sample wealth data
-    wealth_data = {
-        "file_id": file_id,
-        "assets": {
-            "realEstate": {"value": 400000, "rate": 3.5},
-            "checking": {"value": 8000, "rate": 0},
-            "savings": {"value": 15000, "rate": 2.0},
-            "retirement": {"value": 75000, "rate": 10.0},
-            "cars": {"value": 25000, "rate": -10.0},
-            "otherAssets": {"value": 5000, "rate": 0}
-        },
-        "liabilities": {
-            "realEstateLoans": {"value": 250000, "rate": 6.0},
-            "creditCardDebt": {"value": 4000, "rate": 22.0},
-            "personalLoans": {"value": 0, "rate": 12.0},
-            "studentLoans": {"value": 15000, "rate": 7.0},
-            "carLoans": {"value": 12000, "rate": 9.0},
-            "otherDebt": {"value": 0, "rate": 0}
-        },
-        "contributions": {
-            "contrib_checking": 1500,
-            "contrib_hysa": 800,
-            "contrib_retirement": 1200,
-            "move_checking_to_invest": 300
-        },
-        "debtPayments": {
-            "pay_mortgage": 1800,
-            "pay_cc": 400,
-            "pay_personal": 0,
-            "pay_student": 250,
-            "pay_car": 350,
-            "pay_other_debt": 0
-        }
-    }
     
     print(f"\n💰 Testing Optimized Wealth Projections...")
     print("=" * 60)
     
-    try:
-        response = requests.post(url, json=wealth_data)
-        if response.status_code == 200:
-            data = response.json()
-            
-            print(f"✅ Optimized wealth projections calculated successfully!")
-            print(f"📊 Current Net Worth: ${data['current_net_worth']:,.2f}")
-            
-            # Show spending analysis
-            top_categories = data.get('top_spending_categories', [])
-            if top_categories:
-                print(f"\n🎯 Top 3 Spending Categories (20% Reduction):")
-                for i, category in enumerate(top_categories, 1):
-                    print(f"  {i}. {category['category']}")
-                    print(f"     Current: ${category['current_spending']:,.2f}/month")
-                    print(f"     Reduction: ${category['suggested_reduction']:,.2f}/month")
-                    print(f"     New Amount: ${category['new_spending']:,.2f}/month")
-                    print()
-            else:
-                print(f"\n⚠️  No spending categories found for optimization")
-            
-            monthly_savings = data.get('monthly_savings', 0)
-            print(f"💡 Total Monthly Savings: ${monthly_savings:,.2f}")
-            
-            # Show summary
-            summary = data.get('summary', {})
-            print(f"\n📈 Monthly Contribution Summary:")
-            print(f"  Original: ${summary.get('total_contributions_monthly', 0):,.2f}")
-            print(f"  Optimized: ${summary.get('optimized_contributions_monthly', 0):,.2f}")
-            print(f"  Additional Savings: ${summary.get('additional_monthly_savings', 0):,.2f}")
-            
-            # Show projections comparison
-            print(f"\n🔮 Wealth Projections Comparison:")
-            original_projections = data.get('original_projections', {})
-            optimized_projections = data.get('optimized_projections', {})
-            
-            for period in ['1y', '5y', '10y', '20y']:
-                if period in original_projections and period in optimized_projections:
-                    orig = original_projections[period]
-                    opt = optimized_projections[period]
-                    
-                    if 'error' not in orig and 'error' not in opt:
-                        improvement = opt.get('improvement', 0)
-                        improvement_pct = opt.get('improvement_pct', 0)
-                        
-                        print(f"  📅 {period.upper()}:")
-                        print(f"    Original: ${orig['net_worth']:,.2f}")
-                        print(f"    Optimized: ${opt['net_worth']:,.2f}")
-                        print(f"    Improvement: ${improvement:+,.2f} ({improvement_pct:+.1f}%)")
-                        print()
-            
-            return True
-        else:
-            print(f"❌ Failed to calculate optimized projections: {response.status_code}")
-            try:
-                error_data = response.json()
-                print(f"   Error: {error_data.get('detail', 'Unknown error')}")
-            except:
-                print(f"   Error: {response.text}")
-            return False
-            
-    except requests.exceptions.ConnectionError:
-        print("❌ Could not connect to server")
+    if data is None:
+        data = post_optimized_projections({"file_id": file_id, **WEALTH_DATA})
+    if not _check_projections(data):
         return False
-
-def test_optimized_without_file():
-    """Test optimized projections without file_id (no spending analysis)"""
-    url = "http://localhost:8000/wealth/optimized-projections"
     
-    # Sample wealth data without file_id
-    wealth_data = {
-        "assets": {
-            "realEstate": {"value": 300000, "rate": 3.5},
-            "checking": {"value": 5000, "rate": 0},
-            "savings": {"value": 10000, "rate": 2.0},
-            "retirement": {"value": 50000, "rate": 10.0},
-            "cars": {"value": 15000, "rate": -10.0},
-            "otherAssets": {"value": 0, "rate": 0}
-        },
-        "liabilities": {
-            "realEstateLoans": {"value": 200000, "rate": 6.0},
-            "creditCardDebt": {"value": 2000, "rate": 22.0},
-            "personalLoans": {"value": 0, "rate": 12.0},
-            "studentLoans": {"value": 10000, "rate": 7.0},
-            "carLoans": {"value": 8000, "rate": 9.0},
-            "otherDebt": {"value": 0, "rate": 0}
-        },
-        "contributions": {
-            "contrib_checking": 1000,
-            "contrib_hysa": 500,
-            "contrib_retirement": 800,
-            "move_checking_to_invest": 200
-        },
-        "debtPayments": {
-            "pay_mortgage": 1200,
-            "pay_cc": 200,
-            "pay_personal": 0,
-            "pay_student": 150,
-            "pay_car": 250,
-            "pay_other_debt": 0
-        }
-    }
+    print(f"✅ Optimized wealth projections calculated successfully!")
+    print(f"📊 Current Net Worth: ${data['current_net_worth']:,.2f}")
     
+    # Field-by-field detail only with TEST_VERBOSE=1
+    if VERBOSE:
+        # Show spending analysis
+        top_categories = data.get('top_spending_categories', [])
+        if top_categories:
+            print(f"\n🎯 Top 3 Spending Categories (20% Reduction):")
+            for i, category in enumerate(top_categories, 1):
+                print(f"  {i}. {category['category']}")
+                print(f"     Current: ${category['current_spending']:,.2f}/month")
+                print(f"     Reduction: ${category['suggested_reduction']:,.2f}/month")
+                print(f"     New Amount: ${category['new_spending']:,.2f}/month")
+                print()
+        else:
+            print(f"\n⚠️  No spending categories found for optimization")
+        
+        monthly_savings = data.get('monthly_savings', 0)
+        print(f"💡 Total Monthly Savings: ${monthly_savings:,.2f}")
+        
+        # Show summary
+        summary = data.get('summary', {})
+        print(f"\n📈 Monthly Contribution Summary:")
+        print(f"  Original: ${summary.get('total_contributions_monthly', 0):,.2f}")
+        print(f"  Optimized: ${summary.get('optimized_contributions_monthly', 0):,.2f}")
+        print(f"  Additional Savings: ${summary.get('additional_monthly_savings', 0):,.2f}")
+        
+        # Show projections comparison
+        print(f"\n🔮 Wealth Projections Comparison:")
+        original_projections = data.get('original_projections', {})
+        optimized_projections = data.get('optimized_projections', {})
+        
+        lines = []
+        for period in ['1y', '5y', '10y', '20y']:
+            if period in original_projections and period in optimized_projections:
+                orig = original_projections[period]
+                opt = optimized_projections[period]
+                
+                if 'error' not in orig and 'error' not in opt:
+                    improvement = opt.get('improvement', 0)
+                    improvement_pct = opt.get('improvement_pct', 0)
+                    
+                    lines.append(
+                        f"  📅 {period.upper()}:\n"
+                        f"    Original: ${orig['net_worth']:,.2f}\n"
+                        f"    Optimized: ${opt['net_worth']:,.2f}\n"
+                        f"    Improvement: ${improvement:+,.2f} ({improvement_pct:+.1f}%)\n"
+                    )
+        # One write for the whole comparison instead of one per line
+        if lines:
+            print("\n".join(lines))
+    
+    return True
+
+def test_optimized_without_file(data=None):
+    """
+    Test optimized projections without file_id (no spending analysis)
+    
+    data may be this scenario's result from fetch_optimized_projections_batch;
+    otherwise the endpoint is called directly.
+    """
     print(f"\n💰 Testing Optimized Projections (No File Analysis)...")
     print("=" * 60)
     
-    try:
-        response = requests.post(url, json=wealth_data)
-        if response.status_code == 200:
-            data = response.json()
-            
-            print(f"✅ Optimized projections calculated successfully!")
-            print(f"📊 Current Net Worth: ${data['current_net_worth']:,.2f}")
-            
-            top_categories = data.get('top_spending_categories', [])
-            if top_categories:
-                print(f"🎯 Found {len(top_categories)} spending categories")
-            else:
-                print(f"ℹ️  No spending categories (no file_id provided)")
-            
-            monthly_savings = data.get('monthly_savings', 0)
-            print(f"💡 Monthly Savings: ${monthly_savings:,.2f}")
-            
-            return True
-        else:
-            print(f"❌ Failed: {response.status_code}")
-            return False
-            
-    except requests.exceptions.ConnectionError:
-        print("❌ Could not connect to server")
+    if data is None:
+        data = post_optimized_projections(WEALTH_DATA_WITHOUT_FILE)
+    if not _check_projections(data):
         return False
+    
+    print(f"✅ Optimized projections calculated successfully!")
+    print(f"📊 Current Net Worth: ${data['current_net_worth']:,.2f}")
+    
+    top_categories = data.get('top_spending_categories', [])
+    if top_categories:
+        print(f"🎯 Found {len(top_categories)} spending categories")
+    else:
+        print(f"ℹ️  No spending categories (no file_id provided)")
+    
+    monthly_savings = data.get('monthly_savings', 0)
+    print(f"💡 Monthly Savings: ${monthly_savings:,.2f}")
+    
+    return True
 
 if __name__ == "__main__":
     print("💰 Optimized Wealth Projections Test Suite")
     print("=" * 60)
     print("ℹ️  This tests spending optimization and wealth projections")
-    print("   Make sure the server is running on localhost:8000")
+    print(f"   Make sure the server is running on {BASE_URL}")
     print("=" * 60)
     
     # Show available CSV files
     print(f"📁 Available CSV files:")
     for name, path in CSV_FILES.items():
-        status = "✅" if os.path.exists(path) else "❌"
+        status = "✅" if CSV_STATUS[name] else "❌"
         default_marker = " (DEFAULT)" if name == DEFAULT_CSV else ""
         print(f"  {status} {name}: {path}{default_marker}")
     
@@ -251,14 +300,20 @@ if __name__ == "__main__":
     # Upload a file for optimization testing
     file_id = test_upload_for_optimization()
     
+    # Calculate both scenarios in one request where the server supports it
+    cases = [WEALTH_DATA_WITHOUT_FILE]
+    if file_id:
+        cases.insert(0, {"file_id": file_id, **WEALTH_DATA})
+    results = fetch_optimized_projections_batch(cases) or [None] * len(cases)
+    
     # Test optimized projections with file analysis
     if file_id:
-        success1 = test_optimized_wealth_projections(file_id)
+        success1 = test_optimized_wealth_projections(file_id, results[0])
     else:
         success1 = False
     
     # Test optimized projections without file analysis
-    success2 = test_optimized_without_file()
+    success2 = test_optimized_without_file(results[-1])
     
     if success1 and success2:
         print(f"\n🎉 All optimized wealth projection tests passed!")
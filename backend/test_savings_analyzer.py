@@ -3,10 +3,13 @@
 Test script for savings analyzer functionality
 """
 
+import functools
 import requests
 import json
 import os
 
+from api_client import BASE_URL, JSON_HEADERS, SESSION, VERBOSE, cached_file_id, dumps, remember_file_id, run_tests_concurrently, upload_csv
+
 # Configuration: Change this to switch between different CSV files
 CSV_FILES = {
     "balanced": "./trans_data_internal/sample_transactions_balanced.csv",
@@ -16,6 +19,9 @@ CSV_FILES = {
 # Set the default CSV file to use
 DEFAULT_CSV = "balanced"  # Change this to "original" to use the other file
 
+# Whether each CSV file exists, checked once at import
+CSV_STATUS = {name: os.path.exists(path) for name, path in CSV_FILES.items()}
+
 def test_upload_for_savings(csv_type=None):
     """Upload a file for savings analysis testing"""
     if csv_type is None:
@@ -28,29 +34,33 @@ def test_upload_for_savings(csv_type=None):
     csv_path = CSV_FILES[csv_type]
     
     # Check if file exists
-    if not os.path.exists(csv_path):
+    if not CSV_STATUS[csv_type]:
         print(f"❌ CSV file not found: {csv_path}")
         return None
     
-    url = "http://localhost:8000/upload-transactions"
+    # Reuse the file from a previous run if the server still has it
+    file_id = cached_file_id(csv_path)
+    if file_id:
+        print(f"♻️  Reusing previous upload of {csv_path}. File ID: {file_id}")
+        return file_id
+    
+    url = BASE_URL + "/upload-transactions"
     
     print(f"📁 Uploading CSV file for savings analysis: {csv_path}")
     
-    with open(csv_path, "rb") as f:
-        files = {"file": (csv_path, f, "text/csv")}
-        
-        try:
-            response = requests.post(url, files=files)
-            if response.status_code == 200:
-                data = response.json()
-                print(f"✅ Upload successful! File ID: {data['file_id']}")
-                return data['file_id']
-            else:
-                print(f"❌ Upload failed: {response.status_code}")
-                return None
-        except requests.exceptions.ConnectionError:
-            print("❌ Could not connect to server")
+    try:
+        response = upload_csv(csv_path, url)
+        if response.status_code == 200:
+            data = response.json()
+            print(f"✅ Upload successful! File ID: {data['file_id']}")
+            remember_file_id(csv_path, data['file_id'])
+            return data['file_id']
+        else:
+            print(f"❌ Upload failed: {response.status_code}")
             return None
+    except requests.exceptions.ConnectionError:
+        print("❌ Could not connect to server")
+        return None
 
 def test_savings_analysis(file_id, target_amount, months):
     """Test savings analysis for a specific goal"""
@@ -58,7 +68,7 @@ def test_savings_analysis(file_id, target_amount, months):
         print("❌ No file ID provided for savings analysis")
         return False
         
-    url = "http://localhost:8000/savings/analyze"
+    url = BASE_URL + "/savings/analyze"
     
     savings_request = {
         "file_id": file_id,
@@ -71,63 +81,65 @@ def test_savings_analysis(file_id, target_amount, months):
     print("=" * 60)
     
     try:
-        response = requests.post(url, json=savings_request)
+        response = SESSION.post(url, data=dumps(savings_request), headers=JSON_HEADERS)
         if response.status_code == 200:
             data = response.json()
             
             print(f"✅ Savings analysis completed successfully!")
             
-            # Display goal information
-            goal = data.get('goal', {})
-            print(f"\n🎯 Savings Goal:")
-            print(f"  Target Amount: ${goal.get('target_amount', 0):,.2f}")
-            print(f"  Timeframe: {goal.get('months_to_save', 0)} months")
-            print(f"  Monthly Target: ${goal.get('monthly_target', 0):,.2f}")
-            
-            # Display current financials
-            financials = data.get('current_financials', {})
-            print(f"\n📊 Current Financials (Last 3 Months):")
-            print(f"  Monthly Income: ${financials.get('monthly_income', 0):,.2f}")
-            print(f"  Monthly Expenses: ${financials.get('monthly_expenses', 0):,.2f}")
-            print(f"  Monthly Savings: ${financials.get('monthly_savings', 0):,.2f}")
-            
-            # Display analysis results
-            analysis = data.get('analysis', {})
-            print(f"\n📈 Analysis Results:")
-            print(f"  Can Achieve Goal: {'✅ Yes' if analysis.get('can_achieve_goal', False) else '❌ No'}")
-            print(f"  Shortfall: ${analysis.get('shortfall', 0):,.2f}")
-            print(f"  Suggested Savings: ${analysis.get('total_suggested_savings', 0):,.2f}")
-            print(f"  Remaining Shortfall: ${analysis.get('remaining_shortfall', 0):,.2f}")
-            
-            # Display suggested cuts
-            suggested_cuts = data.get('suggested_cuts', [])
-            if suggested_cuts:
-                print(f"\n✂️  Suggested Spending Cuts:")
-                for i, cut in enumerate(suggested_cuts, 1):
-                    priority_text = {1: "High", 2: "Medium", 3: "Low", 4: "Very Low"}.get(cut.get('priority', 4), "Unknown")
-                    print(f"  {i}. {cut.get('category', 'Unknown')} ({priority_text} Priority)")
-                    print(f"     Current: ${cut.get('current_monthly', 0):,.2f}/month")
-                    print(f"     Suggested: ${cut.get('suggested_monthly', 0):,.2f}/month")
-                    print(f"     Reduction: ${cut.get('reduction_amount', 0):,.2f}/month ({cut.get('reduction_percentage', 0):.1f}%)")
+            # Field-by-field detail only with TEST_VERBOSE=1
+            if VERBOSE:
+                # Display goal information
+                goal = data.get('goal', {})
+                print(f"\n🎯 Savings Goal:")
+                print(f"  Target Amount: ${goal.get('target_amount', 0):,.2f}")
+                print(f"  Timeframe: {goal.get('months_to_save', 0)} months")
+                print(f"  Monthly Target: ${goal.get('monthly_target', 0):,.2f}")
+                
+                # Display current financials
+                financials = data.get('current_financials', {})
+                print(f"\n📊 Current Financials (Last 3 Months):")
+                print(f"  Monthly Income: ${financials.get('monthly_income', 0):,.2f}")
+                print(f"  Monthly Expenses: ${financials.get('monthly_expenses', 0):,.2f}")
+                print(f"  Monthly Savings: ${financials.get('monthly_savings', 0):,.2f}")
+                
+                # Display analysis results
+                analysis = data.get('analysis', {})
+                print(f"\n📈 Analysis Results:")
+                print(f"  Can Achieve Goal: {'✅ Yes' if analysis.get('can_achieve_goal', False) else '❌ No'}")
+                print(f"  Shortfall: ${analysis.get('shortfall', 0):,.2f}")
+                print(f"  Suggested Savings: ${analysis.get('total_suggested_savings', 0):,.2f}")
+                print(f"  Remaining Shortfall: ${analysis.get('remaining_shortfall', 0):,.2f}")
+                
+                # Display suggested cuts
+                suggested_cuts = data.get('suggested_cuts', [])
+                if suggested_cuts:
+                    print(f"\n✂️  Suggested Spending Cuts:")
+                    for i, cut in enumerate(suggested_cuts, 1):
+                        priority_text = {1: "High", 2: "Medium", 3: "Low", 4: "Very Low"}.get(cut.get('priority', 4), "Unknown")
+                        print(f"  {i}. {cut.get('category', 'Unknown')} ({priority_text} Priority)")
+                        print(f"     Current: ${cut.get('current_monthly', 0):,.2f}/month")
+                        print(f"     Suggested: ${cut.get('suggested_monthly', 0):,.2f}/month")
+                        print(f"     Reduction: ${cut.get('reduction_amount', 0):,.2f}/month ({cut.get('reduction_percentage', 0):.1f}%)")
+                        print()
+                else:
+                    print(f"\nℹ️  No spending cuts suggested")
+                
+                # Display alternative strategies
+                strategies = data.get('alternative_strategies', [])
+                if strategies:
+                    print(f"\n💡 Alternative Strategies:")
+                    for i, strategy in enumerate(strategies, 1):
+                        print(f"  {i}. {strategy}")
                     print()
-            else:
-                print(f"\nℹ️  No spending cuts suggested")
-            
-            # Display alternative strategies
-            strategies = data.get('alternative_strategies', [])
-            if strategies:
-                print(f"\n💡 Alternative Strategies:")
-                for i, strategy in enumerate(strategies, 1):
-                    print(f"  {i}. {strategy}")
-                print()
-            
-            # Display summary
-            summary = data.get('summary', {})
-            print(f"\n📋 Summary:")
-            print(f"  Categories Analyzed: {summary.get('total_categories_analyzed', 0)}")
-            print(f"  High Priority Cuts: {summary.get('high_priority_cuts', 0)}")
-            print(f"  Total Monthly Reduction: ${summary.get('total_monthly_reduction', 0):,.2f}")
-            print(f"  Achievable with Cuts: {'✅ Yes' if summary.get('achievable_with_cuts', False) else '❌ No'}")
+                
+                # Display summary
+                summary = data.get('summary', {})
+                print(f"\n📋 Summary:")
+                print(f"  Categories Analyzed: {summary.get('total_categories_analyzed', 0)}")
+                print(f"  High Priority Cuts: {summary.get('high_priority_cuts', 0)}")
+                print(f"  Total Monthly Reduction: ${summary.get('total_monthly_reduction', 0):,.2f}")
+                print(f"  Achievable with Cuts: {'✅ Yes' if summary.get('achievable_with_cuts', False) else '❌ No'}")
             
             return True
         else:
@@ -143,6 +155,15 @@ def test_savings_analysis(file_id, target_amount, months):
         print("❌ Could not connect to server")
         return False
 
+def _analyze_goal(file_id, goal):
+    """Run the savings analysis for one entry of test_multiple_goals"""
+    print(f"\n📊 {goal['description']}")
+    success = test_savings_analysis(file_id, goal['amount'], goal['months'])
+    
+    if not success:
+        print(f"❌ Failed to analyze goal: {goal['description']}")
+    return success
+
 def test_multiple_goals(file_id):
     """Test savings analysis with multiple different goals"""
     if not file_id:
@@ -158,20 +179,16 @@ def test_multiple_goals(file_id):
     print(f"\n🎯 Testing Multiple Savings Goals...")
     print("=" * 60)
     
-    results = []
-    for goal in goals:
-        print(f"\n📊 {goal['description']}")
-        success = test_savings_analysis(file_id, goal['amount'], goal['months'])
-        results.append(success)
-        
-        if not success:
-            print(f"❌ Failed to analyze goal: {goal['description']}")
+    # The goals are independent, so analyze them concurrently; each goal's
+    # output is still printed as one block, in the order listed above
+    results = run_tests_concurrently([functools.partial(_analyze_goal, file_id, goal) for goal in goals])
     
+    print(f"\n{'✅' if all(results) else '❌'} {sum(bool(r) for r in results)}/{len(goals)} goals analyzed")
     return all(results)
 
 def test_savings_analyzer_validation():
     """Test API validation and error handling"""
-    url = "http://localhost:8000/savings/analyze"
+    url = BASE_URL + "/savings/analyze"
     
     print(f"\n🧪 Testing API Validation...")
     print("=" * 60)
@@ -185,10 +202,32 @@ def test_savings_analyzer_validation():
         {"data": {"file_id": "test", "target_amount": 0, "months": 12}, "expected_status": 400, "description": "Zero target amount"},
     ]
     
+    # One round trip for all cases; older servers without the batch route
+    # fall back to one request per case
+    try:
+        response = SESSION.post(url + "/validate_batch", data=dumps({"cases": [test_case["data"] for test_case in test_cases]}), headers=JSON_HEADERS)
+    except requests.exceptions.ConnectionError:
+        print("❌ Could not connect to server")
+        return False
+    
+    if response.status_code == 200:
+        results = []
+        for test_case, verdict in zip(test_cases, response.json()["results"]):
+            if verdict["status"] == test_case["expected_status"]:
+                print(f"✅ {test_case['description']}: Correct status {verdict['status']}")
+                results.append(True)
+            else:
+                print(f"❌ {test_case['description']}: Expected {test_case['expected_status']}, got {verdict['status']}")
+                results.append(False)
+        return all(results)
+    elif response.status_code != 404:
+        print(f"❌ Batch validation failed: {response.status_code}")
+        return False
+    
     results = []
     for test_case in test_cases:
         try:
-            response = requests.post(url, json=test_case["data"])
+            response = SESSION.post(url, data=dumps(test_case["data"]), headers=JSON_HEADERS)
             if response.status_code == test_case["expected_status"]:
                 print(f"✅ {test_case['description']}: Correct status {response.status_code}")
                 results.append(True)
@@ -205,13 +244,13 @@ if __name__ == "__main__":
     print("💰 Savings Analyzer Test Suite")
     print("=" * 60)
     print("ℹ️  This tests spending analysis and savings goal recommendations")
-    print("   Make sure the server is running on localhost:8000")
+    print(f"   Make sure the server is running on {BASE_URL}")
     print("=" * 60)
     
     # Show available CSV files
     print(f"📁 Available CSV files:")
     for name, path in CSV_FILES.items():
-        status = "✅" if os.path.exists(path) else "❌"
+        status = "✅" if CSV_STATUS[name] else "❌"
         default_marker = " (DEFAULT)" if name == DEFAULT_CSV else ""
         print(f"  {status} {name}: {path}{default_marker}")
     
@@ -7,6 +7,8 @@ import requests
 import json
 import os
 
+from api_client import BASE_URL, SESSION, cached_file_id, fast_get, loads, remember_file_id, run_concurrently, upload_csv
+
 # Configuration: Change this to switch between different CSV files
 CSV_FILES = {
     "balanced": "./trans_data_internal/sample_transactions_balanced.csv",
@@ -16,14 +18,17 @@ CSV_FILES = {
 # Set the default CSV file to use
 DEFAULT_CSV = "balanced"  # Change this to "original" to use the other file
 
+# Whether each CSV file exists, checked once at import
+CSV_STATUS = {name: os.path.exists(path) for name, path in CSV_FILES.items()}
+
 def test_subscription_model_status():
     """Test the subscription model status"""
-    url = "http://localhost:8000/subscriptions/status"
+    url = BASE_URL + "/subscriptions/status"
     
     try:
-        response = requests.get(url)
+        response = fast_get(url)
         if response.status_code == 200:
-            data = response.json()
+            data = loads(response.content)
             print(f"\n🔍 Subscription Model Status:")
             print(f"✅ Model Loaded: {data['model_loaded']}")
             print(f"📁 Model Path: {data['model_path']}")
@@ -40,12 +45,12 @@ def test_subscription_model_status():
 
 def test_ml_status():
     """Test the overall ML models status"""
-    url = "http://localhost:8000/ml/status"
+    url = BASE_URL + "/ml/status"
     
     try:
-        response = requests.get(url)
+        response = fast_get(url)
         if response.status_code == 200:
-            data = response.json()
+            data = loads(response.content)
             print(f"\n🤖 ML Models Status:")
             
             # Category model status
@@ -82,29 +87,33 @@ def test_upload_for_subscriptions(csv_type=None):
     csv_path = CSV_FILES[csv_type]
     
     # Check if file exists
-    if not os.path.exists(csv_path):
+    if not CSV_STATUS[csv_type]:
         print(f"❌ CSV file not found: {csv_path}")
         return None
     
-    url = "http://localhost:8000/upload-transactions"
+    # Reuse the file from a previous run if the server still has it
+    file_id = cached_file_id(csv_path)
+    if file_id:
+        print(f"♻️  Reusing previous upload of {csv_path}. File ID: {file_id}")
+        return file_id
+    
+    url = BASE_URL + "/upload-transactions"
     
     print(f"📁 Uploading CSV file for subscription testing: {csv_path}")
     
-    with open(csv_path, "rb") as f:
-        files = {"file": (csv_path, f, "text/csv")}
-        
-        try:
-            response = requests.post(url, files=files)
-            if response.status_code == 200:
-                data = response.json()
-                print(f"✅ Upload successful! File ID: {data['file_id']}")
-                return data['file_id']
-            else:
-                print(f"❌ Upload failed: {response.status_code}")
-                return None
-        except requests.exceptions.ConnectionError:
-            print("❌ Could not connect to server")
+    try:
+        response = upload_csv(csv_path, url)
+        if response.status_code == 200:
+            data = response.json()
+            print(f"✅ Upload successful! File ID: {data['file_id']}")
+            remember_file_id(csv_path, data['file_id'])
+            return data['file_id']
+        else:
+            print(f"❌ Upload failed: {response.status_code}")
             return None
+    except requests.exceptions.ConnectionError:
+        print("❌ Could not connect to server")
+        return None
 
 def test_subscription_detection(file_id, threshold=0.5):
     """Test subscription detection for a file"""
@@ -112,10 +121,10 @@ def test_subscription_detection(file_id, threshold=0.5):
         print("❌ No file ID provided for subscription detection test")
         return
         
-    url = f"http://localhost:8000/files/{file_id}/subscriptions"
+    url = f"{BASE_URL}/files/{file_id}/subscriptions"
     
     try:
-        response = requests.get(url, params={"threshold": threshold})
+        response = SESSION.get(url, params={"threshold": threshold})
         if response.status_code == 200:
             data = response.json()
             print(f"\n🔍 Subscription Detection Results:")
@@ -125,21 +134,21 @@ def test_subscription_detection(file_id, threshold=0.5):
             print(f"💰 Total Monthly Cost: ${data.get('total_monthly_cost', 0):.2f}")
             
             if data['subscriptions']:
-                print(f"\n📋 Detected Subscriptions:")
+                # Build the whole listing and print it once rather than line by line
+                lines = [f"\n📋 Detected Subscriptions:"]
                 for i, sub in enumerate(data['subscriptions'], 1):
-                    print(f"  {i}. {sub['merchant']}")
-                    print(f"     Score: {sub['subscription_score']:.3f}")
-                    print(f"     Occurrences: {sub['occurrences']}")
-                    print(f"     Coverage: {sub['coverage_months']} months")
-                    print(f"     Avg Amount: ${sub['average_amount']:.2f}")
-                    print(f"     Monthly Cost: ${sub.get('average_monthly_cost', 0):.2f}")
-                    print(f"     Day Consistency: {sub['day_consistency']:.2f}")
-                    print(f"     Median Gap: {sub['median_gap_days']:.1f} days")
-                    if sub.get('website'):
-                        print(f"     Website: {sub['website']}")
-                    else:
-                        print(f"     Website: Not found")
-                    print()
+                    lines.append(
+                        f"  {i}. {sub['merchant']}\n"
+                        f"     Score: {sub['subscription_score']:.3f}\n"
+                        f"     Occurrences: {sub['occurrences']}\n"
+                        f"     Coverage: {sub['coverage_months']} months\n"
+                        f"     Avg Amount: ${sub['average_amount']:.2f}\n"
+                        f"     Monthly Cost: ${sub.get('average_monthly_cost', 0):.2f}\n"
+                        f"     Day Consistency: {sub['day_consistency']:.2f}\n"
+                        f"     Median Gap: {sub['median_gap_days']:.1f} days\n"
+                        f"     Website: {sub.get('website') or 'Not found'}\n"
+                    )
+                print("\n".join(lines))
             else:
                 print("ℹ️  No subscriptions detected above the threshold")
                 
@@ -157,13 +166,15 @@ def test_different_thresholds(file_id):
         
     print(f"\n🎯 Testing Different Thresholds:")
     thresholds = [0.3, 0.5, 0.7, 0.9]
+    url = f"{BASE_URL}/files/{file_id}/subscriptions"
+    # Thresholds are independent, so query them together and print in order
+    futures = run_concurrently(lambda threshold: fast_get(url, params={"threshold": threshold}), thresholds)
     
-    for threshold in thresholds:
-        url = f"http://localhost:8000/files/{file_id}/subscriptions"
+    for threshold, future in zip(thresholds, futures):
         try:
-            response = requests.get(url, params={"threshold": threshold})
+            response = future.result()
             if response.status_code == 200:
-                data = response.json()
+                data = loads(response.content)
                 total_cost = data.get('total_monthly_cost', 0)
                 print(f"  Threshold {threshold}: {data['total_subscriptions']} subscriptions (${total_cost:.2f}/month)")
             else:
@@ -181,7 +192,7 @@ if __name__ == "__main__":
     # Show available CSV files
     print(f"📁 Available CSV files:")
     for name, path in CSV_FILES.items():
-        status = "✅" if os.path.exists(path) else "❌"
+        status = "✅" if CSV_STATUS[name] else "❌"
         default_marker = " (DEFAULT)" if name == DEFAULT_CSV else ""
         print(f"  {status} {name}: {path}{default_marker}")
     
@@ -207,9 +218,9 @@ if __name__ == "__main__":
         test_different_thresholds(file_id)
     
     print(f"\n🔗 Subscription Endpoints:")
-    print(f"🔍 Subscription status: http://localhost:8000/subscriptions/status")
-    print(f"🤖 ML models status: http://localhost:8000/ml/status")
+    print(f"🔍 Subscription status: {BASE_URL}/subscriptions/status")
+    print(f"🤖 ML models status: {BASE_URL}/ml/status")
     if file_id:
-        print(f"📊 File subscriptions: http://localhost:8000/files/{file_id}/subscriptions")
-        print(f"📊 File subscriptions (threshold=0.3): http://localhost:8000/files/{file_id}/subscriptions?threshold=0.3")
-        print(f"📊 File subscriptions (threshold=0.7): http://localhost:8000/files/{file_id}/subscriptions?threshold=0.7")
+        print(f"📊 File subscriptions: {BASE_URL}/files/{file_id}/subscriptions")
+        print(f"📊 File subscriptions (threshold=0.3): {BASE_URL}/files/{file_id}/subscriptions?threshold=0.3")
+        print(f"📊 File subscriptions (threshold=0.7): {BASE_URL}/files/{file_id}/subscriptions?threshold=0.7")
@@ -3,9 +3,28 @@
 Test script for basic CSV upload functionality
 """
 
-import requests
+import argparse
+import functools
+import hashlib
+import io
 import json
-import os
+
+from api_client import (
+    BASE_URL,
+    SESSION,
+    UPLOAD_URL,
+    csv_exists,
+    loads,
+    run_concurrently,
+    run_tests_concurrently,
+    upload_csv,
+    upload_csvs,
+    warm_up,
+    with_retry,
+)
+
+FILES_URL = BASE_URL + "/files"
+REGISTRY_URL = FILES_URL + "/registry"
 
 # Configuration: Change this to switch between different CSV files
 CSV_FILES = {
@@ -16,150 +35,181 @@ CSV_FILES = {
 # Set the default CSV file to use
 DEFAULT_CSV = "balanced"  # Change this to "original" to use the other file
 
-def test_upload(csv_type=None):
-    """Test the CSV upload endpoint"""
-    if csv_type is None:
-        csv_type = DEFAULT_CSV
-    
-    if csv_type not in CSV_FILES:
-        print(f"❌ Unknown CSV type: {csv_type}. Available: {list(CSV_FILES.keys())}")
-        return None
-    
-    csv_path = CSV_FILES[csv_type]
-    
-    # Check if file exists
-    if not os.path.exists(csv_path):
-        print(f"❌ CSV file not found: {csv_path}")
-        return None
-    
-    url = "http://localhost:8000/upload-transactions"
+@functools.lru_cache(maxsize=None)
+def csv_bytes(csv_path):
+    """Read a test CSV once; the upload, duplicate upload and hash all reuse the bytes"""
+    with open(csv_path, "rb") as f:
+        return f.read()
+
+def file_sha256(csv_path):
+    """SHA-256 of a file's content; matches the server's duplicate-detection hash"""
+    return hashlib.sha256(csv_bytes(csv_path)).hexdigest()
+
+@with_retry
+def test_upload(csv_path):
+    """Test the CSV upload endpoint with an existing CSV file"""
+    url = UPLOAD_URL
     
     print(f"📁 Uploading CSV file: {csv_path}")
     
     # Test with sample file
-    with open(csv_path, "rb") as f:
-        files = {"file": (csv_path, f, "text/csv")}
-        
-        try:
-            response = requests.post(url, files=files)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('is_duplicate'):
-                    print("🔄 Duplicate detected!")
-                    print(f"📁 Existing File ID: {data['file_id']}")
-                    print(f"📅 Original upload: {data['original_upload_time']}")
-                else:
-                    print("✅ Upload successful!")
-                    print(f"📁 File ID: {data['file_id']}")
-                    print(f"📊 Total rows: {data['rows']}")
-                    print(f"📋 Total columns: {data['columns']}")
-                return data['file_id']
-            else:
-                print(f"❌ Upload failed: {response.status_code}")
-                print(response.text)
-                return None
-                
-        except requests.exceptions.ConnectionError:
-            print("❌ Could not connect to server. Make sure it's running on http://localhost:8000")
-            return None
+    # A fresh BytesIO per upload so each one starts at the beginning
+    response = upload_csv(csv_path, url, csv_file=io.BytesIO(csv_bytes(csv_path)))
+    
+    if response.status_code == 200:
+        data = loads(response.content)
+        if data.get('is_duplicate'):
+            print("🔄 Duplicate detected!")
+            print(f"📁 Existing File ID: {data['file_id']}")
+            print(f"📅 Original upload: {data['original_upload_time']}")
+        else:
+            print("✅ Upload successful!")
+            print(f"📁 File ID: {data['file_id']}")
+            print(f"📊 Total rows: {data['rows']}")
+            print(f"📋 Total columns: {data['columns']}")
+        return data['file_id']
+    else:
+        print(f"❌ Upload failed: {response.status_code}")
+        print(response.text)
+        return None
 
-def test_duplicate_upload(csv_type=None):
-    """Test uploading the same file twice to verify duplicate detection"""
-    if csv_type is None:
-        csv_type = DEFAULT_CSV
-    
-    if csv_type not in CSV_FILES:
-        print(f"❌ Unknown CSV type: {csv_type}. Available: {list(CSV_FILES.keys())}")
+@with_retry
+def test_duplicate_upload(csv_path):
+    """Test uploading the same existing CSV file twice to verify duplicate detection"""
+    print("\n🔄 Testing duplicate detection...")
+    url = UPLOAD_URL
+    
+    # Upload the same file again; test_upload has already sent it gzipped,
+    # so send it as a plain .csv this time to cover both upload paths
+    # A fresh BytesIO per upload so each one starts at the beginning
+    response = upload_csv(csv_path, url, compress=False, csv_file=io.BytesIO(csv_bytes(csv_path)))
+    if response.status_code == 200:
+        data = loads(response.content)
+        if data.get('is_duplicate'):
+            print("✅ Duplicate detection working correctly!")
+            print(f"📁 Returned existing file ID: {data['file_id']}")
+        else:
+            print("❌ Re-uploaded file was not detected as a duplicate")
+    else:
+        print(f"❌ Upload failed: {response.status_code}")
+
+@with_retry
+def test_batch_upload():
+    """Upload every available CSV in one batch request"""
+    csv_paths = [path for path in CSV_FILES.values() if csv_exists(path)]
+    if not csv_paths:
+        print("❌ No CSV files found for batch upload")
         return
     
-    csv_path = CSV_FILES[csv_type]
-    
-    # Check if file exists
-    if not os.path.exists(csv_path):
-        print(f"❌ CSV file not found: {csv_path}")
+    print(f"\n📦 Batch uploading {len(csv_paths)} CSV files...")
+    
+    # One multipart request for all files; older servers without the batch
+    # route fall back to one upload per file, sent together
+    response = upload_csvs(csv_paths)
+    if response.status_code == 200:
+        results = loads(response.content)['results']
+    elif response.status_code == 404:
+        futures = run_concurrently(
+            lambda path: upload_csv(path, UPLOAD_URL, csv_file=io.BytesIO(csv_bytes(path))), csv_paths
+        )
+        results = []
+        for future in futures:
+            single = future.result()
+            results.append({"status": single.status_code, **loads(single.content)})
+    else:
+        print(f"❌ Batch upload failed: {response.status_code}")
         return
     
-    print("\n🔄 Testing duplicate detection...")
-    url = "http://localhost:8000/upload-transactions"
-    
-    # Upload the same file twice
-    with open(csv_path, "rb") as f:
-        files = {"file": (csv_path, f, "text/csv")}
-        
-        try:
-            response = requests.post(url, files=files)
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('is_duplicate'):
-                    print("✅ Duplicate detection working correctly!")
-                    print(f"📁 Returned existing file ID: {data['file_id']}")
-                else:
-                    print("⚠️  First upload - this is expected")
-            else:
-                print(f"❌ Upload failed: {response.status_code}")
-        except requests.exceptions.ConnectionError:
-            print("❌ Could not connect to server")
+    for csv_path, result in zip(csv_paths, results):
+        if result['status'] == 200:
+            marker = " (duplicate)" if result.get('is_duplicate') else ""
+            print(f"  ✅ {csv_path} → {result['file_id'][:8]}...{marker}")
+        else:
+            print(f"  ❌ {csv_path}: {result['status']} {result.get('detail', '')}")
 
+@with_retry
 def test_file_list():
     """Test the file listing endpoint"""
-    url = "http://localhost:8000/files"
-    
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            print(f"\n📋 Found {data['total_files']} uploaded files:")
-            for file_info in data['files']:
-                print(f"  - {file_info['filename']} (ID: {file_info['file_id'][:8]}...)")
-        else:
-            print(f"❌ Failed to list files: {response.status_code}")
-    except requests.exceptions.ConnectionError:
-        print("❌ Could not connect to server")
+    url = FILES_URL
+    
+    response = SESSION.get(url)
+    if response.status_code == 200:
+        data = loads(response.content)
+        print(f"\n📋 Found {data['total_files']} uploaded files:")
+        for file_info in data['files']:
+            print(f"  - {file_info['filename']} (ID: {file_info['file_id'][:8]}...)")
+    else:
+        print(f"❌ Failed to list files: {response.status_code}")
 
-def test_hash_registry():
-    """Test the hash registry endpoint"""
-    url = "http://localhost:8000/files/registry"
-    
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            print(f"\n🔍 Hash Registry: {data['total_hashes']} registered hashes")
-        else:
-            print(f"❌ Failed to get hash registry: {response.status_code}")
-    except requests.exceptions.ConnectionError:
-        print("❌ Could not connect to server")
+@with_retry
+def test_hash_registry(csv_path=None):
+    """Test the hash registry endpoint, and the lookup of csv_path's hash if given"""
+    url = REGISTRY_URL
+    
+    response = SESSION.get(url)
+    if response.status_code == 200:
+        data = loads(response.content)
+        print(f"\n🔍 Hash Registry: {data['total_hashes']} registered hashes")
+    else:
+        print(f"❌ Failed to get hash registry: {response.status_code}")
+    
+    if csv_path is None:
+        return
+    
+    # The uploaded file's content hash should resolve to its file ID
+    response = SESSION.get(f"{REGISTRY_URL}/{file_sha256(csv_path)}")
+    if response.status_code == 200:
+        data = loads(response.content)
+        print(f"✅ Hash lookup found {csv_path}: {data['file_id'][:8]}...")
+    else:
+        print(f"❌ Hash lookup for {csv_path} failed: {response.status_code}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test CSV upload and duplicate detection")
+    parser.add_argument("--csv", choices=list(CSV_FILES.keys()), default=DEFAULT_CSV,
+                        help="Which sample CSV file to upload")
+    args = parser.parse_args()
+    
+    # Resolve and check the chosen file once; the tests below take its path
+    csv_path = CSV_FILES[args.csv]
+    
+    warm_up()
+    
     print("🧪 Testing Basic Upload Functionality...")
     print("=" * 50)
     
     # Show available CSV files
     print(f"📁 Available CSV files:")
     for name, path in CSV_FILES.items():
-        status = "✅" if os.path.exists(path) else "❌"
+        status = "✅" if csv_exists(path) else "❌"
         default_marker = " (DEFAULT)" if name == DEFAULT_CSV else ""
         print(f"  {status} {name}: {path}{default_marker}")
     
-    print(f"\n🎯 Using CSV file: {DEFAULT_CSV} ({CSV_FILES[DEFAULT_CSV]})")
-    print("💡 To change the CSV file, modify the DEFAULT_CSV variable at the top of this file")
+    print(f"\n🎯 Using CSV file: {args.csv} ({csv_path})")
+    print("💡 To change the CSV file, pass --csv (or modify DEFAULT_CSV at the top of this file)")
     print("=" * 50)
     
     # Test upload
-    file_id = test_upload()
-    
-    # Test duplicate detection
-    test_duplicate_upload()
+    if csv_exists(csv_path):
+        file_id = test_upload(csv_path)
+        test_duplicate_upload(csv_path)
+    else:
+        print(f"❌ CSV file not found: {csv_path}")
+        file_id = None
     
-    # Test file listing
-    test_file_list()
+    # The uploads above and this batch upload change what's stored, so they
+    # run one after another before anything reads the file list
+    test_batch_upload()
     
-    # Test hash registry
-    test_hash_registry()
+    # File listing and the hash registry only read, so run them together;
+    # each test's output is still printed as one block, in order
+    run_tests_concurrently([
+        test_file_list,
+        functools.partial(test_hash_registry, csv_path) if csv_exists(csv_path) else test_hash_registry,
+    ])
     
     if file_id:
-        print(f"\n🔗 You can view the API docs at: http://localhost:8000/docs")
-        print(f"📁 File details: http://localhost:8000/files/{file_id}")
-        print(f"⬇️  Download file: http://localhost:8000/files/{file_id}/download")
-        print(f"🔍 Hash registry: http://localhost:8000/files/registry")
\ No newline at end of file
+        print(f"\n🔗 You can view the API docs at: {BASE_URL}/docs")
+        print(f"📁 File details: {FILES_URL}/{file_id}")
+        print(f"⬇️  Download file: {FILES_URL}/{file_id}/download")
+        print(f"🔍 Hash registry: {REGISTRY_URL}")
@@ -1,8 +1,10 @@
-import pandas as pd
-import random
+import csv
 import re
 
-random.seed(42)
+import numpy as np
+
+# All random draws come from one generator, a whole batch at a time
+rng = np.random.default_rng(42)
 
 categories = [
     "Restaurants",
@@ -127,24 +129,55 @@ suffixes = [
     "", "", "", " #{num}", " - {city}", " *{num}", " /ONLINE", " STORE {num}", " {city}"
 ]
 
-def synthesize(desc):
-    num = random.randint(1000, 9999)
-    city = random.choice(cities)
-    pre = random.choice(prefixes).format(num=num)
-    suf = random.choice(suffixes).format(num=num, city=city)
-    return f"{pre}{desc}{suf}".strip()
+def synthesize(descs):
+    """Dress up a batch of merchant names with random POS prefixes, numbers and cities"""
+    n = len(descs)
+    nums = rng.integers(1000, 10000, size=n).tolist()
+    city_ix = rng.integers(0, len(cities), size=n).tolist()
+    pre_ix = rng.integers(0, len(prefixes), size=n).tolist()
+    suf_ix = rng.integers(0, len(suffixes), size=n).tolist()
+    return [
+        f"{prefixes[p].format(num=num)}{desc}{suffixes[s].format(num=num, city=cities[c])}".strip()
+        for desc, num, c, p, s in zip(descs, nums, city_ix, pre_ix, suf_ix)
+    ]
 
-rows = []
-per_cat = 10000  # ~24 examples per category -> 24 * 15 = 360 rows
+# All seeds in one flat list; each category owns the slice
+# flat_seeds[seed_start[i] : seed_start[i] + seed_count[i]]
+flat_seeds = []
+seed_start = []
+seed_count = []
 for cat in categories:
-    options = seeds[cat]
-    for _ in range(per_cat):
-        desc = synthesize(random.choice(options))
-        rows.append({"description": desc, "category": cat})
+    seed_start.append(len(flat_seeds))
+    seed_count.append(len(seeds[cat]))
+    flat_seeds.extend(seeds[cat])
+
+per_cat = 10000  # ~24 examples per category -> 24 * 15 = 360 rows
+# Every row's seed is drawn in one batch: its category's offset plus an index within it
+row_cat = np.repeat(np.arange(len(categories)), per_cat)
+picks = np.asarray(seed_start)[row_cat] + rng.integers(0, np.asarray(seed_count)[row_cat])
+
+descriptions = synthesize([flat_seeds[i] for i in picks.tolist()])
+row_categories = [categories[i] for i in row_cat.tolist()]
 
-df = pd.DataFrame(rows)
 # Shuffle rows
-df = df.sample(frac=1.0, random_state=42).reset_index(drop=True)
+order = rng.permutation(len(descriptions)).tolist()
+descriptions = [descriptions[i] for i in order]
+row_categories = [row_categories[i] for i in order]
 
 csv_path = "./training_data/category_training_data.csv"
-df.to_csv(csv_path, index=False)
+with open(csv_path, "w", newline="") as f:
+    writer = csv.writer(f, lineterminator="\n")
+    writer.writerow(["description", "category"])
+    writer.writerows(zip(descriptions, row_categories))
+
+# Also write Parquet when pyarrow is installed; the trainer prefers it, as it
+# loads much faster and dictionary-encodes the repetitive columns
+parquet_path = "./training_data/category_training_data.parquet"
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pass
+else:
+    table = pa.table({"description": descriptions, "category": row_categories})
+    pq.write_table(table, parquet_path, compression="zstd")
@@ -1,18 +1,22 @@
 import csv, random, math
+from functools import lru_cache
 from datetime import datetime, timedelta, date
 from pathlib import Path
 from collections import defaultdict
 
+import numpy as np
+
 # ----------------------------
 # Config
 # ----------------------------
 RANDOM_SEED = 42
 NUM_MONTHS_PAD = 7  # ~6 months window; we’ll compute from dates below
-END_DATE = datetime.today().date()s
+END_DATE = datetime.today().date()
 START_DATE = END_DATE - timedelta(days=365)  # ~6+ months
 OUT_PATH = Path("./trans_data_internal/sample_transactions_balanced_2.csv")
 
 random.seed(RANDOM_SEED)
+rng = np.random.default_rng(RANDOM_SEED)
 
 CATEGORIES = [
     "Groceries","Restaurants","Rent","Utilities","Entertainment",
@@ -60,6 +64,35 @@ MISC_RANGE = (5, 120)
 # Discretionary target as % of income after fixed (will sample this per month)
 DISC_PCT_RANGE = (0.75, 0.90)    # spend 75–90% of income (leaves 10–25% net savings)
 
+# Discretionary purchase mix per category: (probability, amount range, merchants)
+DISC_MIX = {
+    "Groceries": [(1.0, GROCERY_RANGE, MERCHANTS["Groceries"])],
+    "Restaurants": [(1.0, RESTAURANT_RANGE, MERCHANTS["Restaurants"])],
+    "Transportation": [
+        (0.45, GAS_RANGE, ["Shell Gas","Chevron","Exxon"]),
+        (0.55, RIDE_RANGE, ["Uber","Lyft"]),
+    ],
+    "Shopping": [
+        (0.07, SHOP_BIG, ["Amazon","Target","Best Buy","Ikea","Home Depot"]),  # occasional bigger cart
+        (0.93, SHOP_SMALL, MERCHANTS["Shopping"]),
+    ],
+    "Healthcare": [(1.0, HEALTHCARE_RANGE, MERCHANTS["Healthcare"])],
+    "Misc": [(1.0, MISC_RANGE, MERCHANTS["Misc"])],
+}
+
+# Share of each month's discretionary target per category
+DISC_WEIGHTS = {
+    "Groceries": 0.32,
+    "Restaurants": 0.22,
+    "Transportation": 0.14,
+    "Shopping": 0.16,
+    "Healthcare": 0.06,  # additional discretionary (OTC, copays)
+    "Misc": 0.10,
+}
+# normalize (just in case)
+_wsum = sum(DISC_WEIGHTS.values())
+DISC_WEIGHTS = {k: v / _wsum for k, v in DISC_WEIGHTS.items()}
+
 # ----------------------------
 # Helpers
 # ----------------------------
@@ -70,38 +103,35 @@ def month_iter(start_d: date, end_d: date):
         # jump to next month 1st
         cur = (cur.replace(day=28) + timedelta(days=4)).replace(day=1)
 
+@lru_cache(maxsize=None)
 def days_in_month(d: date) -> int:
     nxt = (d.replace(day=28) + timedelta(days=4)).replace(day=1)
     return (nxt - d).days
 
+@lru_cache(maxsize=512)
 def clamp_dom(year: int, month: int, dom: int) -> date:
     return date(year, month, min(dom, days_in_month(date(year, month, 1))))
 
+def shift_weekends(days: np.ndarray) -> np.ndarray:
+    """Move any Saturday/Sunday in a datetime64[D] array to the following Monday."""
+    dow = (days.view("i8") - 4) % 7  # 1970-01-01 was a Thursday; Monday = 0
+    return days + np.where(dow >= 5, 7 - dow, 0).astype("timedelta64[D]")
+
 def pick_pay_schedule(start_m: date, end_m: date):
     """Return list of paycheck dates within [start_m, end_m] across months.
        Either semi-monthly (1st/15th) or biweekly, but guarantee a paycheck within 7 days of START_DATE.
     """
     mode = random.choice(["semi-monthly","biweekly"])
-    dates = []
-    months = list(month_iter(start_m, end_m))
     if mode == "semi-monthly":
-        for m0 in months:
-            for dom in (1, 15):
-                d = clamp_dom(m0.year, m0.month, dom)
-                # shift weekends to next Monday
-                if d.weekday() >= 5:
-                    d = d + timedelta(days=(7 - d.weekday()))
-                dates.append(d)
+        firsts = np.array(list(month_iter(start_m, end_m)), dtype="datetime64[D]")
+        pay = (firsts[:, None] + np.array([0, 14], dtype="timedelta64[D]")).ravel()
     else:
-        # start biweekly no later than 7 days after START_DATE
-        first = START_DATE + timedelta(days=random.randint(0, 7))
-        pay = first
-        while pay <= end_m:
-            # shift weekends to Monday
-            if pay.weekday() >= 5:
-                pay = pay + timedelta(days=(7 - pay.weekday()))
-            dates.append(pay)
-            pay = pay + timedelta(days=14)
+        # start biweekly no later than 7 days after START_DATE; a weekend start
+        # moves to Monday and the rest follow it every 14 days
+        first = shift_weekends(np.array([START_DATE + timedelta(days=random.randint(0, 7))], dtype="datetime64[D]"))[0]
+        count = max(0, int((np.datetime64(end_m, "D") - first).astype(int)) // 14 + 1)
+        pay = first + np.arange(count) * np.timedelta64(14, "D")
+    dates = shift_weekends(pay).astype(object).tolist()
 
     # guarantee first income in first 7 days
     if all((abs((d - START_DATE).days) > 7 or d < START_DATE) for d in dates):
@@ -112,21 +142,60 @@ def pick_pay_schedule(start_m: date, end_m: date):
 
     return sorted(d for d in dates if START_DATE <= d <= END_DATE)
 
-def add_tx(rows, d: date, desc: str, cat: str, amt: float, acct: str="Checking"):
-    rows.append({
-        "date": d.strftime("%Y-%m-%d"),
-        "description": desc,
-        "category": cat,
-        "amount": round(amt, 2),
-        "account": acct
-    })
-
-def rand_amount(lo, hi): return -round(random.uniform(lo, hi), 2)
+@lru_cache(maxsize=None)
+def fmt_date(d: date) -> str:
+    # the same few hundred days come up again and again
+    return d.strftime("%Y-%m-%d")
+
+def add_tx(d: date, desc: str, cat: str, amt: float, acct: str="Checking"):
+    dates.append(fmt_date(d))
+    yms.append((d.year, d.month))
+    descs.append(desc)
+    cats.append(cat)
+    amts.append(round(amt, 2))
+    accts.append(acct)
+
+def draw_purchases(mix, bucket: float):
+    """Draw purchases from a DISC_MIX entry until they cover bucket.
+
+    Returns (component index, amount) arrays. Every amount stays inside its
+    component's range; the last purchase is trimmed toward the remaining gap,
+    so the total lands on bucket or just past it.
+    """
+    probs = [p for p, _, _ in mix]
+    los = np.array([r[0] for _, r, _ in mix])
+    his = np.array([r[1] for _, r, _ in mix])
+    mean = float(np.dot(probs, (los + his) / 2))
+
+    # estimate how many purchases fill the bucket and draw them all at once;
+    # top up with further batches in the rarer case they fall short
+    comp = np.empty(0, dtype=np.int64)
+    spend = np.empty(0)
+    n = max(1, round(bucket / mean))
+    while spend.sum() < bucket:
+        more = rng.choice(len(mix), size=n, p=probs)
+        comp = np.concatenate([comp, more])
+        spend = np.concatenate([spend, rng.uniform(los[more], his[more])])
+        n = max(1, round((bucket - spend.sum()) / mean) + 1)
+
+    # keep purchases up to the one that crosses the bucket, and shrink that
+    # one to the remaining gap without going below its range
+    k = int(np.searchsorted(np.cumsum(spend), bucket)) + 1
+    comp, spend = comp[:k], spend[:k]
+    gap = bucket - spend[:-1].sum()
+    spend[-1] = min(spend[-1], max(gap, los[comp[-1]]))
+    return comp, spend
 
 # ----------------------------
 # Build per-month plan
 # ----------------------------
-rows = []
+MONTHS = list(month_iter(START_DATE, END_DATE))
+DIM = {m0: days_in_month(m0) for m0 in MONTHS}
+
+# Transactions are kept as parallel columns, one list per CSV field, plus
+# each row's (year, month) so the monthly tallies don't re-parse dates
+dates, descs, cats, amts, accts = [], [], [], [], []
+yms = []
 
 # Income plan: per-month net income -> split across paychecks
 pay_dates = pick_pay_schedule(START_DATE, END_DATE)
@@ -137,10 +206,10 @@ for d in pay_dates:
 
 # For each month in window, sample a net income target and split over pay dates
 monthly_targets = {}  # (year,month) -> income_total
-for m0 in month_iter(START_DATE, END_DATE):
+for m0 in MONTHS:
     ym = (m0.year, m0.month)
     # Partial first/last months: scale income proportionally to days covered
-    month_days = days_in_month(m0)
+    month_days = DIM[m0]
     covered_start = max(m0, START_DATE)
     covered_end = min((m0.replace(day=month_days)), END_DATE)
     covered_days = (covered_end - covered_start).days + 1
@@ -149,18 +218,18 @@ for m0 in month_iter(START_DATE, END_DATE):
     monthly_targets[ym] = base_income
 
 # Emit paychecks (split the month target across paydates proportionally)
-for ym, dates in pay_by_month.items():
+for ym, pay_days in pay_by_month.items():
     total = monthly_targets.get(ym, 0.0)
-    if total <= 0 or not dates:
+    if total <= 0 or not pay_days:
         continue
     # split roughly evenly with small noise
     parts = []
     remain = total
-    for i, d in enumerate(dates):
-        if i == len(dates) - 1:
+    for i, d in enumerate(pay_days):
+        if i == len(pay_days) - 1:
             parts.append(remain)
         else:
-            piece = total / len(dates) * random.uniform(0.9, 1.1)
+            piece = total / len(pay_days) * random.uniform(0.9, 1.1)
             parts.append(piece)
             remain -= piece
     # ensure positive
@@ -168,30 +237,30 @@ for ym, dates in pay_by_month.items():
     scale = total / sum(parts)
     parts = [p * scale for p in parts]
 
-    for d, amt in zip(dates, parts):
-        add_tx(rows, d, random.choice(MERCHANTS["Salary"]), "Salary", +abs(amt))
+    for d, amt in zip(pay_days, parts):
+        add_tx(d, random.choice(MERCHANTS["Salary"]), "Salary", +abs(amt))
 
 # Fixed monthly: Rent + Utilities + Subscriptions
-for m0 in month_iter(START_DATE, END_DATE):
+for m0 in MONTHS:
     ym = (m0.year, m0.month)
 
     # Rent on 1st–5th
     rent_dom = random.randint(1, 5)
     rent_date = clamp_dom(m0.year, m0.month, rent_dom)
-    add_tx(rows, rent_date, random.choice(MERCHANTS["Rent"]), "Rent", -random.uniform(*RENT_RANGE))
+    add_tx(rent_date, random.choice(MERCHANTS["Rent"]), "Rent", -random.uniform(*RENT_RANGE))
 
     # Utilities
     for bill in UTILITY_BILLS:
         dom = max(1, min(28, bill["dom"] + random.randint(-2, 2)))
         bill_date = clamp_dom(m0.year, m0.month, dom)
         lo, hi = bill["rng"]
-        add_tx(rows, bill_date, bill["merchant"], "Utilities", -random.uniform(lo, hi))
+        add_tx(bill_date, bill["merchant"], "Utilities", -random.uniform(lo, hi))
 
     # Subscriptions
     for sub in SUBSCRIPTIONS:
         dom = max(1, min(28, sub["dom"] + random.randint(-sub["jitter"], sub["jitter"])))
         sub_date = clamp_dom(m0.year, m0.month, dom)
-        add_tx(rows, sub_date, sub["merchant"], sub["category"], sub["amount"])
+        add_tx(sub_date, sub["merchant"], sub["category"], sub["amount"])
 
 # Discretionary budget per month = income * pct - fixed_costs
 # First, compute fixed spend per month
@@ -199,17 +268,16 @@ def month_key(d: date): return (d.year, d.month)
 
 income_by_m = defaultdict(float)
 spend_fixed_by_m = defaultdict(float)
-for r in rows:
-    ym = tuple(map(int, r["date"].split("-")[:2]))
-    if r["category"] == "Salary":
-        income_by_m[ym] += r["amount"]
-    elif r["category"] in ("Rent","Utilities","Entertainment","Healthcare"):
+for ym, cat, amt in zip(yms, cats, amts):
+    if cat == "Salary":
+        income_by_m[ym] += amt
+    elif cat in ("Rent","Utilities","Entertainment","Healthcare"):
         # subscriptions are under Entertainment/Healthcare; treat as fixed-ish
-        if r["amount"] < 0:
-            spend_fixed_by_m[ym] += -r["amount"]
+        if amt < 0:
+            spend_fixed_by_m[ym] += -amt
 
 # Now generate discretionary transactions to hit target share without exceeding income
-for m0 in month_iter(START_DATE, END_DATE):
+for m0 in MONTHS:
     ym = (m0.year, m0.month)
     income = income_by_m.get(ym, 0.0)
     if income <= 0:
@@ -219,70 +287,47 @@ for m0 in month_iter(START_DATE, END_DATE):
     fixed = spend_fixed_by_m.get(ym, 0.0)
     target_disc = max(0.0, income * disc_pct - fixed)
 
-    # allocate across categories (weights)
-    weights = {
-        "Groceries": 0.32,
-        "Restaurants": 0.22,
-        "Transportation": 0.14,
-        "Shopping": 0.16,
-        "Healthcare": 0.06,  # additional discretionary (OTC, copays)
-        "Misc": 0.10,
-    }
-    # normalize (just in case)
-    wsum = sum(weights.values())
-    weights = {k: v / wsum for k, v in weights.items()}
-
-    # produce transactions until hitting each category bucket
-    days_in_m = days_in_month(m0)
+    # spread each category bucket over purchases in the covered days
+    days_in_m = DIM[m0]
     start_day = max(m0, START_DATE)
     end_day = min(m0.replace(day=days_in_m), END_DATE)
     span_days = (end_day - start_day).days + 1
 
-    for cat, pct in weights.items():
+    for cat, pct in DISC_WEIGHTS.items():
         bucket = target_disc * pct
-        spent = 0.0
-        tries = 0
-        # keep sampling small realistic purchases until we roughly hit the bucket
-        while spent < bucket * random.uniform(0.90, 1.05) and tries < 200:
-            tries += 1
-            # pick a random day in the covered part of this month
-            day = start_day + timedelta(days=random.randint(0, max(0, span_days - 1)))
-            if cat == "Groceries":
-                amt = rand_amount(*GROCERY_RANGE)
-                merchant = random.choice(MERCHANTS["Groceries"])
-            elif cat == "Restaurants":
-                amt = rand_amount(*RESTAURANT_RANGE)
-                merchant = random.choice(MERCHANTS["Restaurants"])
-            elif cat == "Transportation":
-                if random.random() < 0.45:
-                    amt = rand_amount(*GAS_RANGE); merchant = random.choice(["Shell Gas","Chevron","Exxon"])
-                else:
-                    amt = rand_amount(*RIDE_RANGE); merchant = random.choice(["Uber","Lyft"])
-            elif cat == "Shopping":
-                if random.random() < 0.07:  # occasional bigger cart
-                    amt = rand_amount(*SHOP_BIG); merchant = random.choice(["Amazon","Target","Best Buy","Ikea","Home Depot"])
-                else:
-                    amt = rand_amount(*SHOP_SMALL); merchant = random.choice(MERCHANTS["Shopping"])
-            elif cat == "Healthcare":
-                amt = rand_amount(*HEALTHCARE_RANGE); merchant = random.choice(MERCHANTS["Healthcare"])
-            else:
-                amt = rand_amount(*MISC_RANGE); merchant = random.choice(MERCHANTS["Misc"])
-
-            add_tx(rows, day, merchant, cat, amt)
-            spent += -amt  # amt is negative
-        # done category
-
-# Shuffle and write
-random.shuffle(rows)
-
+        if bucket <= 0:
+            continue
+        mix = DISC_MIX[cat]
+        comp, spend = draw_purchases(mix, bucket)
+        n = len(spend)
+        merch_ix = rng.integers(0, np.array([len(m) for _, _, m in mix])[comp])
+        days = rng.integers(0, span_days, n)
+
+        dates.extend(fmt_date(start_day + timedelta(days=int(k))) for k in days)
+        yms.extend([ym] * n)
+        descs.extend(mix[c][2][k] for c, k in zip(comp, merch_ix))
+        cats.extend([cat] * n)
+        amts.extend(np.round(-spend, 2).tolist())
+        accts.extend(["Checking"] * n)
+
+# Shuffle and write: rows are streamed out in a random order of indices
+# rather than collected into a list and shuffled in place
+order = rng.permutation(len(dates)).tolist()
+
+FIELDNAMES = ["date","description","category","amount","account"]
 with OUT_PATH.open("w", newline="") as f:
-    writer = csv.DictWriter(f, fieldnames=["date","description","category","amount","account"])
-    writer.writeheader()
-    writer.writerows(rows)
-
-# Quick sanity print
-total_income = sum(r["amount"] for r in rows if r["category"]=="Salary")
-total_spend  = -sum(r["amount"] for r in rows if r["amount"]<0)
+    writer = csv.writer(f)
+    writer.writerow(FIELDNAMES)
+    writer.writerows((dates[i], descs[i], cats[i], amts[i], accts[i]) for i in order)
+
+# Quick sanity print (one pass over the rows)
+total_income = 0.0
+total_spend = 0.0
+for cat, amt in zip(cats, amts):
+    if cat == "Salary":
+        total_income += amt
+    if amt < 0:
+        total_spend -= amt
 net = total_income - total_spend
-print(f"✅ Wrote {len(rows)} rows → {OUT_PATH.resolve()}")
+print(f"✅ Wrote {len(dates)} rows → {OUT_PATH.resolve()}")
 print(f"   Income: ${total_income:,.2f}  Spend: ${total_spend:,.2f}  Net: ${net:,.2f}")
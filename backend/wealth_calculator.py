@@ -1,13 +1,26 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from typing import Dict, Literal, Optional, Sequence, Union
 import math
+import numpy as np
 import pandas as pd
 from datetime import date
 from calendar import monthrange
 
+# Numba is optional: with it the month-by-month fallback is compiled (and
+# cached on disk); without it the same function runs as plain Python.
+try:
+    from numba import njit
+
+    _njit = njit(cache=True)
+except ImportError:
+    def _njit(func):
+        return func
+
+@lru_cache(maxsize=128)
 def _monthly_rate(apr_pct: float) -> float:
-    """Convert annual percent rate to effective monthly rate."""
+    """Convert annual percent rate to effective monthly rate (cached; the same few APRs recur)."""
     return (1.0 + apr_pct / 100.0) ** (1.0 / 12.0) - 1.0
 
 @dataclass
@@ -62,13 +75,22 @@ class MonthlyFlows:
     pay_car: float = 0.0
     pay_other_debt: float = 0.0
 
+# Buckets with a growth or interest rate, in the order _simulate_core takes them
+GROWTH_BUCKETS = [
+    "real_estate", "savings_hysa", "retirement_invest", "cars_value", "other_assets",
+    "real_estate_loans", "credit_card_debt", "personal_loans", "student_loans", "car_loans", "other_debt",
+]
+ASSET_COLUMNS = ["real_estate", "checking", "savings_hysa", "retirement_invest", "cars_value", "other_assets"]
+LIABILITY_COLUMNS = ["real_estate_loans", "credit_card_debt", "personal_loans", "student_loans", "car_loans", "other_debt"]
+
 def simulate_future_wealth(
     start: WealthInputs,
     months: int = 60,
     assumptions: Assumptions = Assumptions(),
     flows: MonthlyFlows = MonthlyFlows(),
     start_year_month: Optional[tuple[int, int]] = None,  # (YYYY, MM)
-) -> pd.DataFrame:
+    output: Literal["full", "summary", "array"] = "full",
+) -> Union[pd.DataFrame, Dict[str, np.ndarray], np.ndarray]:
     """
     Project assets, liabilities, and net worth by month.
 
@@ -89,129 +111,385 @@ def simulate_future_wealth(
         Monthly contributions and payments.
     start_year_month : (YYYY, MM) optional
         If provided, the first row will use this calendar month; otherwise uses current month.
+    output : "full", "summary" or "array"
+        How much to return; the smaller forms skip building the per-bucket table.
 
     Returns
     -------
-    pd.DataFrame with columns:
+    "full" (default): pd.DataFrame with columns:
         month, assets_total, liabilities_total, net_worth,
         real_estate, checking, savings_hysa, retirement_invest, cars_value, other_assets,
         real_estate_loans, credit_card_debt, personal_loans, student_loans, car_loans, other_debt
+    "summary": dict of arrays for month, assets_total, liabilities_total, net_worth
+    "array": np.ndarray of monthly net worth
     """
-    # Copy balances
-    re_val   = float(start.real_estate)
-    chk      = float(start.checking)
-    hysa     = float(start.savings_hysa)
-    invest   = float(start.retirement_invest)
-    cars     = float(start.cars_value)
-    other_a  = float(start.other_assets)
-
-    mort     = float(start.real_estate_loans)
-    cc       = float(start.credit_card_debt)
-    pers     = float(start.personal_loans)
-    stud     = float(start.student_loans)
-    carl     = float(start.car_loans)
-    other_d  = float(start.other_debt)
-
-    # Monthly rates
-    r_re     = _monthly_rate(assumptions.real_estate_apr)
-    r_hysa   = _monthly_rate(assumptions.hysa_apr)
-    r_inv    = _monthly_rate(assumptions.retirement_apr)
-    r_cars   = _monthly_rate(assumptions.cars_apr)
-    r_othera = _monthly_rate(assumptions.other_assets_apr)
-
-    r_mort   = _monthly_rate(assumptions.mortgage_apr)
-    r_cc     = _monthly_rate(assumptions.cc_apr)
-    r_pers   = _monthly_rate(assumptions.personal_apr)
-    r_stud   = _monthly_rate(assumptions.student_apr)
-    r_carl   = _monthly_rate(assumptions.car_apr)
-    r_otherd = _monthly_rate(assumptions.other_debt_apr)
-
-    # Calendar start
+    if output not in ("full", "summary", "array"):
+        raise ValueError(f"Unknown output {output!r}; expected 'full', 'summary' or 'array'")
+
+    rates = _rates(assumptions)
+    y, m = _start_month(start_year_month)
+
+    if _closed_form_applies(start, rates, flows):
+        columns = _simulate_closed_form(start, months, rates, flows)
+    else:
+        columns = _simulate_month_by_month(start, months, rates, flows)
+
+    if output == "full":
+        return _to_frame(columns, y, m)
+    return _reduce(columns, y, m, output)
+
+
+def simulate_future_wealth_batch(
+    starts: Sequence[WealthInputs],
+    months: int = 60,
+    assumptions: Union[Assumptions, Sequence[Assumptions]] = Assumptions(),
+    flows: Union[MonthlyFlows, Sequence[MonthlyFlows]] = MonthlyFlows(),
+    start_year_month: Optional[tuple[int, int]] = None,  # (YYYY, MM)
+    output: Literal["summary", "array"] = "array",
+    dtype: np.dtype = np.float64,
+) -> Union[Dict[str, np.ndarray], np.ndarray]:
+    """
+    Project K scenarios at once, e.g. for what-if sliders or sensitivity sweeps.
+
+    Same model as simulate_future_wealth. A single Assumptions or MonthlyFlows
+    is shared by every scenario; a sequence gives one per scenario. Balances are
+    held as (K, months + 1) arrays, so the closed form runs once for the whole
+    batch; scenarios it doesn't cover are stepped month by month on their own.
+
+    The projection is always computed in float64. dtype=np.float32 halves the
+    size of the returned arrays for large sweeps that only chart or compare
+    them; float32 can't hold cents on six-figure balances, so keep the default
+    wherever amounts are shown as money.
+
+    Returns
+    -------
+    "array" (default): np.ndarray of monthly net worth, shape (K, months + 1)
+    "summary": dict with month labels and assets_total, liabilities_total and
+        net_worth arrays of shape (K, months + 1)
+    """
+    if output not in ("summary", "array"):
+        raise ValueError(f"Unknown output {output!r}; expected 'summary' or 'array'")
+
+    k = len(starts)
+    if isinstance(assumptions, Assumptions):
+        assumptions = [assumptions] * k
+    if isinstance(flows, MonthlyFlows):
+        flows = [flows] * k
+    if not (len(assumptions) == len(flows) == k):
+        raise ValueError("assumptions and flows must be single values or one per scenario")
+
+    rates = [_rates(a) for a in assumptions]
+    y, m = _start_month(start_year_month)
+
+    def stack(cls, items):
+        # One (K, 1) column per field, broadcasting against the month axis
+        return cls(**{f.name: np.array([getattr(item, f.name) for item in items], dtype=np.float64)[:, None]
+                      for f in fields(cls)})
+
+    # The closed form only sees the scenarios it covers; the rest (e.g. a -100%
+    # APR, whose growth factors it would divide by) are stepped on their own
+    applies = np.array([_closed_form_applies(*case) for case in zip(starts, rates, flows)], dtype=bool)
+    closed_rows = np.flatnonzero(applies)
+    closed = _simulate_closed_form(
+        stack(WealthInputs, [starts[i] for i in closed_rows]),
+        months,
+        {bucket: np.array([rates[i][bucket] for i in closed_rows], dtype=np.float64)[:, None]
+         for bucket in GROWTH_BUCKETS},
+        stack(MonthlyFlows, [flows[i] for i in closed_rows]),
+    )
+    columns = {name: np.empty((k, months + 1)) for name in closed}
+    for name, col in closed.items():
+        columns[name][closed_rows] = col
+    for i in np.flatnonzero(~applies):
+        for name, col in _simulate_month_by_month(starts[i], months, rates[i], flows[i]).items():
+            columns[name][i] = col
+
+    result = _reduce(columns, y, m, output)
+    if output == "array":
+        return result.astype(dtype, copy=False)
+    return {key: col if key == "month" else col.astype(dtype, copy=False) for key, col in result.items()}
+
+
+def _rates(assumptions: Assumptions) -> Dict[str, float]:
+    """Monthly rate per growth bucket."""
+    return {
+        "real_estate": _monthly_rate(assumptions.real_estate_apr),
+        "savings_hysa": _monthly_rate(assumptions.hysa_apr),
+        "retirement_invest": _monthly_rate(assumptions.retirement_apr),
+        "cars_value": _monthly_rate(assumptions.cars_apr),
+        "other_assets": _monthly_rate(assumptions.other_assets_apr),
+
+        "real_estate_loans": _monthly_rate(assumptions.mortgage_apr),
+        "credit_card_debt": _monthly_rate(assumptions.cc_apr),
+        "personal_loans": _monthly_rate(assumptions.personal_apr),
+        "student_loans": _monthly_rate(assumptions.student_apr),
+        "car_loans": _monthly_rate(assumptions.car_apr),
+        "other_debt": _monthly_rate(assumptions.other_debt_apr),
+    }
+
+
+def _start_month(start_year_month: Optional[tuple[int, int]]) -> tuple[int, int]:
+    """Calendar (year, month) of the first row; defaults to the current month."""
     if start_year_month is None:
         from datetime import datetime
-        y, m = datetime.today().year, datetime.today().month
-    else:
-        y, m = start_year_month
-
-    rows: List[Dict] = []
-
-    def record_row(year: int, month: int):
-        assets_total = re_val + chk + hysa + invest + cars + other_a
-        liabilities_total = mort + cc + pers + stud + carl + other_d
-        rows.append({
-            "month": f"{year:04d}-{month:02d}",
-            "assets_total": round(assets_total, 2),
-            "liabilities_total": round(liabilities_total, 2),
-            "net_worth": round(assets_total - liabilities_total, 2),
-
-            "real_estate": round(re_val, 2),
-            "checking": round(chk, 2),
-            "savings_hysa": round(hysa, 2),
-            "retirement_invest": round(invest, 2),
-            "cars_value": round(cars, 2),
-            "other_assets": round(other_a, 2),
-
-            "real_estate_loans": round(mort, 2),
-            "credit_card_debt": round(cc, 2),
-            "personal_loans": round(pers, 2),
-            "student_loans": round(stud, 2),
-            "car_loans": round(carl, 2),
-            "other_debt": round(other_d, 2),
-        })
-
-    # Record starting month (month 0)
-    record_row(y, m)
-
-    # Iterate months
-    for _ in range(months):
-        # Advance month
-        m += 1
-        if m > 12:
-            y += 1
-            m = 1
-
-        # ---- Contributions (before growth) ----
-        chk += flows.contrib_checking
-        hysa += flows.contrib_hysa
-        invest += flows.contrib_retirement
-
-        # Optional auto-move from checking to investments
-        move_amt = min(flows.move_checking_to_invest, max(0.0, chk))
-        chk -= move_amt
-        invest += move_amt
-
-        # ---- Asset growth / depreciation ----
-        re_val *= (1.0 + r_re)
-        hysa   *= (1.0 + r_hysa)
-        invest *= (1.0 + r_inv)
-        cars   *= (1.0 + r_cars)     # r_cars is negative for depreciation
-        other_a*= (1.0 + r_othera)
-
-        # Prevent tiny negative due to rounding
-        cars = max(0.0, cars)
-
-        # ---- Debt interest accrual ----
-        mort *= (1.0 + r_mort)
-        cc   *= (1.0 + r_cc)
-        pers *= (1.0 + r_pers)
-        stud *= (1.0 + r_stud)
-        carl *= (1.0 + r_carl)
-        other_d *= (1.0 + r_otherd)
-
-        # ---- Payments (cap at outstanding) ----
-        def pay(balance: float, payment: float) -> float:
-            if balance <= 0.0 or payment <= 0.0:
-                return balance
-            return max(0.0, balance - payment)
-
-        mort = pay(mort, flows.pay_mortgage)
-        cc   = pay(cc, flows.pay_cc)
-        pers = pay(pers, flows.pay_personal)
-        stud = pay(stud, flows.pay_student)
-        carl = pay(carl, flows.pay_car)
-        other_d = pay(other_d, flows.pay_other_debt)
+        return datetime.today().year, datetime.today().month
+    return start_year_month
+
+
+def _closed_form_applies(start: WealthInputs, rates: Dict[str, float], flows: MonthlyFlows) -> bool:
+    """
+    Whether _simulate_closed_form reproduces the month-by-month recurrence.
+
+    It needs every balance to shrink by less than 100% a month (growth factors
+    are divided by) and a checking account that never goes negative, which holds
+    for non-negative starting checking, contributions and auto-invest amounts.
+    """
+    return (
+        all(r > -1.0 for r in rates.values())
+        and start.checking >= 0.0
+        and flows.contrib_checking >= 0.0
+        and flows.move_checking_to_invest >= 0.0
+    )
+
+
+def _simulate_closed_form(
+    start: WealthInputs,
+    months: int,
+    rates: Dict[str, float],
+    flows: MonthlyFlows,
+) -> Dict[str, np.ndarray]:
+    """
+    Project every bucket with whole-array NumPy operations instead of a month loop.
+
+    With growth factor g and G[t] = g**t, a balance that takes an inflow a[t]
+    each month before growth follows x[t] = G[t] * (x[0] + sum_{s<=t} a[s] / G[s-1]),
+    and a debt paid p after interest follows b[t] = G[t] * (b[0] - p * sum_{s<=t} 1 / G[s])
+    until the first month it reaches zero, after which it stays paid off.
+
+    Balances, rates and flows may also be (K, 1) arrays; every result then has
+    a leading scenario axis, shape (K, months + 1).
+    """
+    t = np.arange(months + 1, dtype=np.float64)
+    growth = {bucket: _growth_factors(r, months) for bucket, r in rates.items()}
+
+    def compound(balance, inflow, g: np.ndarray) -> np.ndarray:
+        # inflow[..., s] is added in month s before that month's growth
+        inflow = np.broadcast_to(inflow, g.shape)
+        added = np.zeros(g.shape)
+        np.cumsum(inflow[..., 1:] / g[..., :-1], axis=-1, out=added[..., 1:])
+        return g * (balance + added)
+
+    def repay(balance, payment, g: np.ndarray) -> np.ndarray:
+        # Only a positive balance with a positive payment gets paid down
+        active = np.logical_and(balance > 0.0, payment > 0.0)
+        paid = np.zeros(g.shape)
+        np.cumsum(np.where(active, payment, 0.0) / g[..., 1:], axis=-1, out=paid[..., 1:])
+        owed = g * (balance - paid)
+        # Payments are capped at what's owed. balance - paid only falls, so once
+        # a debt is cleared it stays cleared and a plain clip is enough
+        return np.where(active, np.maximum(owed, 0.0), owed)
+
+    # Checking gains its contribution and then sends up to the auto-invest
+    # amount on, so it moves by their difference and stops at zero
+    chk = np.maximum(start.checking + t * (flows.contrib_checking - flows.move_checking_to_invest), 0.0)
+    moved = np.zeros(chk.shape)
+    moved[..., 1:] = chk[..., :-1] + flows.contrib_checking - chk[..., 1:]
+
+    cars = start.cars_value * growth["cars_value"]
+    cars[..., 1:] = np.maximum(cars[..., 1:], 0.0)
+
+    return {
+        "real_estate": start.real_estate * growth["real_estate"],
+        "checking": chk,
+        "savings_hysa": compound(start.savings_hysa, flows.contrib_hysa, growth["savings_hysa"]),
+        "retirement_invest": compound(start.retirement_invest, flows.contrib_retirement + moved, growth["retirement_invest"]),
+        "cars_value": cars,
+        "other_assets": start.other_assets * growth["other_assets"],
+
+        "real_estate_loans": repay(start.real_estate_loans, flows.pay_mortgage, growth["real_estate_loans"]),
+        "credit_card_debt": repay(start.credit_card_debt, flows.pay_cc, growth["credit_card_debt"]),
+        "personal_loans": repay(start.personal_loans, flows.pay_personal, growth["personal_loans"]),
+        "student_loans": repay(start.student_loans, flows.pay_student, growth["student_loans"]),
+        "car_loans": repay(start.car_loans, flows.pay_car, growth["car_loans"]),
+        "other_debt": repay(start.other_debt, flows.pay_other_debt, growth["other_debt"]),
+    }
+
+
+def _growth_factors(rate, months: int) -> np.ndarray:
+    """
+    Compounded growth G[..., t] = (1 + r_1) * ... * (1 + r_t), with G[..., 0] = 1.
+
+    rate is either constant (a scalar, or (K, 1) for a batch) or a per-month
+    array of shape (..., months), so the same running product serves rates
+    that change over time.
+    """
+    step = 1.0 + np.asarray(rate, dtype=np.float64)
+    step = np.broadcast_to(step, step.shape[:-1] + (months,)) if step.ndim else np.full(months, step)
+    g = np.empty(step.shape[:-1] + (months + 1,))
+    g[..., 0] = 1.0
+    np.cumprod(step, axis=-1, out=g[..., 1:])
+    return g
+
+
+def _totals(columns: Dict[str, np.ndarray]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Unrounded assets total, liabilities total and net worth from per-bucket balance arrays."""
+    assets_total = sum(columns[c] for c in ASSET_COLUMNS)
+    liabilities_total = sum(columns[c] for c in LIABILITY_COLUMNS)
+    return assets_total, liabilities_total, assets_total - liabilities_total
+
+
+def _reduce(columns: Dict[str, np.ndarray], y: int, m: int, output: str) -> Union[Dict[str, np.ndarray], np.ndarray]:
+    """The "summary" or "array" result from per-bucket balance arrays, rounded to cents."""
+    assets_total, liabilities_total, net_worth = _totals(columns)
+    if output == "array":
+        return np.round(net_worth, 2, out=net_worth)
+    summary = {"assets_total": assets_total, "liabilities_total": liabilities_total, "net_worth": net_worth}
+    for col in summary.values():
+        np.round(col, 2, out=col)
+    return {"month": _month_labels(y, m, net_worth.shape[-1]), **summary}
+
+
+def _month_labels(y: int, m: int, n: int) -> np.ndarray:
+    """YYYY-MM labels for n consecutive months starting at (y, m)."""
+    # Month-resolution datetime64 values print as YYYY-MM
+    return (np.datetime64(f"{y:04d}-{m:02d}", "M") + np.arange(n)).astype(str)
+
+
+def _to_frame(columns: Dict[str, np.ndarray], y: int, m: int) -> pd.DataFrame:
+    """Add month labels and totals to per-bucket balance arrays and round everything to cents."""
+    assets_total, liabilities_total, net_worth = _totals(columns)
+    frame = {
+        "assets_total": assets_total,
+        "liabilities_total": liabilities_total,
+        "net_worth": net_worth,
+        **columns,
+    }
+    # One vectorized rounding pass per column instead of round() per value
+    for col in frame.values():
+        np.round(col, 2, out=col)
+    return pd.DataFrame({"month": _month_labels(y, m, len(assets_total)), **frame}, copy=False)
+
+
+def _simulate_month_by_month(
+    start: WealthInputs,
+    months: int,
+    rates: Dict[str, float],
+    flows: MonthlyFlows,
+) -> Dict[str, np.ndarray]:
+    """Step the projection one month at a time; handles any inputs."""
+    balances = _simulate_core(
+        float(start.real_estate), float(start.checking), float(start.savings_hysa),
+        float(start.retirement_invest), float(start.cars_value), float(start.other_assets),
+        float(start.real_estate_loans), float(start.credit_card_debt), float(start.personal_loans),
+        float(start.student_loans), float(start.car_loans), float(start.other_debt),
+        # Monthly growth factors, worked out once rather than every month
+        *(1.0 + rates[bucket] for bucket in GROWTH_BUCKETS),
+        float(flows.contrib_checking), float(flows.contrib_hysa), float(flows.contrib_retirement),
+        float(flows.move_checking_to_invest),
+        float(flows.pay_mortgage), float(flows.pay_cc), float(flows.pay_personal),
+        float(flows.pay_student), float(flows.pay_car), float(flows.pay_other_debt),
+        months,
+    )
+    return dict(zip(ASSET_COLUMNS + LIABILITY_COLUMNS, balances))
+
+
+@_njit
+def _simulate_core(
+    re_val, chk, hysa, invest, cars, other_a,
+    mort, cc, pers, stud, carl, other_d,
+    g_re, g_hysa, g_inv, g_cars, g_othera,
+    g_mort, g_cc, g_pers, g_stud, g_carl, g_otherd,
+    contrib_checking, contrib_hysa, contrib_retirement, move_checking_to_invest,
+    pay_mortgage, pay_cc, pay_personal, pay_student, pay_car, pay_other_debt,
+    months,
+):
+    """
+    The month loop on plain floats, so Numba can compile it when installed.
+
+    Returns one array of monthly balances per bucket, in
+    ASSET_COLUMNS + LIABILITY_COLUMNS order.
+    """
+    # One preallocated array per bucket, filled in by month index
+    re_arr = np.empty(months + 1)
+    chk_arr = np.empty(months + 1)
+    hysa_arr = np.empty(months + 1)
+    invest_arr = np.empty(months + 1)
+    cars_arr = np.empty(months + 1)
+    other_a_arr = np.empty(months + 1)
+    mort_arr = np.empty(months + 1)
+    cc_arr = np.empty(months + 1)
+    pers_arr = np.empty(months + 1)
+    stud_arr = np.empty(months + 1)
+    carl_arr = np.empty(months + 1)
+    other_d_arr = np.empty(months + 1)
+
+    # A zero or negative payment never changes a balance, same as paying nothing
+    pay_mortgage = max(pay_mortgage, 0.0)
+    pay_cc = max(pay_cc, 0.0)
+    pay_personal = max(pay_personal, 0.0)
+    pay_student = max(pay_student, 0.0)
+    pay_car = max(pay_car, 0.0)
+    pay_other_debt = max(pay_other_debt, 0.0)
+
+    for i in range(months + 1):
+        if i > 0:
+            # ---- Contributions (before growth) ----
+            chk += contrib_checking
+            hysa += contrib_hysa
+            invest += contrib_retirement
+
+            # Optional auto-move from checking to investments
+            move_amt = min(move_checking_to_invest, max(0.0, chk))
+            chk -= move_amt
+            invest += move_amt
+
+            # ---- Asset growth / depreciation ----
+            re_val *= g_re
+            hysa   *= g_hysa
+            invest *= g_inv
+            cars   *= g_cars       # g_cars is below 1 for depreciation
+            other_a*= g_othera
+
+            # Prevent tiny negative due to rounding
+            cars = max(0.0, cars)
+
+            # ---- Debt interest accrual ----
+            mort *= g_mort
+            cc   *= g_cc
+            pers *= g_pers
+            stud *= g_stud
+            carl *= g_carl
+            other_d *= g_otherd
+
+            # ---- Payments (cap at outstanding; a negative balance is left as is) ----
+            if mort > 0.0:
+                mort = mort - pay_mortgage if mort > pay_mortgage else 0.0
+            if cc > 0.0:
+                cc = cc - pay_cc if cc > pay_cc else 0.0
+            if pers > 0.0:
+                pers = pers - pay_personal if pers > pay_personal else 0.0
+            if stud > 0.0:
+                stud = stud - pay_student if stud > pay_student else 0.0
+            if carl > 0.0:
+                carl = carl - pay_car if carl > pay_car else 0.0
+            if other_d > 0.0:
+                other_d = other_d - pay_other_debt if other_d > pay_other_debt else 0.0
 
         # Record
-        record_row(y, m)
+        re_arr[i] = re_val
+        chk_arr[i] = chk
+        hysa_arr[i] = hysa
+        invest_arr[i] = invest
+        cars_arr[i] = cars
+        other_a_arr[i] = other_a
+        mort_arr[i] = mort
+        cc_arr[i] = cc
+        pers_arr[i] = pers
+        stud_arr[i] = stud
+        carl_arr[i] = carl
+        other_d_arr[i] = other_d
 
-    return pd.DataFrame(rows)
+    return (
+        re_arr, chk_arr, hysa_arr, invest_arr, cars_arr, other_a_arr,
+        mort_arr, cc_arr, pers_arr, stud_arr, carl_arr, other_d_arr,
+    )